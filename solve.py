@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
-import argparse
+import sys
 
 import solver
 
+# El resto de módulos se importa solo en las opciones que los usan (el perfilador, los modos de lotes y de
+# flujo, la caché, la traza), para que resolver un archivo no pague el arranque de todos ellos
+
+# Número de funciones que se muestran con --profile
+PROFILE_TOP = 25
+
 
 def show_about():
     print("""Resolutor de Sudoku Asesino.
@@ -11,11 +17,31 @@ def show_about():
 
 
 def main():
+    if sys.argv[1:2] == ["serve"]:
+        # El servicio tiene sus propias opciones (ver `solver.server.main`)
+        from solver.server import main as serve
+        return serve(sys.argv[2:])
+    if sys.argv[1:] and not any(argument.startswith("-") for argument in sys.argv[1:]):
+        # Ruta rápida: solo nombres de archivo, así que se resuelven con las opciones por defecto sin construir
+        # el analizador de argumentos
+        return solver.run_solver(filenames=sys.argv[1:])
+
+    import argparse
+
+    from solver.cache import DEFAULT_MAX_ENTRIES, DEFAULT_PATH
+    from solver.stream import OUTPUTS
+    from solver.trace import FORMATS
+
     parser = argparse.ArgumentParser(description="Resuelve un Killer Sudoku desde un archivo JSON")
     parser.add_argument("--stats",
                         action="store_true",
                         help=("Si se configura, el solucionador generará información sobre cuántas combinaciones "
-                              "fueron intentados antes de encontrar la solución."))
+                              "fueron intentados antes de encontrar la solución, los retrocesos, la profundidad y el "
+                              "tiempo de cada fase."))
+    parser.add_argument("--stats-format",
+                        default="text",
+                        choices=("text", "json"),
+                        help="El formato de las estadísticas de --stats: texto o una línea JSON por tablero.")
     parser.add_argument("--show-initial-board",
                         action="store_true",
                         help="Muestra el tablero y las regiones antes de intentar resolverlo.")
@@ -23,6 +49,113 @@ def main():
                         action="store_true",
                         help=("Haga una comparación con los archivos especificados,"
                               "intentando resolver los acertijos y mostrando el tiempo necesario para hacerlo."))
+    parser.add_argument("--disable-rule",
+                        action="append",
+                        default=[],
+                        choices=solver.RULES,
+                        help=("Desactiva una regla de propagación de restricciones. Se puede indicar varias veces "
+                              "para desactivar varias reglas."))
+    parser.add_argument("--ordering",
+                        default="row_major",
+                        choices=solver.ORDERINGS,
+                        help=("Estrategia para elegir la siguiente celda a rellenar: fila por fila (row_major), la de "
+                              "menos candidatos (mrv), la de menos candidatos desempatando por la jaula más pequeña "
+                              "(mrv_cage) o un orden fijo según lo restringidas que estén las jaulas (static)."))
+    parser.add_argument("--engine",
+                        default="recursive",
+                        choices=solver.ENGINES,
+                        help="Motor de búsqueda: recursivo o iterativo con una pila explícita.")
+    parser.add_argument("--backend",
+                        default="bitmask",
+                        choices=solver.BACKENDS,
+                        help=("Motor de resolución: búsqueda con máscaras de bits y propagación (bitmask) o cobertura "
+                              "exacta con Dancing Links (dlx) o fórmula SAT (sat). Los motores dlx y sat ignoran "
+                              "--disable-rule, --ordering y --engine."))
+    parser.add_argument("--sat-solver",
+                        help=("Con --backend sat, el comando de un solucionador SAT externo que lea un archivo DIMACS "
+                              "y escriba el resultado en el formato de las competiciones SAT, por ejemplo 'kissat -q'. "
+                              "Por defecto se usa el solucionador interno."))
+    parser.add_argument("--debug-validate",
+                        action="store_true",
+                        help="Valida el tablero completo después de resolverlo, para depurar el solucionador.")
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument("--cache",
+                             action="store_true",
+                             help=("Guarda las soluciones en una caché en disco y reutiliza las de los tableros ya "
+                                   "resueltos, aunque sus jaulas estén en otro orden."))
+    cache_group.add_argument("--no-cache",
+                             action="store_true",
+                             help=("Ignora las soluciones guardadas en la caché y resuelve de nuevo cada tablero, "
+                                   "guardando el resultado nuevo."))
+    parser.add_argument("--cache-file",
+                        default=DEFAULT_PATH,
+                        help=f"El archivo SQLite de la caché de soluciones ({DEFAULT_PATH} por defecto).")
+    parser.add_argument("--cache-symmetry",
+                        action="store_true",
+                        help=("Guarda en la caché la forma canónica de cada tablero, para que los tableros que solo "
+                              "se diferencian por un giro, un reflejo o el orden de sus bandas y pilas compartan la "
+                              "solución."))
+    parser.add_argument("--cache-size",
+                        type=int,
+                        default=DEFAULT_MAX_ENTRIES,
+                        help=("El número máximo de tableros en la caché. Al superarlo se descartan los usados hace "
+                              f"más tiempo ({DEFAULT_MAX_ENTRIES} por defecto)."))
+    parser.add_argument("--count",
+                        action="store_true",
+                        help=("Cuenta las soluciones del tablero en lugar de mostrar la primera, para comprobar si "
+                              "la solución es única."))
+    parser.add_argument("--limit",
+                        type=int,
+                        default=2,
+                        help=("Con --count, el número de soluciones en el que dejar de contar (2 por defecto, "
+                              "suficiente para saber si la solución es única). Con 0 se cuentan todas."))
+    parser.add_argument("--workers",
+                        type=int,
+                        default=1,
+                        help=("Reparte la búsqueda de cada tablero entre N procesos, dividiendo el árbol de búsqueda "
+                              "en subproblemas. Con 0 se usa un proceso por CPU."))
+    parser.add_argument("--jobs",
+                        type=int,
+                        default=1,
+                        help=("Resuelve los archivos en modo de lotes repartidos entre N procesos. Con 0 se usa un "
+                              "proceso por CPU."))
+    parser.add_argument("--unordered",
+                        action="store_true",
+                        help="En modo de lotes, muestra los resultados en el orden en que terminan.")
+    parser.add_argument("--timeout",
+                        type=float,
+                        help="En modo de lotes, el tiempo máximo en segundos para resolver cada tablero.")
+    parser.add_argument("--max-nodes",
+                        type=int,
+                        help=("Al resolver tableros uno por uno, abandona la búsqueda de cada tablero después de "
+                              "visitar N nodos."))
+    parser.add_argument("--time-limit",
+                        type=float,
+                        help=("Al resolver tableros uno por uno, abandona la búsqueda de cada tablero después de los "
+                              "segundos indicados. A diferencia de --timeout, no usa otro proceso ni alarmas."))
+    parser.add_argument("--jsonl",
+                        action="store_true",
+                        help=("Modo de flujo: cada archivo es un JSONL con un tablero por línea ('-' para leer de la "
+                              "entrada estándar), y se escribe una línea de salida por cada tablero."))
+    parser.add_argument("--output",
+                        default="string",
+                        choices=OUTPUTS,
+                        help=("En modo de flujo, escribe cada solución como una cadena de 81 dígitos (string) o como "
+                              "una línea JSON con su estado y sus estadísticas (jsonl)."))
+    parser.add_argument("--trace",
+                        metavar="FILE",
+                        help=("Registra la búsqueda nodo a nodo y la guarda en el archivo indicado: los nodos por "
+                              "profundidad, las celdas con más retrocesos, los candidatos de cada ramificación y el "
+                              "tiempo de propagación frente al de búsqueda. Hace la búsqueda más lenta."))
+    parser.add_argument("--trace-format",
+                        default="folded",
+                        choices=FORMATS,
+                        help=("El formato de --trace: pilas plegadas para un flamegraph (folded) o JSON de eventos "
+                              "para chrome://tracing o Perfetto (chrome)."))
+    parser.add_argument("--profile",
+                        action="store_true",
+                        help=(f"Ejecuta la resolución con cProfile y muestra las {PROFILE_TOP} funciones con más "
+                              "tiempo acumulado."))
     parser.add_argument("--about",
                         action="store_true",
                         help="Muestra texto que describe este script y sale")
@@ -34,11 +167,99 @@ def main():
     if parsed_args.about:
         return show_about()
 
-    solver.run_solver(filenames=parsed_args.filename,
-                      show_stats=parsed_args.stats,
-                      benchmark=parsed_args.benchmark,
-                      show_initial_board=parsed_args.show_initial_board)
+    if parsed_args.backend != "bitmask" and (parsed_args.jsonl or parsed_args.jobs != 1 or parsed_args.workers != 1
+                                             or parsed_args.timeout is not None or parsed_args.unordered):
+        parser.error(f"--backend {parsed_args.backend} solo se puede usar con un tablero por proceso")
+    if parsed_args.sat_solver and (parsed_args.backend != "sat" or parsed_args.count):
+        parser.error("--sat-solver solo se puede usar con --backend sat y sin --count")
+    use_cache = parsed_args.cache or parsed_args.no_cache
+    if use_cache and (parsed_args.count or parsed_args.jsonl or parsed_args.jobs != 1
+                      or parsed_args.timeout is not None or parsed_args.unordered):
+        parser.error("--cache y --no-cache solo se pueden usar al resolver tableros uno por uno")
+    if parsed_args.trace and (parsed_args.backend != "bitmask" or parsed_args.count or parsed_args.jsonl
+                              or parsed_args.jobs != 1 or parsed_args.workers != 1
+                              or parsed_args.timeout is not None or parsed_args.unordered):
+        parser.error("--trace solo se puede usar al resolver tableros uno por uno con --backend bitmask y un proceso")
+    if parsed_args.profile and (parsed_args.jsonl or parsed_args.jobs != 1 or parsed_args.timeout is not None
+                                or parsed_args.unordered):
+        parser.error("--profile solo se puede usar al resolver tableros uno por uno")
+    limited = parsed_args.max_nodes is not None or parsed_args.time_limit is not None
+    if limited and (parsed_args.backend != "bitmask" or parsed_args.count or parsed_args.jsonl
+                    or parsed_args.jobs != 1 or parsed_args.workers != 1
+                    or parsed_args.timeout is not None or parsed_args.unordered):
+        parser.error("--max-nodes y --time-limit solo se pueden usar al resolver tableros uno por uno con "
+                     "--backend bitmask y un proceso")
+    show_stats = parsed_args.stats_format if parsed_args.stats else None
+    rules = [rule for rule in solver.RULES if rule not in parsed_args.disable_rule]
+    if parsed_args.jsonl:
+        from solver.stream import run_stream
+        failures = run_stream(filenames=parsed_args.filename,
+                              output=parsed_args.output,
+                              jobs=parsed_args.jobs or None,
+                              ordered=not parsed_args.unordered,
+                              timeout=parsed_args.timeout,
+                              rules=rules,
+                              ordering=parsed_args.ordering,
+                              engine=parsed_args.engine,
+                              debug=parsed_args.debug_validate)
+        return 1 if failures else 0
+    if parsed_args.jobs != 1 or parsed_args.timeout is not None or parsed_args.unordered:
+        if parsed_args.show_initial_board:
+            parser.error("--show-initial-board no se puede usar en modo de lotes")
+        from solver.batch import run_batch
+        return run_batch(filenames=parsed_args.filename,
+                         jobs=parsed_args.jobs or None,
+                         ordered=not parsed_args.unordered,
+                         timeout=parsed_args.timeout,
+                         show_stats=show_stats,
+                         rules=rules,
+                         ordering=parsed_args.ordering,
+                         engine=parsed_args.engine,
+                         debug=parsed_args.debug_validate)
+
+    if use_cache:
+        from solver.cache import SolutionCache
+    if parsed_args.trace:
+        from solver.trace import SearchTrace
+    if parsed_args.profile:
+        import cProfile
+        import pstats
+    cache = SolutionCache(parsed_args.cache_file, parsed_args.cache_size, read=not parsed_args.no_cache,
+                          symmetric=parsed_args.cache_symmetry) if use_cache else None
+    trace = SearchTrace() if parsed_args.trace else None
+    profile = cProfile.Profile() if parsed_args.profile else None
+    try:
+        if profile is not None:
+            profile.enable()
+        solver.run_solver(filenames=parsed_args.filename,
+                          show_stats=show_stats,
+                          benchmark=parsed_args.benchmark,
+                          show_initial_board=parsed_args.show_initial_board,
+                          rules=rules,
+                          ordering=parsed_args.ordering,
+                          debug=parsed_args.debug_validate,
+                          engine=parsed_args.engine,
+                          count=parsed_args.count,
+                          limit=parsed_args.limit or None,
+                          workers=parsed_args.workers or None,
+                          backend=parsed_args.backend,
+                          sat_command=parsed_args.sat_solver,
+                          cache=cache,
+                          trace=trace,
+                          max_nodes=parsed_args.max_nodes,
+                          time_limit=parsed_args.time_limit)
+    finally:
+        if profile is not None:
+            profile.disable()
+        if cache is not None:
+            cache.close()
+
+    if profile is not None:
+        pstats.Stats(profile, stream=sys.stdout).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    if trace is not None:
+        with open(parsed_args.trace, "w") as trace_file:
+            trace.write(trace_file, parsed_args.trace_format)
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
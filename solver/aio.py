@@ -0,0 +1,33 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Optional
+
+from .budget import CancelToken, SolveResult
+from .common import Board, Cages
+from .solver import solve
+
+
+async def solve_async(board: Board, cages: Cages, *args, executor: Optional[Executor] = None,
+                      **kwargs) -> SolveResult:
+    """ Resuelve un tablero con `solve` en un ejecutor, sin bloquear el bucle de eventos.
+
+    Acepta los mismos argumentos que `solve`. Si se cancela la tarea (por ejemplo con `asyncio.wait_for`), se
+    activa la señal de cancelación de la búsqueda y se espera a que la búsqueda se detenga antes de propagar
+    la cancelación, así que el tablero no cambia después. La señal es un `budget.CancelToken`, que solo se
+    puede compartir entre hilos: el ejecutor debe ser de hilos, por defecto el del bucle de eventos.
+
+    :param board: El tablero inicial a utilizar, se actualiza con la solución
+    :param cages: Las jaulas de ese tablero
+    :param executor: El ejecutor de hilos donde resolver, por defecto el del bucle de eventos
+    :return: Devuelve el resultado de `solve`
+    """
+    token = kwargs.pop("cancel_token", None) or CancelToken()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, partial(solve, board, cages, *args, cancel_token=token, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel()
+        await asyncio.wait((future,))
+        raise
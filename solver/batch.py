@@ -0,0 +1,206 @@
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from functools import partial
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+from .bitmask import search
+from .common import Board, Cages, Regions
+from .iterative import SOLVED, UNSOLVABLE
+from .propagation import RULES
+from .puzzle import Puzzle
+from .solver import load_puzzle, print_board, validate
+from .stats import SolveStats
+
+# Estados posibles del resultado de un tablero, además de SOLVED y UNSOLVABLE
+TIMEOUT = "timeout"
+ERROR = "error"
+
+# Número de tableros enviados al grupo de procesos por cada proceso, antes de esperar resultados
+QUEUED_PER_WORKER = 4
+
+
+class BatchResult(NamedTuple):
+    """ El resultado de resolver un tablero en modo de lotes, con sus estadísticas. """
+    position: int
+    source: str
+    status: str
+    board: Optional[Board]
+    cages: Optional[Cages]
+    stats: SolveStats
+    duration: float
+    error: str = ""
+    regions: Optional[Regions] = None
+
+
+class PuzzleTimeout(Exception):
+    """ Se genera dentro de la búsqueda cuando un tablero supera su tiempo límite. """
+
+
+def _raise_timeout(signum, frame) -> None:
+    raise PuzzleTimeout()
+
+
+def solve_source(position: int, source: str, rules: Iterable[str] = RULES, ordering: str = "row_major",
+                 engine: str = "recursive", timeout: Optional[float] = None, debug: bool = False,
+                 load: Callable[[str], tuple[Board, Cages, Optional[Regions]]] = load_puzzle) -> BatchResult:
+    """ Carga y resuelve un tablero, devolviendo sus estadísticas en lugar de sumarlas en variables globales.
+
+    El tiempo límite se aplica con una alarma (`signal.setitimer`), por lo que solo tiene efecto en sistemas
+    que la soportan y cuando se llama desde el hilo principal, como ocurre en los procesos del grupo. Los
+    errores al cargar o resolver el tablero se devuelven en el resultado en lugar de generarse.
+
+    :param position: La posición del tablero en la entrada
+    :param source: De donde cargar el tablero, por defecto el nombre de un archivo JSON
+    :param rules: Las reglas de propagación a aplicar
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param engine: El motor de búsqueda a usar
+    :param timeout: El tiempo máximo en segundos para resolver el tablero, sin límite por defecto
+    :param debug: Si se valida el tablero completo después de resolverlo
+    :param load: La función que carga el tablero, las jaulas y las regiones de `source`, por defecto
+                 `load_puzzle`
+    :return: Devuelve el resultado del tablero
+    """
+    stats = SolveStats()
+    board, cages, regions = None, None, None
+    alarm = bool(timeout) and hasattr(signal, "setitimer") and \
+        threading.current_thread() is threading.main_thread()
+    start = time.perf_counter()
+    try:
+        board, cages, regions = load(source)
+        with stats.phase("compile"):
+            puzzle = Puzzle(board, cages, regions)
+        if alarm:
+            previous = signal.signal(signal.SIGALRM, _raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            success, _, _ = search(puzzle, rules, stats, ordering, engine)
+        finally:
+            if alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+        if success:
+            board = puzzle.to_board()
+            if debug:
+                with stats.phase("validate"):
+                    valid = validate(board, cages, regions)
+                if not valid:
+                    raise AssertionError("La solución encontrada no es válida")
+        status = SOLVED if success else UNSOLVABLE
+        return BatchResult(position, source, status, board, cages, stats, time.perf_counter() - start,
+                           regions=regions)
+    except PuzzleTimeout:
+        return BatchResult(position, source, TIMEOUT, board, cages, stats, time.perf_counter() - start,
+                           f"Tiempo límite de {timeout} s superado", regions)
+    except Exception as error:
+        return BatchResult(position, source, ERROR, board, cages, stats, time.perf_counter() - start,
+                           f"{type(error).__name__}: {error}", regions)
+
+
+def solve_batch(filenames: Iterable[str], jobs: Optional[int] = None, ordered: bool = True,
+                timeout: Optional[float] = None, rules: Iterable[str] = RULES, ordering: str = "row_major",
+                engine: str = "recursive", debug: bool = False) -> Iterator[BatchResult]:
+    """ Resuelve muchos tableros repartiéndolos entre varios procesos.
+
+    Los resultados se devuelven a medida que están disponibles, en el orden de entrada o en el orden en que
+    terminan, según `ordered` (ver `map_jobs`).
+
+    :param filenames: Los archivos JSON de los tableros a resolver
+    :param jobs: El número de procesos, por defecto uno por CPU
+    :param ordered: Si los resultados se devuelven en el orden de entrada, o si no en el orden en que terminan
+    :param timeout: El tiempo máximo en segundos para cada tablero, sin límite por defecto
+    :param rules: Las reglas de propagación a aplicar
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param engine: El motor de búsqueda a usar
+    :param debug: Si se valida el tablero completo después de resolverlo
+    :return: Devuelve un iterador con el resultado de cada tablero
+    """
+    work = partial(solve_source, rules=tuple(rules), ordering=ordering, engine=engine, timeout=timeout,
+                   debug=debug)
+    return map_jobs(work, enumerate(filenames), jobs, ordered)
+
+
+def map_jobs(work: Callable[[int, str], BatchResult], sources: Iterable[tuple[int, str]],
+             jobs: Optional[int] = None, ordered: bool = True) -> Iterator[BatchResult]:
+    """ Aplica `work` a cada tablero de la entrada en un grupo de procesos.
+
+    Solo se envían al grupo unos pocos tableros por proceso antes de esperar resultados, así que `sources`
+    puede ser un iterador muy largo sin cargarlo entero en memoria. Con `jobs` igual a 1 los tableros se
+    resuelven en el proceso actual, uno detrás de otro.
+
+    :param work: La función que resuelve un tablero a partir de su posición y su origen, debe poder enviarse
+                 a otro proceso
+    :param sources: Las tuplas de posición y origen de cada tablero
+    :param jobs: El número de procesos, por defecto uno por CPU
+    :param ordered: Si los resultados se devuelven en el orden de entrada, o si no en el orden en que terminan
+    :return: Devuelve un iterador con el resultado de cada tablero
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for position, source in sources:
+            yield work(position, source)
+        return
+
+    queued = jobs * QUEUED_PER_WORKER
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        if ordered:
+            pending = deque()
+            for position, source in sources:
+                pending.append(executor.submit(work, position, source))
+                if len(pending) >= queued:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        else:
+            pending = set()
+            for position, source in sources:
+                pending.add(executor.submit(work, position, source))
+                if len(pending) >= queued:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in as_completed(pending):
+                yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run_batch(filenames: list[str], jobs: Optional[int] = None, ordered: bool = True,
+              timeout: Optional[float] = None, show_stats: Optional[str] = None, rules: Iterable[str] = RULES,
+              ordering: str = "row_major", engine: str = "recursive", debug: bool = False) -> None:
+    """ Ejecuta el solucionador en modo de lotes e imprime el resultado de cada tablero y un resumen.
+
+    :param filenames: La lista de nombres de archivos para cargar y resolver
+    :param jobs: El número de procesos, por defecto uno por CPU
+    :param ordered: Si los resultados se muestran en el orden de entrada
+    :param timeout: El tiempo máximo en segundos para cada tablero
+    :param show_stats: El formato en que mostrar las estadísticas de cada tablero, "text" o "json", o None para
+                       no mostrarlas
+    :param rules: Las reglas de propagación a aplicar
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param engine: El motor de búsqueda a usar
+    :param debug: Si se valida el tablero completo después de resolverlo
+    """
+    labels = {SOLVED: "ÉXITO", UNSOLVABLE: "No se pudo encontrar solución", TIMEOUT: "Tiempo agotado", ERROR: "Error"}
+    totals = dict.fromkeys(labels, 0)
+    start = time.perf_counter()
+    for result in solve_batch(filenames, jobs, ordered, timeout, rules, ordering, engine, debug):
+        totals[result.status] += 1
+        print(f"Tablero {result.source}: {labels[result.status]} ({result.duration:.4f} s)")
+        if result.error:
+            print(result.error)
+        if result.board is not None and result.status != ERROR:
+            print_board(result.board, result.cages, result.regions)
+        if show_stats == "json" and result.status != ERROR:
+            print(result.stats.to_json())
+        elif show_stats and result.status != ERROR:
+            print(f"Orden de celdas: {ordering}")
+            print(result.stats.to_text())
+
+    duration = time.perf_counter() - start
+    print(f"{sum(totals.values())} tableros en {duration:.4f} s: {totals[SOLVED]} resueltos, "
+          f"{totals[UNSOLVABLE]} sin solución, {totals[TIMEOUT]} con tiempo agotado, {totals[ERROR]} con error")
@@ -0,0 +1,273 @@
+import copy
+import os
+import sys
+import time
+
+from . import dlx, sat, solver
+from .bitmask import ENGINES, search
+from .cache import SolutionCache
+from .common import Board, Cages
+from .ordering import ORDERINGS
+from .parallel import search_parallel
+from .propagation import RULES
+from .puzzle import Puzzle
+from .session import Session
+from .stats import SolveStats
+from .vectorized import np, solve_many
+
+
+def time_classic(board: Board, cages: Cages) -> tuple[float, int]:
+    """ Mide el motor recursivo original sobre una copia del tablero.
+
+    :param board: El tablero a resolver, no se modifica
+    :param cages: Las jaulas del tablero
+    :return: Devuelve una tupla con la duración en segundos y el número de nodos visitados
+    """
+    board = copy.deepcopy(board)
+    stats = SolveStats()
+    start = time.perf_counter()
+    solver.solve_classic(board, cages, stats)
+    duration = time.perf_counter() - start
+    return duration, stats.nodes
+
+
+def time_bitmask(board: Board, cages: Cages) -> tuple[float, int]:
+    """ Mide el motor de máscaras de bits sobre una copia del tablero.
+
+    :param board: El tablero a resolver, no se modifica
+    :param cages: Las jaulas del tablero
+    :return: Devuelve una tupla con la duración en segundos y el número de nodos visitados
+    """
+    puzzle = Puzzle(board, cages)
+    start = time.perf_counter()
+    _, nodes, _ = search(puzzle)
+    return time.perf_counter() - start, nodes
+
+
+def time_propagating(board: Board, cages: Cages) -> tuple[float, int]:
+    """ Mide el motor de máscaras de bits con todas las reglas de propagación sobre una copia del tablero.
+
+    :param board: El tablero a resolver, no se modifica
+    :param cages: Las jaulas del tablero
+    :return: Devuelve una tupla con la duración en segundos y el número de nodos visitados
+    """
+    puzzle = Puzzle(board, cages)
+    start = time.perf_counter()
+    _, nodes, _ = search(puzzle, RULES)
+    return time.perf_counter() - start, nodes
+
+
+def compare_engines(filenames: list[str]) -> None:
+    """ Compara los nodos por segundo del motor original y del motor de máscaras de bits.
+
+    :param filenames: Los archivos JSON de los tableros a comparar
+    """
+    engines = [("clásico", time_classic), ("máscaras", time_bitmask), ("propagación", time_propagating)]
+    for filename in filenames:
+        board, cages = solver.load_from_file(filename)
+        print(f"Tablero {filename}")
+        for name, timer in engines:
+            duration, nodes = timer(board, cages)
+            rate = nodes / duration if duration > 0 else 0.0
+            print(f"  {name:>11}: {duration:.4f} s, {nodes} nodos, {rate:,.0f} nodos/s")
+
+
+
+def compare_orderings(filenames: list[str]) -> None:
+    """ Compara el número de nodos y el tiempo de cada estrategia de orden de celdas.
+
+    Cada estrategia se mide con y sin reglas de propagación, ya que las reglas cambian mucho qué celdas
+    quedan por rellenar.
+
+    :param filenames: Los archivos JSON de los tableros a comparar
+    """
+    for filename in filenames:
+        puzzle = Puzzle(*solver.load_from_file(filename))
+        print(f"Órdenes de celdas para {filename}")
+        for rules, label in [((), "sin propagación"), (RULES, "con propagación")]:
+            for ordering in ORDERINGS:
+                copied = puzzle.copy()
+                start = time.perf_counter()
+                _, nodes, _ = search(copied, rules, ordering=ordering)
+                duration = time.perf_counter() - start
+                print(f"  {label} {ordering:>10}: {duration:.4f} s, {nodes} nodos")
+
+
+
+def compare_search_engines(filenames: list[str], repeat: int = 5) -> None:
+    """ Compara el motor recursivo y el iterativo, con y sin reglas de propagación.
+
+    Cada medida es la mejor de `repeat` ejecuciones, sobre una copia nueva del tablero cada vez.
+
+    :param filenames: Los archivos JSON de los tableros a comparar
+    :param repeat: El número de veces que se repite cada medida
+    """
+    for filename in filenames:
+        puzzle = Puzzle(*solver.load_from_file(filename))
+        print(f"Motores de búsqueda para {filename}")
+        for rules, label in [((), "sin propagación"), (RULES, "con propagación")]:
+            for engine in ENGINES:
+                best = None
+                for _ in range(repeat):
+                    copied = puzzle.copy()
+                    start = time.perf_counter()
+                    _, nodes, _ = search(copied, rules, engine=engine)
+                    duration = time.perf_counter() - start
+                    best = duration if best is None else min(best, duration)
+                print(f"  {label} {engine:>9}: {best:.4f} s, {nodes} nodos")
+
+
+def compare_workers(filenames: list[str], rules: tuple[str, ...] = (), repeat: int = 3) -> None:
+    """ Mide la aceleración de la búsqueda paralela de un solo tablero según el número de procesos.
+
+    Se usa la búsqueda sin propagación por defecto, ya que con propagación los tableros del repositorio se
+    resuelven casi sin buscar. Cada medida es la mejor de `repeat` ejecuciones e incluye crear los procesos,
+    y se mide tanto la búsqueda de la primera solución como el recuento de todas.
+
+    :param filenames: Los archivos JSON de los tableros a comparar
+    :param rules: Los nombres de las reglas de propagación a aplicar
+    :param repeat: El número de veces que se repite cada medida
+    """
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for filename in filenames:
+        puzzle = Puzzle(*solver.load_from_file(filename))
+        print(f"Búsqueda paralela para {filename} ({os.cpu_count()} CPU)")
+        for limit, label in [(1, "primera solución"), (None, "todas las soluciones")]:
+            baseline = None
+            for workers in counts:
+                best = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    if workers == 1 and limit == 1:
+                        search(puzzle.copy(), rules)
+                    else:
+                        search_parallel(puzzle, rules, workers=workers, limit=limit)
+                    duration = time.perf_counter() - start
+                    best = duration if best is None else min(best, duration)
+                baseline = baseline or best
+                print(f"  {label} con {workers} procesos: {best:.4f} s, aceleración {baseline / best:.2f}x")
+
+
+def compare_backends(filenames: list[str], repeat: int = 5) -> None:
+    """ Compara el motor de máscaras de bits, con y sin propagación, con la cobertura exacta de Dancing Links y
+    con el solucionador SAT interno.
+
+    Cada medida es la mejor de `repeat` ejecuciones e incluye construir la matriz de `dlx.build` o la fórmula
+    de `sat.encode`, ya que se construyen en cada resolución.
+
+    :param filenames: Los archivos JSON de los tableros a comparar
+    :param repeat: El número de veces que se repite cada medida
+    """
+    backends = [("máscaras", lambda puzzle: search(puzzle)), ("propagación", lambda puzzle: search(puzzle, RULES)),
+                ("dlx", dlx.search), ("sat", sat.search)]
+    for filename in filenames:
+        puzzle = Puzzle(*solver.load_from_file(filename))
+        print(f"Motores de resolución para {filename}")
+        for name, run in backends:
+            best = None
+            for _ in range(repeat):
+                copied = puzzle.copy()
+                start = time.perf_counter()
+                _, nodes, _ = run(copied)
+                duration = time.perf_counter() - start
+                best = duration if best is None else min(best, duration)
+            print(f"  {name:>11}: {best:.4f} s, {nodes} nodos")
+
+
+def compare_cache(filenames: list[str], repeat: int = 100) -> None:
+    """ Compara el tiempo de `solve` sin caché de soluciones, con un fallo de la caché y con un acierto.
+
+    La caché se guarda en memoria, así que la medida no incluye el acceso al disco. El tiempo sin caché y el de
+    un acierto son la media de `repeat` ejecuciones.
+
+    :param filenames: Los archivos JSON de los tableros a comparar
+    :param repeat: El número de veces que se repite cada medida
+    """
+    for filename in filenames:
+        board, cages = solver.load_from_file(filename)
+        print(f"Caché de soluciones para {filename}")
+        with SolutionCache(":memory:") as cache:
+            for label, use_cache, number in [("sin caché", None, repeat), ("fallo", cache, 1),
+                                             ("acierto", cache, repeat)]:
+                boards = [copy.deepcopy(board) for _ in range(number)]
+                start = time.perf_counter()
+                for copied in boards:
+                    solver.solve(copied, cages, cache=use_cache)
+                duration = (time.perf_counter() - start) / number
+                print(f"  {label:>9}: {duration * 1e6:,.0f} µs")
+
+
+def compare_session(filenames: list[str], repeat: int = 100) -> None:
+    """ Compara el coste de un cambio en un editor: volver a llamar a `solve` con el tablero entero, o
+    comunicar el cambio a una `Session` y preguntar si el tablero aún tiene solución.
+
+    Cada cambio introduce el valor de la solución en una celda vacía y lo vuelve a borrar.
+
+    :param filenames: Los archivos JSON de los tableros a comparar
+    :param repeat: El número de cambios que se miden
+    """
+    for filename in filenames:
+        board, cages = solver.load_from_file(filename)
+        solution = copy.deepcopy(board)
+        if not solver.solve(solution, cages):
+            continue
+        cells = [(x, y) for y in range(9) for x in range(9) if not board[y][x]] or [(0, 0)]
+        print(f"Edición interactiva para {filename}")
+
+        start = time.perf_counter()
+        for position in range(repeat):
+            x, y = cells[position % len(cells)]
+            edited = copy.deepcopy(board)
+            edited[y][x] = solution[y][x]
+            solver.solve(edited, cages)
+        print(f"  {'solve':>16}: {(time.perf_counter() - start) / repeat * 1e6:,.0f} µs por cambio")
+
+        session = Session(board, cages)
+        start = time.perf_counter()
+        for position in range(repeat):
+            x, y = cells[position % len(cells)]
+            session.set_cell(x, y, solution[y][x])
+            session.solvable()
+            session.clear_cell(x, y)
+        print(f"  {'Session':>16}: {(time.perf_counter() - start) / repeat * 1e6:,.0f} µs por cambio")
+
+
+def compare_solve_many(filenames: list[str], sizes: tuple[int, ...] = (1, 100, 10_000)) -> None:
+    """ Compara los tableros por segundo de `solve_many` con y sin la propagación en bloque de NumPy.
+
+    Los bloques se forman repitiendo los tableros con solución de los archivos hasta el tamaño indicado.
+
+    :param filenames: Los archivos JSON de los tableros
+    :param sizes: Los tamaños de bloque a medir
+    """
+    puzzles = []
+    for filename in filenames:
+        board, cages = solver.load_from_file(filename)
+        if solver.solve(copy.deepcopy(board), cages):
+            puzzles.append((board, cages))
+    if not puzzles:
+        return
+    print(f"solve_many con {len(puzzles)} tableros distintos")
+    for size in sizes:
+        for label, use_numpy in [("NumPy", True), ("Python", False)]:
+            if use_numpy and np is None:
+                print(f"  {size:>6} {label:>7}: NumPy no está instalado")
+                continue
+            batch = [(copy.deepcopy(puzzles[position % len(puzzles)][0]), puzzles[position % len(puzzles)][1])
+                     for position in range(size)]
+            start = time.perf_counter()
+            solve_many(batch, use_numpy=use_numpy)
+            duration = time.perf_counter() - start
+            print(f"  {size:>6} {label:>7}: {size / duration:,.0f} tableros/s")
+
+
+if __name__ == '__main__':
+    filenames = sys.argv[1:] or ["Killer.json", "puzzles/test_solve.json"]
+    compare_engines(filenames)
+    compare_orderings(filenames)
+    compare_search_engines(filenames)
+    compare_backends(filenames)
+    compare_cache(filenames)
+    compare_session(filenames)
+    compare_solve_many(filenames)
+    compare_workers(filenames)
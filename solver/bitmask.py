@@ -0,0 +1,534 @@
+import time
+from array import array
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+
+from .budget import Budget, SearchInterrupted
+from .combinations import cage_table
+from .common import value_bit
+from .iterative import SEARCHING, SOLVED, IterativeSearch
+from .ordering import STATIC_ORDERINGS, Selector, make_selector, static_order
+from .propagation import Propagator
+from .puzzle import Puzzle
+from .stats import SolveStats
+
+if TYPE_CHECKING:
+    # Solo para las anotaciones: la traza la crea quien la pide (ver `trace`), así que no se importa al arrancar
+    from .trace import SearchTrace
+
+# Motores de búsqueda disponibles: recursivo (un marco de Python por nivel) o iterativo (pila explícita)
+ENGINES = ("recursive", "iterative")
+
+# Cada cuántos nodos se comprueba si se ha cancelado una búsqueda en `iter_solutions`
+CANCEL_INTERVAL = 1000
+
+
+class BitmaskState:
+    """ Estado incremental de la búsqueda basado en máscaras de bits.
+
+    Mantiene una máscara de valores usados por cada fila, columna, región y jaula. Colocar o retirar un
+    valor es una operación O(1), y los candidatos de una celda se obtienen con una sola operación AND sobre
+    las máscaras y la entrada de la tabla de combinaciones de su jaula (ver `combinations.cage_table`).
+
+    La propagación de restricciones puede además descartar valores de una celda (`removed`). Los cambios
+    hechos con `assign` y `eliminate` se anotan en `trail` para poder deshacerlos con `undo`.
+    """
+
+    def __init__(self, puzzle: Puzzle) -> None:
+        """ Crea el estado a partir de un tablero compilado.
+
+        Si los valores iniciales del tablero ya están en conflicto entre sí, `consistent` será falso.
+
+        :param puzzle: El tablero y sus jaulas
+        """
+        geometry = puzzle.geometry
+        self.size = geometry.size
+        self.row_of, self.col_of, self.region_of = geometry.row_of, geometry.col_of, geometry.region_of
+        self.values = [0] * geometry.cells
+        self.removed = [0] * geometry.cells
+        self.cell_cage = list(puzzle.cell_cage)
+        self.cage_cells = puzzle.cage_cells
+        self.rows = [0] * geometry.size
+        self.cols = [0] * geometry.size
+        self.regions = [0] * geometry.size
+        self.cage_used = [0] * puzzle.cage_count
+        self.cage_tables = [cage_table(total, size, geometry.size)
+                            for total, size in zip(puzzle.cage_totals, puzzle.cage_sizes)]
+        self.trail: list[tuple[int, int]] = []
+        self.consistent = True
+
+        for index, value in enumerate(puzzle.board):
+            if value > 0:
+                if not self.candidates(index) & value_bit(value):
+                    self.consistent = False
+                self.place(index, value)
+
+    def candidates(self, index: int) -> int:
+        """ Calcula la máscara de valores que aún pueden colocarse en una celda.
+
+        :param index: El índice de la celda (y * N + x)
+        :return: Devuelve la máscara de candidatos de la celda
+        """
+        cage = self.cell_cage[index]
+        used = self.rows[self.row_of[index]] | self.cols[self.col_of[index]] | \
+            self.regions[self.region_of[index]] | self.removed[index]
+        return ~used & self.cage_tables[cage][self.cage_used[cage]]
+
+    def cage_feasible(self, cage: int) -> bool:
+        """ Comprueba que todas las celdas vacías de una jaula aún tienen algún candidato.
+
+        :param cage: El índice de la jaula
+        :return: Devuelve un booleano Falso si alguna celda vacía de la jaula se ha quedado sin candidatos
+        """
+        values = self.values
+        return all(self.candidates(index) for index in self.cage_cells[cage] if not values[index])
+
+    def place(self, index: int, value: int) -> None:
+        """ Coloca un valor en una celda y actualiza las máscaras.
+
+        :param index: El índice de la celda (y * N + x)
+        :param value: El valor a colocar
+        """
+        bit = value_bit(value)
+        cage = self.cell_cage[index]
+        self.values[index] = value
+        self.rows[self.row_of[index]] |= bit
+        self.cols[self.col_of[index]] |= bit
+        self.regions[self.region_of[index]] |= bit
+        self.cage_used[cage] |= bit
+
+    def remove(self, index: int) -> None:
+        """ Retira el valor de una celda y restaura las máscaras.
+
+        :param index: El índice de la celda (y * N + x)
+        """
+        value = self.values[index]
+        bit = value_bit(value)
+        cage = self.cell_cage[index]
+        self.values[index] = 0
+        self.rows[self.row_of[index]] ^= bit
+        self.cols[self.col_of[index]] ^= bit
+        self.regions[self.region_of[index]] ^= bit
+        self.cage_used[cage] ^= bit
+
+    def assign(self, index: int, value: int) -> None:
+        """ Coloca un valor en una celda y lo anota en el registro de cambios.
+
+        :param index: El índice de la celda (y * N + x)
+        :param value: El valor a colocar
+        """
+        self.place(index, value)
+        self.trail.append((index, -1))
+
+    def eliminate(self, index: int, mask: int) -> None:
+        """ Descarta valores de los candidatos de una celda y lo anota en el registro de cambios.
+
+        :param index: El índice de la celda (y * N + x)
+        :param mask: La máscara de valores a descartar
+        """
+        self.trail.append((index, self.removed[index]))
+        self.removed[index] |= mask
+
+    def undo(self, mark: int) -> None:
+        """ Deshace los cambios del registro hasta dejarlo con la longitud `mark`.
+
+        :param mark: La longitud del registro a la que volver, obtenida con `len(state.trail)`
+        """
+        trail = self.trail
+        while len(trail) > mark:
+            index, previous = trail.pop()
+            if previous < 0:
+                self.remove(index)
+            else:
+                self.removed[index] = previous
+
+
+def prepare(puzzle: Puzzle) -> BitmaskState:
+    """ Crea el estado de búsqueda y rellena las jaulas de una sola celda.
+
+    Igual que en `solve_classic`, las jaulas de una sola celda se rellenan antes de buscar, así el resto de
+    celdas las ven como valores ocupados desde el principio.
+
+    :param puzzle: El tablero y sus jaulas
+    :return: Devuelve el estado, con `consistent` falso si el tablero ya no tiene solución
+    """
+    state = BitmaskState(puzzle)
+    for total, cells in zip(puzzle.cage_totals, puzzle.cage_cells):
+        index = cells[0]
+        if len(cells) == 1 and state.values[index] == 0:
+            if not state.candidates(index) & value_bit(total):
+                state.consistent = False
+                break
+            state.place(index, total)
+    return state
+
+
+def search(puzzle: Puzzle, rules: Iterable[str] = (), stats: Optional[SolveStats] = None,
+           ordering: str = "row_major", engine: str = "recursive", trace: Optional["SearchTrace"] = None,
+           budget: Optional[Budget] = None) -> tuple[bool, int, int]:
+    """ Resuelve el tablero con el motor de máscaras de bits.
+
+    Las celdas vacías se recorren en el mismo orden que `fill_out_next` (fila por fila) y los valores se
+    prueban de menor a mayor, por lo que la solución encontrada es la misma. La diferencia es que los
+    candidatos se obtienen de las máscaras incrementales en lugar de construir listas en cada nodo.
+
+    Si se indican reglas de propagación (ver `propagation.RULES`), estas se aplican hasta un punto fijo antes
+    de la búsqueda y de nuevo después de cada valor probado. Como las reglas solo descartan valores que no
+    pueden formar parte de ninguna solución, la solución encontrada sigue siendo la misma.
+
+    El orden en que se eligen las celdas se puede cambiar con `ordering` (ver `ordering.ORDERINGS`). Con un
+    orden distinto de `row_major` la solución encontrada solo puede cambiar si el tablero tiene varias.
+
+    Las sumas de las jaulas se comprueban de forma incremental: cada vez que se coloca un valor en una jaula,
+    se verifica que sus celdas vacías aún pueden completar la suma, y la última celda de una jaula solo puede
+    recibir el valor exacto que falta. Por eso un tablero lleno ya es válido y no hace falta `validate`.
+
+    El motor `iterative` (ver `iterative.IterativeSearch`) recorre el mismo árbol en el mismo orden que el
+    motor `recursive`, pero con una pila explícita en lugar de recursión.
+
+    El tablero de `puzzle` se actualiza con la solución si se encuentra. Si se indica un objeto `stats`, se
+    suman en él los nodos, retrocesos, el histograma de nodos por profundidad, las celdas resueltas y los
+    candidatos descartados por cada regla, y el tiempo de preparación y de búsqueda.
+
+    Con una traza (ver `trace.SearchTrace`) la búsqueda se hace con `search_traced`, que recorre el árbol de
+    forma recursiva con un propagador y un selector de celdas aunque no haya reglas, e ignora `engine`. Sin
+    traza no se ejecuta nada de ella.
+
+    Con un presupuesto (ver `budget.Budget`), todos los motores lo comprueban cada pocos nodos, y si se agota
+    o se cancela la resolución se genera un `budget.SearchInterrupted` después de registrar en `stats` lo
+    recorrido hasta entonces. El tablero de `puzzle` no se modifica en ese caso.
+
+    :param puzzle: El tablero a resolver y sus jaulas
+    :param rules: Los nombres de las reglas de propagación a aplicar, ninguna por defecto
+    :param stats: Las estadísticas donde registrar la resolución, opcional
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param engine: El motor de búsqueda a usar, uno de `ENGINES`
+    :param trace: La traza donde registrar la búsqueda en detalle, opcional
+    :param budget: Los límites de la búsqueda, opcional
+    :return: Devuelve una tupla con un booleano verdadero si se encontró solución, el número de nodos
+             visitados y el número de comprobaciones incrementales de jaulas
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de búsqueda desconocido: {engine}")
+    start = time.perf_counter()
+    state = prepare(puzzle)
+    if not state.consistent:
+        if stats is not None:
+            stats.phases["prepare"] += time.perf_counter() - start
+        return False, 0, 0
+
+    # Nodos visitados en cada profundidad; la búsqueda los cuenta aquí en lugar de en un contador aparte
+    depth_nodes = [0] * (puzzle.geometry.cells + 1)
+    propagator, select, order = make_strategy(state, puzzle, rules, stats, ordering, trace is not None)
+    prepared = time.perf_counter()
+    iterative = None
+    try:
+        if trace is not None:
+            success, checks, path = search_traced(state, propagator, select, depth_nodes, trace, budget)
+        elif engine == "iterative":
+            iterative = IterativeSearch(state, order, propagator, select, depth_nodes)
+            status = iterative.run() if budget is None else run_budgeted(iterative, budget)
+            success, checks, path = status == SOLVED, iterative.checks, iterative.depth
+        elif propagator is not None:
+            success, checks, path = search_propagating(state, propagator, select, depth_nodes, budget)
+        else:
+            success, checks, path = search_plain(state, order, depth_nodes, budget)
+    except SearchInterrupted as interrupted:
+        interrupted.nodes = sum(depth_nodes)
+        if stats is not None:
+            stats.phases["prepare"] += prepared - start
+            stats.phases["search"] += time.perf_counter() - prepared
+            # Los motores recursivos no devuelven sus comprobaciones al interrumpirse
+            record_search(stats, depth_nodes, iterative.checks if iterative is not None else 0, 0)
+        raise
+
+    nodes = sum(depth_nodes)
+    if stats is not None:
+        stats.phases["prepare"] += prepared - start
+        stats.phases["search"] += time.perf_counter() - prepared
+        record_search(stats, depth_nodes, checks, path if success else 0)
+    if not success:
+        return False, nodes, checks
+
+    puzzle.board[:] = array('b', state.values)
+    return True, nodes, checks
+
+
+def make_strategy(state: BitmaskState, puzzle: Puzzle, rules: Iterable[str], stats: Optional[SolveStats],
+                  ordering: str, dynamic: bool = False) \
+        -> tuple[Optional[Propagator], Optional[Selector], Optional[list[int]]]:
+    """ Prepara cómo se recorre el árbol de búsqueda: con propagación y un selector de celdas, o sin
+    propagación y con un orden fijo de celdas.
+
+    :param state: El estado preparado con `prepare`
+    :param puzzle: El tablero y sus jaulas
+    :param rules: Los nombres de las reglas de propagación a aplicar
+    :param stats: Las estadísticas donde la propagación suma las celdas resueltas y los candidatos descartados
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param dynamic: Si se usa el propagador y el selector aunque no haya reglas y el orden sea fijo
+    :return: Devuelve una tupla con el propagador y el selector, o con el orden fijo de celdas, y None en los
+             elementos que no se usan
+    """
+    rules = tuple(rules)
+    if rules or ordering not in STATIC_ORDERINGS or dynamic:
+        resolved, eliminated = (stats.resolved, stats.eliminated) if stats is not None else (None, None)
+        propagator = Propagator(state, puzzle, rules, resolved, eliminated)
+        return propagator, make_selector(ordering, state, puzzle), None
+    return None, None, static_order(ordering, state, puzzle)
+
+
+def record_search(stats: SolveStats, depth_nodes: list[int], checks: int, path: int) -> None:
+    """ Suma los contadores de una búsqueda a las estadísticas.
+
+    :param stats: Las estadísticas a actualizar
+    :param depth_nodes: El número de nodos visitados en cada profundidad
+    :param checks: El número de comprobaciones incrementales de jaulas
+    :param path: La profundidad de la solución en la que terminó la búsqueda, o 0 si no terminó en una solución
+    """
+    nodes = sum(depth_nodes)
+    stats.nodes += nodes
+    stats.checks += checks
+    # Todos los nodos visitados son retrocesos, salvo los del camino que lleva a la última solución
+    stats.backtracks += nodes - path
+    stats.record_depths(depth_nodes)
+
+
+def iter_solutions(puzzle: Puzzle, rules: Iterable[str] = (), stats: Optional[SolveStats] = None,
+                   ordering: str = "row_major", cancelled: Optional[Callable[[], bool]] = None) -> Iterator[array]:
+    """ Recorre todas las soluciones del tablero, calculando cada una solo cuando se pide.
+
+    Usa el motor iterativo (ver `iterative.IterativeSearch.resume`) con las mismas reglas de propagación,
+    órdenes de celdas y tablas de combinaciones que `search`, y continúa la búsqueda después de cada solución.
+    Si se deja de consumir el iterador, la búsqueda se detiene y las estadísticas reflejan lo recorrido hasta
+    entonces. Lo mismo ocurre si `cancelled` devuelve verdadero, lo que se comprueba cada `CANCEL_INTERVAL`
+    nodos. El tablero de `puzzle` no se modifica.
+
+    :param puzzle: El tablero y sus jaulas
+    :param rules: Los nombres de las reglas de propagación a aplicar, ninguna por defecto
+    :param stats: Las estadísticas donde registrar la búsqueda, opcional
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param cancelled: Una función que devuelve verdadero si se debe abandonar la búsqueda, opcional
+    :return: Devuelve un iterador con cada solución como un arreglo plano de N x N valores
+    """
+    start = time.perf_counter()
+    state = prepare(puzzle)
+    if not state.consistent:
+        if stats is not None:
+            stats.phases["prepare"] += time.perf_counter() - start
+        return
+
+    depth_nodes = [0] * (puzzle.geometry.cells + 1)
+    propagator, select, order = make_strategy(state, puzzle, rules, stats, ordering)
+    searching = time.perf_counter()
+    if stats is not None:
+        stats.phases["prepare"] += searching - start
+    interval = CANCEL_INTERVAL if cancelled is not None else None
+    iterative = IterativeSearch(state, order, propagator, select, depth_nodes)
+    status = iterative.run(interval)
+    while status == SEARCHING and not cancelled():
+        status = iterative.run(interval)
+    searching = time.perf_counter() - searching
+    try:
+        while status == SOLVED:
+            yield array('b', state.values)
+            resumed = time.perf_counter()
+            status = iterative.resume(interval)
+            while status == SEARCHING and not cancelled():
+                status = iterative.run(interval)
+            searching += time.perf_counter() - resumed
+    finally:
+        if stats is not None:
+            stats.phases["search"] += searching
+            record_search(stats, depth_nodes, iterative.checks, iterative.depth if status == SOLVED else 0)
+
+
+def run_budgeted(iterative: IterativeSearch, budget: Budget) -> str:
+    """ Ejecuta una búsqueda iterativa por tramos, comprobando el presupuesto entre uno y otro.
+
+    Si se agota el presupuesto o se cancela la resolución, se generará un `budget.SearchInterrupted`.
+
+    :param iterative: La búsqueda a ejecutar
+    :param budget: Los límites de la búsqueda
+    :return: Devuelve el estado final de la búsqueda, SOLVED o UNSOLVABLE
+    """
+    status = iterative.status
+    while status == SEARCHING:
+        status = iterative.run(budget.check(iterative.nodes))
+    return status
+
+
+def search_plain(state: BitmaskState, order: list[int], depth_nodes: list[int],
+                 budget: Optional[Budget] = None) -> tuple[bool, int, int]:
+    """ Búsqueda recursiva sin propagación sobre las máscaras del estado, con un orden de celdas fijo.
+
+    Con un presupuesto, se comprueba cuando se han visitado los nodos que permitió la comprobación anterior
+    (ver `budget.Budget.check`), y si se agota se genera un `budget.SearchInterrupted` que deshace toda la
+    recursión. El estado queda a medias en ese caso.
+
+    :param state: El estado preparado con `prepare`
+    :param order: Los índices de todas las celdas vacías, en el orden en que se deben rellenar
+    :param depth_nodes: La lista donde se cuentan los nodos visitados en cada profundidad, con una posición
+                        por cada celda de `order`
+    :param budget: Los límites de la búsqueda, opcional
+    :return: Devuelve una tupla con un booleano verdadero si se encontró solución, el número de comprobaciones
+             de jaulas y la profundidad de la solución. Si hay solución, `state.values` la contiene
+    """
+    values = state.values
+    last = len(order) - 1
+    cell_cage = state.cell_cage
+    rows, cols, regions = state.rows, state.cols, state.regions
+    row_of, col_of, region_of = state.row_of, state.col_of, state.region_of
+    cage_used, cage_tables = state.cage_used, state.cage_tables
+    checks = 0
+    # Nodos que quedan hasta la siguiente comprobación del presupuesto; sin presupuesto nunca llega a 0
+    countdown = 0 if budget is not None else -1
+
+    # Las celdas de la misma jaula que aún estarán vacías al rellenar cada posición del orden
+    mates_after = [tuple(order[later] for later in range(position + 1, len(order))
+                         if cell_cage[order[later]] == cell_cage[order[position]])
+                   for position in range(len(order))]
+
+    def fill(position: int) -> bool:
+        nonlocal checks, countdown
+        if not countdown:
+            countdown = budget.check(sum(depth_nodes))
+        countdown -= 1
+        depth_nodes[position] += 1
+        index = order[position]
+        row, col, region, cage = row_of[index], col_of[index], region_of[index], cell_cage[index]
+        candidates = ~(rows[row] | cols[col] | regions[region]) & cage_tables[cage][cage_used[cage]]
+        mates = mates_after[position]
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            value = bit.bit_length()
+            if position == last:
+                values[index] = value
+                return True
+            rows[row] |= bit
+            cols[col] |= bit
+            regions[region] |= bit
+            cage_used[cage] |= bit
+            # Comprobación incremental de la jaula: cada celda que le queda vacía debe poder completar la suma
+            checks += 1
+            allowed = cage_tables[cage][cage_used[cage]]
+            for mate in mates:
+                if not ~(rows[row_of[mate]] | cols[col_of[mate]] | regions[region_of[mate]]) & allowed:
+                    break
+            else:
+                if fill(position + 1):
+                    values[index] = value
+                    return True
+            rows[row] ^= bit
+            cols[col] ^= bit
+            regions[region] ^= bit
+            cage_used[cage] ^= bit
+        return False
+
+    return not order or fill(0), checks, len(order)
+
+
+def search_propagating(state: BitmaskState, propagator: Propagator, select: Selector,
+                       depth_nodes: list[int], budget: Optional[Budget] = None) -> tuple[bool, int, int]:
+    """ Búsqueda recursiva que propaga restricciones antes de empezar y después de cada valor probado.
+
+    El presupuesto se comprueba igual que en `search_plain`.
+
+    :param state: El estado preparado con `prepare`
+    :param propagator: El propagador con las reglas a aplicar sobre `state`
+    :param select: La función que elige la siguiente celda vacía (ver `ordering.make_selector`)
+    :param depth_nodes: La lista donde se cuentan los nodos visitados en cada profundidad, con una posición
+                        por cada celda vacía
+    :param budget: Los límites de la búsqueda, opcional
+    :return: Devuelve una tupla con un booleano verdadero si se encontró solución, el número de comprobaciones
+             de jaulas y la profundidad de la solución. Si hay solución, `state.values` la contiene
+    """
+    checks = 0
+    path = 0
+    countdown = 0 if budget is not None else -1
+
+    def fill(depth: int) -> bool:
+        nonlocal checks, path, countdown
+        index = select()
+        if index < 0:
+            path = depth
+            return True
+        if not countdown:
+            countdown = budget.check(sum(depth_nodes))
+        countdown -= 1
+        depth_nodes[depth] += 1
+        candidates = state.candidates(index)
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            mark = len(state.trail)
+            state.assign(index, bit.bit_length())
+            checks += 1
+            if state.cage_feasible(state.cell_cage[index]) and propagator.propagate() and fill(depth + 1):
+                return True
+            state.undo(mark)
+        return False
+
+    return propagator.propagate() and fill(0), checks, path
+
+
+def search_traced(state: BitmaskState, propagator: Propagator, select: Selector, depth_nodes: list[int],
+                  trace: "SearchTrace", budget: Optional[Budget] = None) -> tuple[bool, int, int]:
+    """ Igual que `search_propagating`, pero registrando cada nodo y cada propagación en una traza.
+
+    Es una copia aparte de la búsqueda para que `search_propagating` no tenga que comprobar en cada nodo si
+    hay traza. Cada valor probado que no lleva a una solución cuenta como un retroceso de su celda.
+
+    :param state: El estado preparado con `prepare`
+    :param propagator: El propagador con las reglas a aplicar sobre `state`
+    :param select: La función que elige la siguiente celda vacía (ver `ordering.make_selector`)
+    :param depth_nodes: La lista donde se cuentan los nodos visitados en cada profundidad
+    :param trace: La traza donde registrar la búsqueda
+    :param budget: Los límites de la búsqueda, opcional
+    :return: Devuelve una tupla con un booleano verdadero si se encontró solución, el número de comprobaciones
+             de jaulas y la profundidad de la solución. Si hay solución, `state.values` la contiene
+    """
+    checks = 0
+    path = 0
+    countdown = 0 if budget is not None else -1
+    clock = time.perf_counter
+    backtracks = trace.backtracks
+
+    def propagate() -> bool:
+        start = clock()
+        consistent = propagator.propagate()
+        trace.propagated(start, clock())
+        return consistent
+
+    def fill(depth: int) -> bool:
+        nonlocal checks, path, countdown
+        index = select()
+        if index < 0:
+            path = depth
+            return True
+        if not countdown:
+            countdown = budget.check(sum(depth_nodes))
+        countdown -= 1
+        depth_nodes[depth] += 1
+        candidates = state.candidates(index)
+        trace.enter(index, candidates)
+        count = candidates.bit_count()
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            mark = len(state.trail)
+            state.assign(index, bit.bit_length())
+            checks += 1
+            if state.cage_feasible(state.cell_cage[index]) and propagate() and fill(depth + 1):
+                trace.leave(depth, count)
+                return True
+            state.undo(mark)
+            backtracks[index] += 1
+        trace.leave(depth, count)
+        return False
+
+    trace.begin(state.size)
+    try:
+        success = propagate() and fill(0)
+    finally:
+        trace.finish(depth_nodes)
+    return success, checks, path
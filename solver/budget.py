@@ -0,0 +1,139 @@
+import time
+from typing import NamedTuple, Optional
+
+from .iterative import SOLVED
+from .stats import SolveStats
+
+# Estados posibles del resultado de `solve`, además de SOLVED y UNSOLVABLE (ver `iterative`)
+BUDGET_EXHAUSTED = "budget_exhausted"
+CANCELLED = "cancelled"
+
+# Número máximo de nodos que visita la búsqueda entre dos comprobaciones del presupuesto. Consultar el reloj
+# y la señal de cancelación en cada nodo costaría más que el propio nodo
+CHECK_INTERVAL = 1024
+
+# Tiempo en segundos que se intenta dejar entre dos comprobaciones. Un nodo con propagación cuesta mucho más
+# que uno sin ella, así que el número de nodos entre comprobaciones se ajusta para acercarse a este tiempo
+CHECK_PERIOD = 0.005
+
+
+class SolveResult(NamedTuple):
+    """ El resultado de `solve`, con el estado de la resolución y lo que llegó a recorrer la búsqueda.
+
+    Se evalúa como verdadero solo si el tablero se resolvió, así que se puede usar como el booleano que
+    devolvía `solve` antes.
+    """
+    status: str
+    nodes: int
+    duration: float
+    stats: Optional[SolveStats] = None
+
+    def __bool__(self) -> bool:
+        return self.status == SOLVED
+
+
+class CancelToken:
+    """ Señal para cancelar una resolución desde otro hilo.
+
+    La búsqueda no se detiene al momento: la señal se comprueba junto con el resto del presupuesto, como mucho
+    cada `CHECK_INTERVAL` nodos.
+    """
+
+    __slots__ = ("event",)
+
+    def __init__(self) -> None:
+        """ Crea una señal sin cancelar. """
+        # Se importa aquí porque solo hace falta al cancelar desde otro hilo, no en cada arranque
+        import threading
+        self.event = threading.Event()
+
+    def cancel(self) -> None:
+        """ Pide que se abandone la resolución. """
+        self.event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """ Si se ha pedido abandonar la resolución. """
+        return self.event.is_set()
+
+
+class SearchInterrupted(Exception):
+    """ Se genera dentro de la búsqueda cuando se agota el presupuesto o se cancela la resolución. """
+
+    def __init__(self, status: str) -> None:
+        """ Crea la excepción.
+
+        :param status: El motivo, BUDGET_EXHAUSTED o CANCELLED
+        """
+        super().__init__(status)
+        self.status = status
+        # Los nodos visitados hasta la interrupción, los anota `bitmask.search`
+        self.nodes = 0
+
+
+class Budget:
+    """ Límites de una búsqueda: nodos visitados, un instante límite y una señal de cancelación.
+
+    Los motores de búsqueda no comprueban los límites en cada nodo, sino que llaman a `check` de vez en cuando
+    y esta les dice cuántos nodos pueden visitar hasta la siguiente comprobación. Así el límite de nodos se
+    respeta de forma exacta y el coste de comprobar el reloj se reparte entre muchos nodos. El número de
+    nodos entre comprobaciones se duplica o se reduce a la mitad según el tiempo que pasó desde la anterior,
+    entre 1 y `CHECK_INTERVAL`, para que la búsqueda no se pase del instante límite ni tarde en ver la
+    cancelación aunque cada nodo sea lento.
+    """
+
+    __slots__ = ("max_nodes", "deadline", "cancel_token", "interval", "checked")
+
+    def __init__(self, max_nodes: Optional[int] = None, deadline: Optional[float] = None,
+                 cancel_token: Optional[CancelToken] = None) -> None:
+        """ Crea el presupuesto.
+
+        :param max_nodes: El número máximo de nodos a visitar, sin límite por defecto
+        :param deadline: El instante límite, en la escala de `time.monotonic`, sin límite por defecto
+        :param cancel_token: La señal de cancelación a comprobar, opcional
+        """
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.cancel_token = cancel_token
+        self.interval = 1
+        self.checked = time.monotonic()
+
+    def check(self, nodes: int) -> int:
+        """ Comprueba el presupuesto antes de visitar más nodos.
+
+        Si se ha cancelado la resolución o se ha agotado el presupuesto, se generará un SearchInterrupted.
+
+        :param nodes: El número de nodos ya visitados
+        :return: Devuelve cuántos nodos se pueden visitar antes de volver a comprobar, al menos 1
+        """
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise SearchInterrupted(CANCELLED)
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            raise SearchInterrupted(BUDGET_EXHAUSTED)
+        if now - self.checked > CHECK_PERIOD:
+            self.interval = max(1, self.interval // 2)
+        elif self.interval < CHECK_INTERVAL:
+            self.interval *= 2
+        self.checked = now
+        if self.max_nodes is None:
+            return self.interval
+        if nodes >= self.max_nodes:
+            raise SearchInterrupted(BUDGET_EXHAUSTED)
+        return min(self.interval, self.max_nodes - nodes)
+
+
+def make_budget(max_nodes: Optional[int] = None, deadline: Optional[float] = None,
+                cancel_token: Optional[CancelToken] = None) -> Optional[Budget]:
+    """ Crea un presupuesto solo si se indica algún límite.
+
+    :param max_nodes: El número máximo de nodos a visitar
+    :param deadline: El instante límite, en la escala de `time.monotonic`
+    :param cancel_token: La señal de cancelación a comprobar
+    :return: Devuelve el presupuesto, o None si no hay ningún límite
+    """
+    if max_nodes is None and deadline is None and cancel_token is None:
+        return None
+    if max_nodes is not None and max_nodes < 0:
+        raise ValueError(f"Número máximo de nodos no válido: {max_nodes}")
+    return Budget(max_nodes, deadline, cancel_token)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import sqlite3
+import time
+from array import array
+from typing import Optional
+
+from .puzzle import Puzzle
+
+# Archivo de la caché de soluciones por defecto
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sudoku-killer", "solutions.sqlite3")
+
+# Número máximo de tableros guardados por defecto. Cada entrada ocupa unos 150 bytes.
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def puzzle_key(puzzle: Puzzle) -> str:
+    """ Calcula la clave de un tablero en la caché, a partir de sus valores iniciales y sus jaulas.
+
+    Cada jaula se identifica por su primera celda, así que ni el orden de las jaulas en el archivo JSON ni el
+    de sus celdas cambian la clave. Para cada celda se resume su valor inicial, la primera celda de su jaula y
+    el total de su jaula. En un tablero con regiones irregulares se resume además la región de cada celda; el
+    tamaño del tablero ya queda en el número de celdas.
+
+    :param puzzle: El tablero y sus jaulas
+    :return: Devuelve el resumen SHA-256 en hexadecimal
+    """
+    first = [min(cells) for cells in puzzle.cage_cells]
+    digest = hashlib.sha256(puzzle.board.tobytes())
+    digest.update(bytes([first[cage] for cage in puzzle.cell_cage]))
+    digest.update(array('h', [puzzle.cage_totals[cage] for cage in puzzle.cell_cage]).tobytes())
+    if puzzle.geometry.box is None:
+        digest.update(bytes(puzzle.geometry.region_of))
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    """ Caché persistente de soluciones en un archivo SQLite, con un número máximo de entradas.
+
+    Cuando se supera el máximo se descartan las entradas usadas hace más tiempo (LRU). Para que un acierto no
+    tenga que escribir en el archivo, la fecha de uso de las entradas leídas se guarda en memoria y se escribe
+    con la siguiente entrada nueva o al cerrar la caché. El número de entradas se cuenta una vez al abrir la
+    caché y luego se lleva en memoria, así que guardar una entrada no recorre la tabla; si otro proceso escribe
+    en el mismo archivo a la vez, el máximo solo se respeta de forma aproximada.
+
+    También se guardan los tableros sin solución, así que una consulta distingue entre un fallo (None), un
+    tablero sin solución y una solución.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = DEFAULT_MAX_ENTRIES, read: bool = True,
+                 symmetric: bool = False) -> None:
+        """ Abre la caché, creando el archivo si no existe.
+
+        :param path: El archivo SQLite de la caché, o ":memory:" para una caché que no se guarda
+        :param max_entries: El número máximo de tableros guardados
+        :param read: Si se consultan las entradas guardadas. Con False todas las consultas fallan, pero las
+                     soluciones nuevas se siguen guardando, lo que sirve para renovar la caché
+        :param symmetric: Si `solve` guarda los tableros en su forma canónica, para que los tableros simétricos
+                          compartan la entrada. Calcular la forma canónica cuesta unos milisegundos por tablero
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solutions "
+                                "(key TEXT PRIMARY KEY, solution BLOB NOT NULL, used REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)")
+        self.connection.commit()
+        self.max_entries = max_entries
+        self.read = read
+        self.symmetric = symmetric
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.used: dict[str, float] = {}
+        self.entries = len(self)
+
+    def __enter__(self) -> "SolutionCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """ Busca la solución de un tablero.
+
+        :param key: La clave del tablero (ver `puzzle_key`)
+        :return: Devuelve los N x N valores de la solución, un valor vacío si el tablero no tiene solución, o None
+                 si el tablero no está en la caché
+        """
+        row = self.connection.execute("SELECT solution FROM solutions WHERE key = ?", (key,)).fetchone() \
+            if self.read else None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used[key] = time.time()
+        return row[0]
+
+    def put(self, key: str, solution: Optional[array]) -> None:
+        """ Guarda la solución de un tablero, descartando las entradas más antiguas si se supera el máximo.
+
+        :param key: La clave del tablero (ver `puzzle_key`)
+        :param solution: Los valores de la solución, o None si el tablero no tiene solución
+        """
+        value = solution.tobytes() if solution is not None else b""
+        now = time.time()
+        evicted = 0
+        with self.connection:
+            self.flush()
+            inserted = self.connection.execute("INSERT OR IGNORE INTO solutions VALUES (?, ?, ?)",
+                                               (key, value, now)).rowcount
+            if not inserted:
+                self.connection.execute("UPDATE solutions SET solution = ?, used = ? WHERE key = ?",
+                                        (value, now, key))
+            excess = self.entries + inserted - self.max_entries
+            if excess > 0:
+                evicted = self.connection.execute("DELETE FROM solutions WHERE key IN "
+                                                  "(SELECT key FROM solutions ORDER BY used LIMIT ?)",
+                                                  (excess,)).rowcount
+        # Los contadores solo cambian si la transacción se completó
+        self.entries += inserted - evicted
+        self.evictions += evicted
+
+    def flush(self) -> None:
+        """ Escribe en el archivo la fecha de uso de las entradas leídas desde la última escritura. """
+        if self.used:
+            self.connection.executemany("UPDATE solutions SET used = ? WHERE key = ?",
+                                        [(used, key) for key, used in self.used.items()])
+            self.used.clear()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self) -> None:
+        """ Escribe las fechas de uso pendientes y cierra el archivo. """
+        with self.connection:
+            self.flush()
+        self.connection.close()
+
+    def to_text(self) -> str:
+        """ Convierte los contadores de la caché en texto para mostrarlos en la consola.
+
+        :return: Devuelve el texto, en una línea
+        """
+        return (f"Caché de soluciones: {self.hits} aciertos, {self.misses} fallos, {self.evictions} descartadas, "
+                f"{len(self)} guardadas")
@@ -0,0 +1,30 @@
+Cages = list[tuple[int, list[tuple[int, int]]]]
+Board = list[list[int]]
+MinMaxCache = list[list[tuple[int, int]]]
+Regions = list[list[tuple[int, int]]]
+
+# Cada valor del 1 al 9 se representa con un bit: el valor v ocupa el bit (v - 1).
+ALL_VALUES = 0x1FF
+
+
+def value_bit(value: int) -> int:
+    """ Devuelve el bit que representa un valor del 1 al 9.
+
+    :param value: El valor a convertir
+    :return: Devuelve la máscara con un solo bit activo para el valor
+    """
+    return 1 << (value - 1)
+
+
+def mask_values(mask: int) -> list[int]:
+    """ Convierte una máscara de bits en la lista ordenada de valores que representa.
+
+    :param mask: La máscara a convertir
+    :return: Devuelve una lista con los valores cuyo bit está activo, de menor a mayor
+    """
+    values = []
+    while mask:
+        bit = mask & -mask
+        values.append(bit.bit_length())
+        mask ^= bit
+    return values
@@ -0,0 +1,249 @@
+import time
+from array import array
+from typing import Iterator, Optional
+
+from .combinations import cage_table, combination_masks
+from .common import value_bit
+from .puzzle import Puzzle
+from .stats import SolveStats
+
+
+class ExactCover:
+    """ Problema de cobertura exacta resuelto con el Algoritmo X de Knuth sobre Dancing Links.
+
+    La matriz dispersa se guarda en listas paralelas indexadas por nodo (izquierda, derecha, arriba, abajo y
+    columna), en lugar de un objeto por nodo. El nodo 0 es la cabecera principal, los nodos 1 a `columns` son
+    las cabeceras de las columnas y el resto son los unos de la matriz. Todas las columnas son primarias: cada
+    una debe quedar cubierta exactamente una vez.
+    """
+
+    def __init__(self, columns: int) -> None:
+        """ Crea una matriz vacía.
+
+        :param columns: El número de columnas
+        """
+        headers = columns + 1
+        self.left = [header - 1 for header in range(headers)]
+        self.right = [header + 1 for header in range(headers)]
+        self.left[0], self.right[columns] = columns, 0
+        self.up = list(range(headers))
+        self.down = list(range(headers))
+        self.column = list(range(headers))
+        self.size = [0] * headers
+        self.row_of = [-1] * headers
+        self.rows = 0
+
+    def add_row(self, columns: list[int]) -> int:
+        """ Añade una fila con un uno en cada una de las columnas indicadas.
+
+        :param columns: Los índices de las columnas, empezando por 0
+        :return: Devuelve el índice de la fila
+        """
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        row = self.rows
+        first = len(column)
+        for position, header in enumerate(columns, 1):
+            node = len(column)
+            header += 1
+            column.append(header)
+            self.row_of.append(row)
+            left.append(node - 1 if position > 1 else first + len(columns) - 1)
+            right.append(node + 1 if position < len(columns) else first)
+            up.append(up[header])
+            down.append(header)
+            down[up[header]] = node
+            up[header] = node
+            size[header] += 1
+        self.rows += 1
+        return row
+
+    def cover(self, header: int) -> None:
+        """ Retira una columna y todas las filas que la cubren. """
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        row = down[header]
+        while row != header:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                size[column[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def uncover(self, header: int) -> None:
+        """ Deshace `cover`, en el orden inverso. """
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        row = up[header]
+        while row != header:
+            node = left[row]
+            while node != row:
+                size[column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def solutions(self, depth_nodes: list[int]) -> Iterator[list[int]]:
+        """ Recorre todas las coberturas exactas, eligiendo siempre la columna con menos filas.
+
+        :param depth_nodes: La lista donde contar las filas probadas en cada profundidad, con una posición por
+                            cada fila que puede tener una solución
+        :return: Devuelve un iterador con los índices de las filas de cada solución
+        """
+        left, right, down, column, size, row_of = \
+            self.left, self.right, self.down, self.column, self.size, self.row_of
+        chosen: list[int] = []
+
+        def search() -> Iterator[list[int]]:
+            header = right[0]
+            if header == 0:
+                yield [row_of[node] for node in chosen]
+                return
+            best = header
+            while header != 0:
+                if size[header] < size[best]:
+                    best = header
+                    if size[best] <= 1:
+                        break
+                header = right[header]
+            if size[best] == 0:
+                return
+
+            self.cover(best)
+            row = down[best]
+            while row != best:
+                depth_nodes[len(chosen)] += 1
+                chosen.append(row)
+                node = right[row]
+                while node != row:
+                    self.cover(column[node])
+                    node = right[node]
+                yield from search()
+                node = left[row]
+                while node != row:
+                    self.uncover(column[node])
+                    node = left[node]
+                chosen.pop()
+                row = down[row]
+            self.uncover(best)
+
+        return search()
+
+
+def build(puzzle: Puzzle) -> tuple[ExactCover, list[tuple[int, int]]]:
+    """ Codifica un tablero como problema de cobertura exacta.
+
+    Además de las 324 columnas del Sudoku clásico (4 x N x N en un tablero de N x N), cada jaula tiene una
+    columna que obliga a elegir una de sus combinaciones de valores (ver `combinations.combination_masks`) y
+    una columna por valor del 1 al N. Cada
+    fila de combinación cubre las columnas de los valores que no están en la combinación, y cada fila de celda
+    cubre la columna de su valor en su jaula. Así los valores de la combinación elegida solo pueden cubrirse
+    con las celdas de la jaula, una vez cada uno, y como la jaula tiene tantas celdas como valores la
+    combinación, sus celdas suman exactamente el total.
+
+    Solo se añaden filas de celda para los valores que permiten la tabla de combinaciones de su jaula y los
+    valores iniciales, y solo filas de combinación que incluyen los valores iniciales de la jaula.
+
+    :param puzzle: El tablero y sus jaulas
+    :return: Devuelve una tupla con la matriz y, por cada fila, el índice de la celda y su valor, o (-1, 0) para
+             las filas de combinación
+    """
+    geometry = puzzle.geometry
+    size = geometry.size
+    digits = range(1, size + 1)
+    # Columnas de las restricciones del Sudoku clásico: cada celda tiene un valor, y cada fila, columna y región
+    # tiene cada valor exactamente una vez. Después, las columnas de las jaulas
+    cell_columns, row_columns, col_columns, region_columns, cage_columns = (group * geometry.cells
+                                                                            for group in range(5))
+    matrix = ExactCover(cage_columns + puzzle.cage_count * (size + 1))
+    rows: list[tuple[int, int]] = []
+    board = puzzle.board
+    cage_used = [0] * puzzle.cage_count
+    for index, value in enumerate(board):
+        if value:
+            cage_used[puzzle.cell_cage[index]] |= value_bit(value)
+
+    for cage, (total, cells) in enumerate(zip(puzzle.cage_totals, puzzle.cage_sizes)):
+        cage_column = cage_columns + cage * (size + 1)
+        for combination in combination_masks(total, cells, size):
+            if combination & cage_used[cage] == cage_used[cage]:
+                matrix.add_row([cage_column] + [cage_column + value for value in digits
+                                                 if not combination & value_bit(value)])
+                rows.append((-1, 0))
+
+    for index, given in enumerate(board):
+        cage = puzzle.cell_cage[index]
+        allowed = cage_table(puzzle.cage_totals[cage], puzzle.cage_sizes[cage], size)[0]
+        row, col, region = geometry.row_of[index], geometry.col_of[index], geometry.region_of[index]
+        for value in digits:
+            if given and value != given or not given and not allowed & value_bit(value):
+                continue
+            matrix.add_row([cell_columns + index, row_columns + row * size + value - 1,
+                            col_columns + col * size + value - 1, region_columns + region * size + value - 1,
+                            cage_columns + cage * (size + 1) + value])
+            rows.append((index, value))
+    return matrix, rows
+
+
+def iter_solutions(puzzle: Puzzle, stats: Optional[SolveStats] = None) -> Iterator[array]:
+    """ Recorre todas las soluciones del tablero con Dancing Links, calculando cada una solo cuando se pide.
+
+    :param puzzle: El tablero y sus jaulas, no se modifica
+    :param stats: Las estadísticas donde registrar la búsqueda, opcional
+    :return: Devuelve un iterador con cada solución como un arreglo plano de N x N valores
+    """
+    start = time.perf_counter()
+    matrix, rows = build(puzzle)
+    depth_nodes = [0] * (puzzle.geometry.cells + 1 + puzzle.cage_count)
+    searching = time.perf_counter()
+    if stats is not None:
+        stats.phases["prepare"] += searching - start
+    path = 0
+    elapsed = 0.0
+    solutions = matrix.solutions(depth_nodes)
+    try:
+        for chosen in solutions:
+            elapsed += time.perf_counter() - searching
+            values = array('b', [0] * puzzle.geometry.cells)
+            for row in chosen:
+                index, value = rows[row]
+                if index >= 0:
+                    values[index] = value
+            path = len(chosen)
+            yield values
+            path = 0
+            searching = time.perf_counter()
+        elapsed += time.perf_counter() - searching
+    finally:
+        solutions.close()
+        if stats is not None:
+            stats.phases["search"] += elapsed
+            nodes = sum(depth_nodes)
+            stats.nodes += nodes
+            stats.backtracks += nodes - path
+            stats.record_depths(depth_nodes)
+
+
+def search(puzzle: Puzzle, stats: Optional[SolveStats] = None) -> tuple[bool, int, int]:
+    """ Resuelve el tablero con Dancing Links, con la misma interfaz que `bitmask.search`.
+
+    El tablero de `puzzle` se actualiza con la solución si se encuentra.
+
+    :param puzzle: El tablero a resolver y sus jaulas
+    :param stats: Las estadísticas donde registrar la resolución, opcional
+    :return: Devuelve una tupla con un booleano verdadero si se encontró solución, el número de filas probadas
+             y 0 comprobaciones de jaulas, ya que las jaulas forman parte de la matriz
+    """
+    own = stats if stats is not None else SolveStats()
+    nodes = own.nodes
+    solutions = iter_solutions(puzzle, own)
+    solution = next(solutions, None)
+    solutions.close()
+    if solution is None:
+        return False, own.nodes - nodes, 0
+    puzzle.board[:] = solution
+    return True, own.nodes - nodes, 0
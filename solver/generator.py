@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import random
+import sys
+from functools import partial
+from typing import Iterator, NamedTuple, Optional
+
+from .batch import map_jobs
+from .bitmask import CANCEL_INTERVAL
+from .common import Board, Cages
+from .grid import NONETS
+from .propagation import RULES
+from .solver import count_solutions, solve
+from .stats import SolveStats
+
+# Tamaño mínimo y máximo de las jaulas por defecto
+DEFAULT_MIN_SIZE = 2
+DEFAULT_MAX_SIZE = 4
+
+# Nodos que puede recorrer cada comprobación de unicidad por defecto. Si se agotan sin saber si la solución
+# es única, el valor inicial que se intentaba quitar se deja, así que el resultado no depende de la velocidad
+# de la máquina.
+DEFAULT_NODE_BUDGET = 1000
+
+# Intentos de repartir un tablero en jaulas que respeten los tamaños antes de abandonar
+CAGE_ATTEMPTS = 100
+
+# Formatos de salida: un archivo JSON por tablero, como `Killer.json`, o una línea JSONL por tablero. Los dos
+# añaden la dificultad de cada tablero en la clave "difficulty", que el solucionador ignora
+FORMATS = ("jsonl", "json")
+
+# Un Sudoku clásico escrito como Sudoku Asesino: cada noneto es una jaula que suma 45
+NONET_CAGES = tuple((45, [(index % 9, index // 9) for index in cells]) for cells in NONETS)
+
+
+class Generated(NamedTuple):
+    """ Un tablero generado, con su dificultad.
+
+    La dificultad se mide con el número de valores iniciales que quedan y con la resolución que hace
+    `count_solutions`, con las reglas y el orden por defecto, para demostrar que la solución es única: los
+    nodos de búsqueda y las celdas que resuelve cada regla de propagación. Un tablero que solo necesita
+    `naked_singles` es más fácil que uno que necesita `innies_outies` o búsqueda.
+    """
+    board: Board
+    cages: Cages
+    givens: int
+    nodes: int
+    resolved: dict[str, int]
+
+    def to_dict(self) -> dict:
+        """ Convierte el tablero al formato de `Killer.json`, con la dificultad en la clave "difficulty".
+
+        :return: Devuelve un diccionario apto para `json.dump`, que `load_from_file` puede leer
+        """
+        return {"board": self.board, "cages": self.cages,
+                "difficulty": {"givens": self.givens, "nodes": self.nodes, "resolved": self.resolved}}
+
+
+class NodeBudget:
+    """ Función de cancelación para `count_solutions` que abandona la búsqueda tras un número de nodos.
+
+    La búsqueda la llama cada `bitmask.CANCEL_INTERVAL` nodos, así que el presupuesto se cuenta en llamadas.
+    """
+
+    def __init__(self, nodes: int) -> None:
+        """ Crea el presupuesto.
+
+        :param nodes: El número de nodos que se pueden recorrer, redondeado a `CANCEL_INTERVAL`
+        """
+        self.calls = max(1, nodes // CANCEL_INTERVAL)
+        self.exhausted = False
+
+    def __call__(self) -> bool:
+        self.calls -= 1
+        self.exhausted = self.calls <= 0
+        return self.exhausted
+
+
+def random_grid(rng: random.Random) -> list[int]:
+    """ Genera un tablero resuelto al azar.
+
+    Los tres nonetos de la diagonal no comparten filas ni columnas, así que se rellenan con permutaciones al
+    azar, y el resto del tablero lo completa `solve`, con los nonetos como jaulas que suman 45.
+
+    :param rng: El generador de números aleatorios
+    :return: Devuelve los 81 valores del tablero, fila por fila
+    """
+    board = [[0] * 9 for _ in range(9)]
+    for nonet in (0, 4, 8):
+        for index, value in zip(NONETS[nonet], rng.sample(range(1, 10), 9)):
+            board[index // 9][index % 9] = value
+    if not solve(board, NONET_CAGES):
+        raise AssertionError("No se pudo completar el tablero")
+    return [value for row in board for value in row]
+
+
+def random_cages(rng: random.Random, grid: list[int], min_size: int = DEFAULT_MIN_SIZE,
+                 max_size: int = DEFAULT_MAX_SIZE) -> Cages:
+    """ Reparte un tablero resuelto en jaulas conexas al azar.
+
+    Cada jaula empieza en la celda libre con menos vecinas libres (al azar entre las empatadas), para no dejar
+    celdas aisladas, y crece por celdas vecinas (arriba, abajo, izquierda o derecha) hasta un tamaño elegido al
+    azar, sin repetir valores dentro de la jaula. Las jaulas que se quedan por debajo de `min_size` se unen a
+    una jaula vecina si el resultado cabe en `max_size` sin repetir valores; si no es posible, se vuelve a
+    repartir el tablero entero.
+
+    :param rng: El generador de números aleatorios
+    :param grid: Los 81 valores del tablero resuelto, fila por fila
+    :param min_size: El tamaño mínimo de cada jaula
+    :param max_size: El tamaño máximo de cada jaula
+    :return: Devuelve las jaulas, con sus totales calculados a partir de `grid`
+    """
+    if not 1 <= min_size <= max_size <= 9:
+        raise ValueError(f"Tamaños de jaula no válidos: de {min_size} a {max_size}")
+    for _ in range(CAGE_ATTEMPTS):
+        cages = grow_cages(rng, grid, min_size, max_size)
+        if cages is not None:
+            return [(sum(grid[index] for index in cells), [(index % 9, index // 9) for index in cells])
+                    for cells in cages]
+    raise ValueError(f"No se pudo repartir el tablero en jaulas de {min_size} a {max_size} celdas")
+
+
+def grow_cages(rng: random.Random, grid: list[int], min_size: int, max_size: int) -> Optional[list[list[int]]]:
+    """ Hace un intento de `random_cages`.
+
+    :return: Devuelve las celdas de cada jaula, o None si alguna jaula no llega a `min_size`
+    """
+    free = set(range(81))
+    cage_of = [-1] * 81
+    cages: list[list[int]] = []
+    while free:
+        start = min(free, key=lambda index: (sum(neighbour in free for neighbour in neighbours(index)),
+                                             rng.random()))
+        size = rng.randint(min_size, max_size)
+        cells = [start]
+        free.discard(start)
+        used = {grid[start]}
+        while len(cells) < size:
+            options = sorted({neighbour for index in cells for neighbour in neighbours(index)
+                              if neighbour in free and grid[neighbour] not in used})
+            if not options:
+                break
+            neighbour = rng.choice(options)
+            cells.append(neighbour)
+            free.discard(neighbour)
+            used.add(grid[neighbour])
+        for index in cells:
+            cage_of[index] = len(cages)
+        cages.append(cells)
+
+    for cage, cells in enumerate(cages):
+        if not cells or len(cells) >= min_size:
+            continue
+        values = {grid[index] for index in cells}
+        options = sorted({cage_of[neighbour] for index in cells for neighbour in neighbours(index)
+                          if cage_of[neighbour] != cage and len(cages[cage_of[neighbour]]) + len(cells) <= max_size
+                          and values.isdisjoint(grid[other] for other in cages[cage_of[neighbour]])})
+        if not options:
+            return None
+        other = rng.choice(options)
+        for index in cells:
+            cage_of[index] = other
+        cages[other] = cages[other] + cells
+        cages[cage] = []
+    return [cells for cells in cages if cells]
+
+
+def neighbours(index: int) -> list[int]:
+    """ Devuelve las celdas vecinas de una celda, sin contar las diagonales.
+
+    :param index: El índice de la celda (y * 9 + x)
+    :return: Devuelve la lista de índices de las celdas vecinas
+    """
+    x, y = index % 9, index // 9
+    return [other for other, inside in ((index - 9, y > 0), (index + 9, y < 8), (index - 1, x > 0),
+                                        (index + 1, x < 8)) if inside]
+
+
+def generate(rng: random.Random, min_size: int = DEFAULT_MIN_SIZE, max_size: int = DEFAULT_MAX_SIZE,
+             givens: int = 0, node_budget: int = DEFAULT_NODE_BUDGET) -> Generated:
+    """ Genera un Sudoku Asesino con solución única.
+
+    Se genera un tablero resuelto y sus jaulas y se empieza con todos los valores como iniciales. Después se
+    intenta quitar cada valor inicial, en orden aleatorio, y solo se quita si `count_solutions` confirma que la
+    solución sigue siendo única. Una comprobación que agota `node_budget` nodos cuenta como no única. Quitar
+    valores a un tablero casi lleno es mucho más rápido que añadirlos a uno vacío, donde cada comprobación con
+    jaulas grandes agota el presupuesto. Al terminar se mide la dificultad del tablero (ver `Generated`).
+
+    :param rng: El generador de números aleatorios
+    :param min_size: El tamaño mínimo de cada jaula
+    :param max_size: El tamaño máximo de cada jaula
+    :param givens: El número de valores iniciales a partir del cual ya no se quitan más
+    :param node_budget: Los nodos que puede recorrer cada comprobación de unicidad
+    :return: Devuelve el tablero generado, sus jaulas y su dificultad
+    """
+    grid = random_grid(rng)
+    cages = random_cages(rng, grid, min_size, max_size)
+    board = [grid[y * 9:y * 9 + 9] for y in range(9)]
+    remaining = 81
+    for index in rng.sample(range(81), 81):
+        if remaining <= givens:
+            break
+        board[index // 9][index % 9] = 0
+        budget = NodeBudget(node_budget)
+        if count_solutions(board, cages, 2, RULES, "mrv", cancelled=budget) == 1 and not budget.exhausted:
+            remaining -= 1
+        else:
+            board[index // 9][index % 9] = grid[index]
+    stats = SolveStats()
+    count_solutions(board, cages, stats=stats)
+    return Generated(board, cages, remaining, stats.nodes, stats.resolved)
+
+
+def generate_one(position: int, seed: str, min_size: int = DEFAULT_MIN_SIZE, max_size: int = DEFAULT_MAX_SIZE,
+                 givens: int = 0, node_budget: int = DEFAULT_NODE_BUDGET) -> Generated:
+    """ Genera el tablero de una posición de la serie, con su propio generador de números aleatorios.
+
+    :param position: La posición del tablero en la serie
+    :param seed: La semilla de la serie
+    :param min_size: El tamaño mínimo de cada jaula
+    :param max_size: El tamaño máximo de cada jaula
+    :param givens: El número de valores iniciales a partir del cual ya no se quitan más
+    :param node_budget: Los nodos que puede recorrer cada comprobación de unicidad
+    :return: Devuelve el tablero generado, sus jaulas y su dificultad
+    """
+    return generate(random.Random(f"{seed}:{position}"), min_size, max_size, givens, node_budget)
+
+
+def generate_many(count: int, seed: Optional[str] = None, jobs: Optional[int] = 1,
+                  min_size: int = DEFAULT_MIN_SIZE, max_size: int = DEFAULT_MAX_SIZE, givens: int = 0,
+                  node_budget: int = DEFAULT_NODE_BUDGET) -> Iterator[Generated]:
+    """ Genera una serie de tableros, repartidos entre varios procesos.
+
+    Cada tablero usa un generador de números aleatorios propio, derivado de la semilla y de su posición, así
+    que con la misma semilla se obtienen los mismos tableros en el mismo orden con cualquier número de
+    procesos.
+
+    :param count: El número de tableros
+    :param seed: La semilla de la serie, o None para una al azar
+    :param jobs: El número de procesos, 1 por defecto, o None para usar uno por CPU
+    :param min_size: El tamaño mínimo de cada jaula
+    :param max_size: El tamaño máximo de cada jaula
+    :param givens: El número de valores iniciales a partir del cual ya no se quitan más
+    :param node_budget: Los nodos que puede recorrer cada comprobación de unicidad
+    :return: Devuelve un iterador con cada tablero generado (ver `Generated`)
+    """
+    if seed is None:
+        seed = os.urandom(8).hex()
+    work = partial(generate_one, min_size=min_size, max_size=max_size, givens=givens, node_budget=node_budget)
+    return map_jobs(work, ((position, seed) for position in range(count)), jobs)
+
+
+def main(arguments: Optional[list[str]] = None) -> int:
+    """ Genera tableros desde la línea de comandos.
+
+    :param arguments: Los argumentos de la línea de comandos, por defecto los del proceso
+    :return: Devuelve el código de salida
+    """
+    parser = argparse.ArgumentParser(description="Generador de Sudokus Asesinos con solución única")
+    parser.add_argument("--count", type=int, default=1, help="Número de tableros a generar (1)")
+    parser.add_argument("--seed", help="Semilla para repetir la misma serie de tableros")
+    parser.add_argument("--jobs", type=int, default=1, help="Procesos entre los que repartir la generación, 0 "
+                                                            "para uno por CPU")
+    parser.add_argument("--min-size", type=int, default=DEFAULT_MIN_SIZE,
+                        help=f"Tamaño mínimo de las jaulas ({DEFAULT_MIN_SIZE})")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE,
+                        help=f"Tamaño máximo de las jaulas ({DEFAULT_MAX_SIZE})")
+    parser.add_argument("--givens", type=int, default=0,
+                        help="Deja de quitar valores iniciales al llegar a este número, para tableros más fáciles "
+                             "(0, quitar todos los posibles)")
+    parser.add_argument("--node-budget", type=int, default=DEFAULT_NODE_BUDGET,
+                        help=f"Nodos de cada comprobación de unicidad ({DEFAULT_NODE_BUDGET})")
+    parser.add_argument("--format", default="jsonl", choices=FORMATS,
+                        help="Una línea JSONL por tablero (jsonl) o un archivo JSON por tablero (json)")
+    parser.add_argument("--output",
+                        help="El archivo de salida. Con --format json y varios tableros, cada tablero se guarda "
+                             "en un archivo numerado con este nombre. Por defecto la salida estándar")
+    parsed_args = parser.parse_args(arguments)
+    if not 1 <= parsed_args.min_size <= parsed_args.max_size <= 9:
+        parser.error("Los tamaños de jaula deben cumplir 1 <= --min-size <= --max-size <= 9")
+    if not 0 <= parsed_args.givens <= 81:
+        parser.error("--givens debe estar entre 0 y 81")
+    if parsed_args.format == "json" and parsed_args.count > 1 and not parsed_args.output:
+        parser.error("--format json con varios tableros necesita --output")
+
+    puzzles = generate_many(parsed_args.count, parsed_args.seed, parsed_args.jobs or None, parsed_args.min_size,
+                            parsed_args.max_size, parsed_args.givens, parsed_args.node_budget)
+    if parsed_args.format == "json":
+        stem, extension = os.path.splitext(parsed_args.output or "")
+        for position, puzzle in enumerate(puzzles, 1):
+            if not parsed_args.output:
+                json.dump(puzzle.to_dict(), sys.stdout, indent=2)
+                print()
+                continue
+            filename = parsed_args.output if parsed_args.count == 1 else f"{stem}-{position:04d}{extension or '.json'}"
+            with open(filename, "w") as output_file:
+                json.dump(puzzle.to_dict(), output_file, indent=2)
+        return 0
+
+    output_file = open(parsed_args.output, "w") if parsed_args.output else sys.stdout
+    try:
+        for puzzle in puzzles:
+            print(json.dumps(puzzle.to_dict()), file=output_file, flush=True)
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+from functools import cache
+from math import isqrt
+from typing import Optional
+
+from .common import Regions
+
+# Tamaño máximo del tablero: las máscaras de candidatos usan un bit por valor y las tablas de combinaciones
+# de las jaulas tienen una entrada por máscara, así que con 16 valores cada tabla ocupa 128 KB
+MAX_SIZE = 16
+
+
+@cache
+def box_shape(size: int) -> Optional[tuple[int, int]]:
+    """ Calcula las dimensiones de las cajas regulares de un tablero de N x N.
+
+    Las cajas tienen tantas filas como el mayor divisor de N que no supera su raíz cuadrada, así que son
+    cuadradas cuando N es un cuadrado (3 x 3 en el tablero de 9 x 9, 4 x 4 en el de 16 x 16) y más anchas
+    que altas en otro caso (2 x 3 en el de 6 x 6, 3 x 4 en el de 12 x 12).
+
+    :param size: El número de filas y columnas del tablero
+    :return: Devuelve una tupla con el alto y el ancho de las cajas, o None si N no admite cajas regulares
+             (si es primo)
+    """
+    height = next(height for height in range(isqrt(size), 0, -1) if size % height == 0)
+    if height == 1 and size > 1:
+        return None
+    return height, size // height
+
+
+class Geometry:
+    """ Geometría de un tablero de N x N con sus regiones.
+
+    Las celdas se identifican por su índice, índice = y * N + x. Cada fila, columna y región contiene los
+    valores del 1 al N una sola vez. Las regiones son las cajas regulares de `box_shape` o, en un tablero
+    irregular (jigsaw), una partición cualquiera de las celdas en N regiones de N celdas. En el tablero de
+    9 x 9 las regiones son los nonetos.
+
+    Todas las tablas se calculan al crear la geometría, una sola vez por tablero distinto (ver `geometry`).
+    """
+
+    __slots__ = ("size", "cells", "all_values", "unit_total", "box", "row_of", "col_of", "region_of",
+                 "rows", "cols", "regions", "units", "peers")
+
+    def __init__(self, size: int, region_of: Optional[tuple[int, ...]] = None) -> None:
+        """ Calcula las tablas de la geometría.
+
+        :param size: El número de filas y columnas del tablero, hasta `MAX_SIZE`
+        :param region_of: La región de cada celda, o None para usar las cajas regulares
+        """
+        if not 1 <= size <= MAX_SIZE:
+            raise ValueError(f"Tamaño de tablero no válido: {size}, debe estar entre 1 y {MAX_SIZE}")
+        cells = size * size
+        self.size = size
+        self.cells = cells
+        self.all_values = (1 << size) - 1
+        self.unit_total = size * (size + 1) // 2
+        self.box = box_shape(size) if region_of is None else None
+        if region_of is None:
+            if self.box is None:
+                raise ValueError(f"Un tablero de {size} x {size} no tiene cajas regulares, hay que indicar las "
+                                 f"regiones")
+            height, width = self.box
+            region_of = tuple((index // size // height) * height + (index % size) // width
+                              for index in range(cells))
+        self.row_of = tuple(index // size for index in range(cells))
+        self.col_of = tuple(index % size for index in range(cells))
+        self.region_of = region_of
+
+        # Las 3 x N unidades (filas, columnas y regiones), cada una con sus N índices de celda. Se reparten las
+        # celdas en una sola pasada en lugar de recorrer el tablero por cada unidad
+        rows: list[list[int]] = [[] for _ in range(size)]
+        cols: list[list[int]] = [[] for _ in range(size)]
+        regions: list[list[int]] = [[] for _ in range(size)]
+        for index in range(cells):
+            rows[self.row_of[index]].append(index)
+            cols[self.col_of[index]].append(index)
+            regions[region_of[index]].append(index)
+        self.rows = tuple(map(tuple, rows))
+        self.cols = tuple(map(tuple, cols))
+        self.regions = tuple(map(tuple, regions))
+        self.units = self.rows + self.cols + self.regions
+
+        # Las celdas que comparten fila, columna o región con cada celda, sin incluir la propia celda, en orden
+        self.peers = tuple(tuple(sorted((set(rows[self.row_of[index]]) | set(cols[self.col_of[index]])
+                                         | set(regions[region_of[index]])) - {index}))
+                           for index in range(cells))
+
+    def __reduce__(self):
+        """ Al copiar la geometría a otro proceso solo se envían su tamaño y sus regiones irregulares, y allí se
+        usa la geometría ya calculada si existe. """
+        return cached_geometry, (self.size, self.region_of if self.box is None else None)
+
+
+# Geometrías ya calculadas, por tamaño y región de cada celda
+_geometries: dict[tuple[int, Optional[tuple[int, ...]]], Geometry] = {}
+
+
+def geometry(size: int = 9, regions: Optional[Regions] = None) -> Geometry:
+    """ Devuelve la geometría de un tablero, calculándola solo la primera vez.
+
+    Si las regiones no son una partición de las celdas en N regiones de N celdas, se generará un ValueError.
+
+    :param size: El número de filas y columnas del tablero
+    :param regions: Las coordenadas (x, y) de las celdas de cada región, o None para usar las cajas regulares
+    :return: Devuelve la geometría
+    """
+    if not 1 <= size <= MAX_SIZE:
+        raise ValueError(f"Tamaño de tablero no válido: {size}, debe estar entre 1 y {MAX_SIZE}")
+    region_of = None
+    if regions is not None:
+        region_of = find_region_of(size, regions)
+        # Unas regiones iguales a las cajas regulares no hacen irregular el tablero
+        if box_shape(size) is not None and region_of == geometry(size).region_of:
+            region_of = None
+    return cached_geometry(size, region_of)
+
+
+def cached_geometry(size: int, region_of: Optional[tuple[int, ...]] = None) -> Geometry:
+    """ Devuelve la geometría con el tamaño y las regiones indicadas, calculándola solo la primera vez.
+
+    :param size: El número de filas y columnas del tablero
+    :param region_of: La región de cada celda, o None para usar las cajas regulares
+    :return: Devuelve la geometría
+    """
+    key = (size, region_of)
+    if key not in _geometries:
+        _geometries[key] = Geometry(size, region_of)
+    return _geometries[key]
+
+
+def find_region_of(size: int, regions: Regions) -> tuple[int, ...]:
+    """ Calcula la región de cada celda a partir de las coordenadas de las regiones.
+
+    Las regiones se numeran por su primera celda, fila por fila, así que el orden de las regiones en la lista
+    no cambia el resultado.
+
+    :param size: El número de filas y columnas del tablero
+    :param regions: Las coordenadas (x, y) de las celdas de cada región
+    :return: Devuelve una tupla con el número de región de cada celda
+    """
+    if len(regions) != size:
+        raise ValueError(f"Un tablero de {size} x {size} necesita {size} regiones, no {len(regions)}")
+    region_of = [-1] * (size * size)
+    for fields in regions:
+        if len(fields) != size:
+            raise ValueError(f"Cada región debe tener {size} celdas, no {len(fields)}")
+        for x, y in fields:
+            if not (0 <= x < size and 0 <= y < size) or region_of[y * size + x] != -1:
+                raise ValueError(f"Celda repetida o fuera del tablero en las regiones: ({x}, {y})")
+            region_of[y * size + x] = 0
+    cells = sorted(sorted(y * size + x for x, y in fields) for fields in regions)
+    for region, indexes in enumerate(cells):
+        for index in indexes:
+            region_of[index] = region
+    return tuple(region_of)
+
+
+# Geometría del tablero de 9 x 9 con nonetos, que es el que usan los motores cuando no se indica otra
+STANDARD = geometry()
+
+ROW_OF = STANDARD.row_of
+COL_OF = STANDARD.col_of
+NONET_OF = STANDARD.region_of
+
+# Las 27 unidades (filas, columnas y nonetos), cada una con sus 9 índices de celda.
+ROWS = STANDARD.rows
+COLS = STANDARD.cols
+NONETS = STANDARD.regions
+UNITS = STANDARD.units
+
+# Las celdas que comparten fila, columna o noneto con cada celda, sin incluir la propia celda.
+PEERS = STANDARD.peers
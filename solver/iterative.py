@@ -0,0 +1,253 @@
+from typing import Optional
+
+
+# Estados posibles de una búsqueda iterativa
+SEARCHING = "searching"
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"
+
+
+class IterativeSearch:
+    """ Búsqueda sin recursión, con una pila explícita de (celda, máscara de candidatos restantes).
+
+    Recorre el árbol de búsqueda en el mismo orden que `bitmask.search_plain` y `bitmask.search_propagating`,
+    por lo que encuentra la misma solución, pero sin usar un marco de Python por cada nivel ni depender del
+    límite de recursión.
+
+    Todo el estado de la búsqueda vive en el objeto, así que se puede inspeccionar con `frames`, y la búsqueda
+    se puede suspender limitando el número de nodos de `run` y reanudar llamando a `run` de nuevo. Después de
+    una solución, `resume` continúa la búsqueda para encontrar la siguiente.
+    """
+
+    def __init__(self, state, order: Optional[list[int]] = None, propagator=None, select=None,
+                 depth_nodes: Optional[list[int]] = None) -> None:
+        """ Prepara la búsqueda sobre un estado creado con `bitmask.prepare`.
+
+        Sin propagador se usa el orden fijo `order` y las comprobaciones incrementales de jaulas de
+        `search_plain`. Con propagador, las celdas se eligen con `select` y se propaga después de cada valor.
+
+        :param state: El estado de búsqueda
+        :param order: Los índices de las celdas vacías en el orden en que se deben rellenar, sin propagador
+        :param propagator: El propagador a aplicar después de cada valor probado, opcional
+        :param select: La función que elige la siguiente celda vacía, necesaria con propagador
+        :param depth_nodes: La lista donde contar los nodos visitados en cada profundidad, con una posición
+                            por cada celda vacía. Por defecto se crea una nueva
+        """
+        self.state = state
+        self.propagator = propagator
+        self.select = select
+        self.order = order if order is not None else []
+        self.nodes = 0
+        self.checks = 0
+        self.depth_nodes = depth_nodes if depth_nodes is not None else [0] * (len(state.values) + 1)
+        self.status = SEARCHING
+
+        # Pila de la búsqueda: por cada nivel, la celda, los candidatos que quedan por probar y la longitud
+        # del registro de cambios del estado antes de probar un valor en esa celda
+        self.cells: list[int] = []
+        self.remaining: list[int] = []
+        self.marks: list[int] = []
+        # La celda del siguiente nivel a añadir a la pila, o -1. Un nivel nuevo es un nodo, y los nodos solo se
+        # cuentan dentro de `run`, así que al crear la búsqueda o al suspenderla por el límite de nodos el nivel
+        # queda pendiente hasta la siguiente llamada
+        self.pending = -1
+
+        if propagator is None:
+            cell_cage = state.cell_cage
+            order = self.order
+            self.mates_after = [tuple(order[later] for later in range(position + 1, len(order))
+                                      if cell_cage[order[later]] == cell_cage[order[position]])
+                                for position in range(len(order))]
+            if order:
+                self.pending = order[0]
+            else:
+                self.status = SOLVED
+        elif not propagator.propagate():
+            self.status = UNSOLVABLE
+        else:
+            index = select()
+            if index < 0:
+                self.status = SOLVED
+            else:
+                self.pending = index
+
+    def push(self, index: int) -> None:
+        """ Añade un nivel a la pila para la celda indicada, con todos sus candidatos actuales.
+
+        :param index: El índice de la celda
+        """
+        self.nodes += 1
+        self.depth_nodes[len(self.cells)] += 1
+        self.cells.append(index)
+        self.remaining.append(self.state.candidates(index))
+        self.marks.append(len(self.state.trail))
+
+    @property
+    def depth(self) -> int:
+        """ El número de niveles en la pila de búsqueda. """
+        return len(self.cells)
+
+    def frames(self) -> list[tuple[int, int, int]]:
+        """ Devuelve una copia de la pila de búsqueda para inspeccionarla.
+
+        :return: Devuelve una lista con una tupla por nivel: el índice de la celda, el valor que tiene ahora
+                 (0 si aún no se ha probado ninguno) y la máscara de candidatos que quedan por probar
+        """
+        values = self.state.values
+        return [(index, values[index], remaining) for index, remaining in zip(self.cells, self.remaining)]
+
+    def run(self, max_nodes: Optional[int] = None) -> str:
+        """ Ejecuta la búsqueda hasta encontrar una solución, agotar el árbol o visitar `max_nodes` nodos.
+
+        :param max_nodes: El número máximo de nodos nuevos a visitar antes de suspender la búsqueda, sin
+                          límite por defecto
+        :return: Devuelve el estado de la búsqueda: SOLVED, UNSOLVABLE o SEARCHING si se ha suspendido
+        """
+        if self.status != SEARCHING:
+            return self.status
+        limit = self.nodes + max_nodes if max_nodes is not None else -1
+        if self.pending >= 0:
+            if self.nodes == limit:
+                return self.status
+            self.push(self.pending)
+            self.pending = -1
+        if self.propagator is None:
+            self.status = self.run_plain(limit)
+        else:
+            self.status = self.run_propagating(limit)
+        return self.status
+
+    def resume(self, max_nodes: Optional[int] = None) -> str:
+        """ Continúa la búsqueda después de una solución para encontrar la siguiente.
+
+        El árbol se sigue recorriendo desde el último valor probado, así que cada solución se encuentra una sola
+        vez. Si la búsqueda aún no había terminado, equivale a `run`.
+
+        :param max_nodes: El número máximo de nodos nuevos a visitar antes de suspender la búsqueda, sin
+                          límite por defecto
+        :return: Devuelve el estado de la búsqueda: SOLVED si hay otra solución, UNSOLVABLE si no quedan más, o
+                 SEARCHING si se ha suspendido
+        """
+        if self.status == SOLVED:
+            # Sin niveles en la pila la solución no dependía de ningún valor probado, y no puede haber otra
+            self.status = SEARCHING if self.cells else UNSOLVABLE
+        return self.run(max_nodes)
+
+    def run_plain(self, limit: int) -> str:
+        """ Bucle de búsqueda con orden fijo y sin propagación.
+
+        La posición en la pila coincide con la posición en `order`, y el valor probado en cada nivel se
+        guarda en `state.values` para poder retirarlo de las máscaras al volver a ese nivel.
+
+        :param limit: El número de nodos en el que suspender la búsqueda, o -1 para no suspenderla
+        :return: Devuelve el nuevo estado de la búsqueda
+        """
+        state = self.state
+        values = state.values
+        cell_cage = state.cell_cage
+        rows, cols, regions = state.rows, state.cols, state.regions
+        row_of, col_of, region_of = state.row_of, state.col_of, state.region_of
+        cage_used, cage_tables = state.cage_used, state.cage_tables
+        order, mates_after = self.order, self.mates_after
+        cells, remaining, marks = self.cells, self.remaining, self.marks
+        depth_nodes = self.depth_nodes
+        last = len(order) - 1
+        depth = len(cells) - 1
+        nodes, checks = self.nodes, self.checks
+        status = SEARCHING
+
+        while True:
+            index = order[depth]
+            row, col, region, cage = row_of[index], col_of[index], region_of[index], cell_cage[index]
+
+            # Retirar el valor probado anteriormente en este nivel
+            value = values[index]
+            if value:
+                bit = 1 << (value - 1)
+                rows[row] ^= bit
+                cols[col] ^= bit
+                regions[region] ^= bit
+                cage_used[cage] ^= bit
+                values[index] = 0
+
+            candidates = remaining[depth]
+            if not candidates:
+                cells.pop()
+                remaining.pop()
+                marks.pop()
+                depth -= 1
+                if depth < 0:
+                    status = UNSOLVABLE
+                    break
+                continue
+
+            bit = candidates & -candidates
+            remaining[depth] = candidates ^ bit
+            values[index] = bit.bit_length()
+            rows[row] |= bit
+            cols[col] |= bit
+            regions[region] |= bit
+            cage_used[cage] |= bit
+            if depth == last:
+                status = SOLVED
+                break
+
+            checks += 1
+            allowed = cage_tables[cage][cage_used[cage]]
+            for mate in mates_after[depth]:
+                if not ~(rows[row_of[mate]] | cols[col_of[mate]] | regions[region_of[mate]]) & allowed:
+                    break
+            else:
+                if nodes == limit:
+                    self.pending = order[depth + 1]
+                    break
+                depth += 1
+                nodes += 1
+                depth_nodes[depth] += 1
+                index = order[depth]
+                cage = cell_cage[index]
+                cells.append(index)
+                remaining.append(~(rows[row_of[index]] | cols[col_of[index]] | regions[region_of[index]]) &
+                                 cage_tables[cage][cage_used[cage]])
+                marks.append(0)
+
+        self.nodes, self.checks = nodes, checks
+        return status
+
+    def run_propagating(self, limit: int) -> str:
+        """ Bucle de búsqueda con propagación después de cada valor probado.
+
+        Al volver a un nivel se deshacen con `state.undo` todos los cambios hechos desde que se llegó a él,
+        incluidos los de la propagación.
+
+        :param limit: El número de nodos en el que suspender la búsqueda, o -1 para no suspenderla
+        :return: Devuelve el nuevo estado de la búsqueda
+        """
+        state = self.state
+        propagator, select = self.propagator, self.select
+        cells, remaining, marks = self.cells, self.remaining, self.marks
+
+        while True:
+            index = cells[-1]
+            state.undo(marks[-1])
+            candidates = remaining[-1]
+            if not candidates:
+                cells.pop()
+                remaining.pop()
+                marks.pop()
+                if not cells:
+                    return UNSOLVABLE
+                continue
+
+            bit = candidates & -candidates
+            remaining[-1] = candidates ^ bit
+            state.assign(index, bit.bit_length())
+            self.checks += 1
+            if state.cage_feasible(state.cell_cage[index]) and propagator.propagate():
+                index = select()
+                if index < 0:
+                    return SOLVED
+                if self.nodes == limit:
+                    self.pending = index
+                    return SEARCHING
+                self.push(index)
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from .server import DEFAULT_HOST, DEFAULT_PORT
+from .suite import ROOT, TIERS, load_corpus, percentile
+
+# Niveles del corpus que se envían por defecto: los que el servicio resuelve en milisegundos
+DEFAULT_TIERS = ("reference", "easy", "medium")
+
+DEFAULT_REQUESTS = 200
+DEFAULT_CONCURRENCY = 16
+
+
+async def http_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                       payload: Optional[dict] = None) -> tuple[int, dict]:
+    """ Envía una petición HTTP/1.1 por una conexión abierta y lee la respuesta, manteniendo la conexión.
+
+    :param reader: El flujo de entrada de la conexión
+    :param writer: El flujo de salida de la conexión
+    :param method: El método HTTP
+    :param path: La ruta
+    :param payload: El cuerpo JSON de la petición, opcional
+    :return: Devuelve una tupla con el código de estado HTTP y el cuerpo JSON de la respuesta
+    """
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def run_load(host: str, port: int, payloads: list[dict], requests: int, concurrency: int) -> dict:
+    """ Envía peticiones de resolución al servicio desde varias conexiones a la vez.
+
+    Cada conexión envía una petición detrás de otra, tomando los tableros de `payloads` por turnos. Con más
+    conexiones que tableros distintos, varias conexiones piden el mismo tablero a la vez y el servicio las
+    agrupa.
+
+    :param host: La dirección del servicio
+    :param port: El puerto del servicio
+    :param payloads: Los cuerpos de las peticiones, uno por tablero
+    :param requests: El número total de peticiones
+    :param concurrency: El número de conexiones simultáneas
+    :return: Devuelve un diccionario con la duración, las latencias, los códigos HTTP, los estados de las
+             resoluciones, las peticiones agrupadas y las métricas del servicio al terminar
+    """
+    latencies: list[float] = []
+    codes: dict[int, int] = {}
+    statuses: dict[str, int] = {}
+    coalesced = 0
+    sent = 0
+
+    async def client() -> None:
+        nonlocal coalesced, sent
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while sent < requests:
+                payload = payloads[sent % len(payloads)]
+                sent += 1
+                start = time.perf_counter()
+                code, response = await http_request(reader, writer, "POST", "/solve", payload)
+                latencies.append(time.perf_counter() - start)
+                codes[code] = codes.get(code, 0) + 1
+                if code == 200:
+                    statuses[response["status"]] = statuses.get(response["status"], 0) + 1
+                    coalesced += response["coalesced"]
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, metrics = await http_request(reader, writer, "GET", "/metrics")
+    finally:
+        writer.close()
+    return {"duration": duration, "latencies": latencies, "codes": codes, "statuses": statuses,
+            "coalesced": coalesced, "metrics": metrics}
+
+
+def print_report(report: dict) -> None:
+    """ Muestra el resultado de una prueba de carga.
+
+    :param report: El resultado de `run_load`
+    """
+    latencies = report["latencies"]
+    print(f"{len(latencies)} peticiones en {report['duration']:.3f} s: "
+          f"{len(latencies) / report['duration']:.1f} peticiones por segundo")
+    print(f"Latencia: mediana {percentile(latencies, 0.5) * 1000:.2f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"máxima {max(latencies) * 1000:.2f} ms")
+    print(f"Códigos HTTP: {report['codes']}, estados: {report['statuses']}, agrupadas: {report['coalesced']}")
+    print(f"Métricas del servicio: {json.dumps(report['metrics'])}")
+
+
+def spawn_server(port: int, workers: int) -> subprocess.Popen:
+    """ Arranca un servicio local en otro proceso y espera a que acepte conexiones.
+
+    :param port: El puerto donde escuchar
+    :param workers: El número de procesos del grupo del servicio, 0 para uno por CPU
+    :return: Devuelve el proceso del servicio
+    """
+    process = subprocess.Popen([sys.executable, "-m", "solver.server", "--port", str(port),
+                                "--workers", str(workers)], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    # El servicio escribe una línea cuando ya acepta conexiones
+    line = process.stdout.readline()
+    if not line:
+        process.kill()
+        raise RuntimeError("El servicio no pudo arrancar")
+    return process
+
+
+def main(arguments: Optional[list[str]] = None) -> int:
+    """ Ejecuta una prueba de carga contra un servicio local desde la línea de comandos.
+
+    :param arguments: Los argumentos de la línea de comandos, por defecto los del proceso
+    :return: Devuelve el código de salida: 1 si alguna petición no obtuvo un 200, 0 si no
+    """
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio HTTP/JSON del solucionador")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"La dirección del servicio ({DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"El puerto del servicio ({DEFAULT_PORT})")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS,
+                        help=f"Número total de peticiones ({DEFAULT_REQUESTS})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Conexiones simultáneas ({DEFAULT_CONCURRENCY})")
+    parser.add_argument("--tier", action="append", choices=TIERS,
+                        help=f"Nivel del corpus a enviar, se puede indicar varias veces ({', '.join(DEFAULT_TIERS)})")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Arranca un servicio local en --port para la prueba y lo detiene al terminar")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Con --spawn, los procesos del grupo del servicio, 0 para uno por CPU")
+    parsed_args = parser.parse_args(arguments)
+    if parsed_args.requests < 1 or parsed_args.concurrency < 1:
+        parser.error("--requests y --concurrency deben ser al menos 1")
+
+    payloads = []
+    for case in load_corpus(parsed_args.tier or DEFAULT_TIERS):
+        payload = {"board": case.board, "cages": case.cages}
+        if case.regions is not None:
+            payload["regions"] = case.regions
+        payloads.append(payload)
+
+    process = spawn_server(parsed_args.port, parsed_args.workers) if parsed_args.spawn else None
+    try:
+        report = asyncio.run(run_load(parsed_args.host, parsed_args.port, payloads, parsed_args.requests,
+                                      parsed_args.concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    print_report(report)
+    return 0 if set(report["codes"]) == {200} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
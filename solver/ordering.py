@@ -0,0 +1,88 @@
+from typing import Callable
+
+from .combinations import combination_masks
+from .puzzle import Puzzle
+
+# Estrategias disponibles para elegir la siguiente celda a rellenar durante la búsqueda:
+#   row_major: fila por fila, igual que `find_next_cell`
+#   mrv: la celda con menos candidatos (minimum remaining values)
+#   mrv_cage: como mrv, pero en caso de empate se elige la celda de la jaula más pequeña
+#   static: un orden fijo calculado al principio, empezando por las jaulas más restringidas
+ORDERINGS = ("row_major", "mrv", "mrv_cage", "static")
+
+# Órdenes que no dependen del estado de la búsqueda, y por lo tanto se pueden calcular una sola vez
+STATIC_ORDERINGS = ("row_major", "static")
+
+Selector = Callable[[], int]
+
+
+def static_order(ordering: str, state, puzzle: Puzzle) -> list[int]:
+    """ Calcula el orden fijo de las celdas vacías para una estrategia estática.
+
+    Para la estrategia `static` las celdas se ordenan por lo restringida que está su jaula: primero las
+    jaulas con menos combinaciones de valores posibles, y entre ellas las más pequeñas. Las celdas de una
+    misma jaula quedan juntas, en orden de fila.
+
+    :param ordering: El nombre de la estrategia, uno de `STATIC_ORDERINGS`
+    :param state: El estado de búsqueda, para saber qué celdas están vacías
+    :param puzzle: El tablero y sus jaulas
+    :return: Devuelve la lista de índices de las celdas vacías en el orden en que se deben rellenar
+    """
+    empty = [index for index, value in enumerate(state.values) if value == 0]
+    if ordering == "row_major":
+        return empty
+    if ordering != "static":
+        raise ValueError(f"El orden de celdas '{ordering}' no es estático")
+
+    digits = puzzle.geometry.size
+    tightness = [(len(combination_masks(total, size, digits)), size)
+                 for total, size in zip(puzzle.cage_totals, puzzle.cage_sizes)]
+    cell_cage = state.cell_cage
+    return sorted(empty, key=lambda index: (tightness[cell_cage[index]], cell_cage[index], index))
+
+
+def make_selector(ordering: str, state, puzzle: Puzzle) -> Selector:
+    """ Crea una función que devuelve la siguiente celda vacía a rellenar según la estrategia indicada.
+
+    :param ordering: El nombre de la estrategia, uno de `ORDERINGS`
+    :param state: El estado de búsqueda sobre el que elegir celdas
+    :param puzzle: El tablero y sus jaulas
+    :return: Devuelve una función sin parámetros que devuelve el índice de la celda, o -1 si no quedan
+             celdas vacías
+    """
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Orden de celdas desconocido: {ordering}")
+
+    values = state.values
+    candidates = state.candidates
+
+    if ordering in STATIC_ORDERINGS:
+        order = static_order(ordering, state, puzzle)
+
+        def select_static() -> int:
+            for index in order:
+                if not values[index]:
+                    return index
+            return -1
+
+        return select_static
+
+    # Para mrv el desempate es la posición de la celda; para mrv_cage, primero el tamaño de la jaula
+    cage_sizes = puzzle.cage_sizes
+    cells = range(len(values))
+    tie_break = [cage_sizes[state.cell_cage[index]] * len(cells) + index if ordering == "mrv_cage" else index
+                 for index in cells]
+
+    def select_mrv() -> int:
+        best = -1
+        best_key = None
+        for index in cells:
+            if not values[index]:
+                key = (candidates(index).bit_count(), tie_break[index])
+                if best_key is None or key < best_key:
+                    if key[0] <= 1:
+                        return index
+                    best, best_key = index, key
+        return best
+
+    return select_mrv
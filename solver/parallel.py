@@ -0,0 +1,196 @@
+import multiprocessing
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Optional
+
+from .bitmask import iter_solutions, prepare
+from .ordering import make_selector
+from .propagation import Propagator
+from .puzzle import Puzzle
+from .stats import SolveStats
+
+# Número de subproblemas que se intentan crear por cada proceso. Con más subproblemas que procesos, un proceso
+# que termina pronto toma el siguiente subproblema de la cola, así que el trabajo se reparte solo aunque unos
+# subárboles sean mucho más grandes que otros.
+SUBPROBLEMS_PER_WORKER = 8
+
+# Profundidad máxima hasta la que se divide el árbol de búsqueda
+MAX_SPLIT_DEPTH = 6
+
+# Estado de cada proceso del grupo: el tablero, las reglas, el orden de celdas y el evento de cancelación
+_worker: Optional[tuple[Puzzle, tuple[str, ...], str, object]] = None
+
+
+def expand(puzzle: Puzzle, board: array, rules: Iterable[str],
+           stats: Optional[SolveStats] = None) -> tuple[list[array], bool]:
+    """ Expande un nodo del árbol de búsqueda: propaga, elige la celda con menos candidatos y crea un hijo por
+    cada candidato que no lleva a una contradicción inmediata.
+
+    Las celdas con un solo candidato se rellenan sin crear un nivel, así cada expansión divide de verdad el
+    árbol aunque no se use ninguna regla de propagación.
+
+    :param puzzle: El tablero original y sus jaulas
+    :param board: Los valores del nodo a expandir
+    :param rules: Los nombres de las reglas de propagación a aplicar
+    :param stats: Las estadísticas donde sumar las celdas resueltas y los candidatos descartados, opcional
+    :return: Devuelve una tupla con los valores de cada hijo y un booleano verdadero si el nodo ya es una
+             solución, en cuyo caso su único hijo es la propia solución
+    """
+    node = puzzle.copy()
+    node.board = board
+    state = prepare(node)
+    if not state.consistent:
+        return [], False
+    resolved, eliminated = (stats.resolved, stats.eliminated) if stats is not None else (None, None)
+    propagator = Propagator(state, node, rules, resolved, eliminated)
+    if not propagator.propagate():
+        return [], False
+    select = make_selector("mrv", state, node)
+    while True:
+        index = select()
+        if index < 0:
+            return [array('b', state.values)], True
+        candidates = state.candidates(index)
+        if candidates & (candidates - 1):
+            break
+        if not candidates:
+            return [], False
+        state.assign(index, candidates.bit_length())
+        if not (state.cage_feasible(state.cell_cage[index]) and propagator.propagate()):
+            return [], False
+
+    children = []
+    while candidates:
+        bit = candidates & -candidates
+        candidates ^= bit
+        mark = len(state.trail)
+        state.assign(index, bit.bit_length())
+        if state.cage_feasible(state.cell_cage[index]) and propagator.propagate():
+            children.append(array('b', state.values))
+        state.undo(mark)
+    return children, False
+
+
+def split(puzzle: Puzzle, rules: Iterable[str], target: int, max_depth: int = MAX_SPLIT_DEPTH,
+          stats: Optional[SolveStats] = None) -> tuple[list[array], int]:
+    """ Divide el árbol de búsqueda en subproblemas independientes, fijando los candidatos de las primeras
+    celdas con menos candidatos (MRV).
+
+    El árbol se expande nivel por nivel hasta tener al menos `target` subproblemas o llegar a `max_depth`.
+    Los subproblemas conservan el orden en que la búsqueda normal los recorrería.
+
+    :param puzzle: El tablero y sus jaulas
+    :param rules: Los nombres de las reglas de propagación a aplicar
+    :param target: El número de subproblemas que se quiere obtener
+    :param max_depth: La profundidad máxima de la división
+    :param stats: Las estadísticas donde contar los nodos expandidos, opcional
+    :return: Devuelve una tupla con los valores de cada subproblema y la profundidad a la que empiezan
+    """
+    rules = tuple(rules)
+    frontier = [array('b', puzzle.board)]
+    depth = 0
+    while frontier and len(frontier) < target and depth < max_depth:
+        expanded = []
+        open_nodes = 0
+        for board in frontier:
+            children, solved = expand(puzzle, board, rules, stats)
+            expanded.extend(children)
+            if not solved:
+                open_nodes += 1
+        if stats is not None:
+            stats.nodes += open_nodes
+            stats.record_depths([open_nodes], depth)
+        frontier = expanded
+        if not open_nodes:
+            break
+        depth += 1
+    return frontier, depth
+
+
+def _init_worker(puzzle: Puzzle, rules: tuple[str, ...], ordering: str, cancel) -> None:
+    global _worker
+    _worker = (puzzle, rules, ordering, cancel)
+
+
+def _search_subproblem(board: bytes, limit: Optional[int]) -> tuple[Optional[bytes], int, SolveStats]:
+    """ Busca las soluciones de un subproblema en un proceso del grupo.
+
+    :param board: Los valores del subproblema
+    :param limit: El número de soluciones en el que detenerse, o None para contarlas todas
+    :return: Devuelve una tupla con la primera solución encontrada (o None), el número de soluciones y las
+             estadísticas de la búsqueda
+    """
+    puzzle, rules, ordering, cancel = _worker
+    stats = SolveStats()
+    if cancel.is_set():
+        return None, 0, stats
+    node = puzzle.copy()
+    node.board = array('b', board)
+    first = None
+    count = 0
+    solutions = iter_solutions(node, rules, stats, ordering, cancel.is_set)
+    for values in solutions:
+        if first is None:
+            first = values.tobytes()
+        count += 1
+        if count == limit:
+            break
+    solutions.close()
+    return first, count, stats
+
+
+def search_parallel(puzzle: Puzzle, rules: Iterable[str] = (), stats: Optional[SolveStats] = None,
+                    ordering: str = "row_major", workers: Optional[int] = None,
+                    limit: Optional[int] = 1) -> tuple[Optional[array], int]:
+    """ Busca las soluciones de un tablero repartiendo su árbol de búsqueda entre varios procesos.
+
+    El árbol se divide con `split` en muchos más subproblemas que procesos, y los procesos los toman de una
+    cola compartida a medida que quedan libres. Cuando se alcanzan `limit` soluciones entre todos, el resto de
+    procesos abandona su subproblema y los subproblemas pendientes se descartan. Con un límite de 1 se obtiene
+    la primera solución que encuentre cualquier proceso, que solo coincide con la de `search` si el tablero
+    tiene solución única.
+
+    :param puzzle: El tablero y sus jaulas, no se modifica
+    :param rules: Los nombres de las reglas de propagación a aplicar
+    :param stats: Las estadísticas donde registrar la búsqueda, opcional. Los nodos y reglas se suman de todos
+                  los procesos, pero los tiempos son los del proceso actual
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar dentro de cada subproblema
+    :param workers: El número de procesos, por defecto uno por CPU
+    :param limit: El número de soluciones en el que detenerse, o None para contarlas todas
+    :return: Devuelve una tupla con una solución como arreglo plano (o None) y el número de soluciones
+             encontradas, como mucho `limit`
+    """
+    rules = tuple(rules)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    subproblems, depth = split(puzzle, rules, workers * SUBPROBLEMS_PER_WORKER, stats=stats)
+    searching = time.perf_counter()
+    if stats is not None:
+        stats.phases["prepare"] += searching - start
+
+    solution = None
+    count = 0
+    context = multiprocessing.get_context()
+    cancel = context.Event()
+    executor = ProcessPoolExecutor(max_workers=min(workers, max(len(subproblems), 1)), mp_context=context,
+                                   initializer=_init_worker, initargs=(puzzle, rules, ordering, cancel))
+    try:
+        futures = [executor.submit(_search_subproblem, board.tobytes(), limit) for board in subproblems]
+        for future in as_completed(futures):
+            first, found, worker_stats = future.result()
+            if stats is not None:
+                stats.add(worker_stats, depth)
+            if solution is None and first is not None:
+                solution = array('b', first)
+            count += found
+            if limit is not None and count >= limit:
+                count = limit
+                break
+    finally:
+        cancel.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        if stats is not None:
+            stats.phases["search"] += time.perf_counter() - searching
+    return solution, count
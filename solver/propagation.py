@@ -0,0 +1,295 @@
+from typing import Iterable, Optional
+
+from .combinations import combination_masks
+from .common import value_bit
+from .puzzle import Puzzle
+
+# Reglas de propagación disponibles, en el orden en que se aplican (de la más barata a la más costosa).
+RULES = ("naked_singles", "hidden_singles", "cage_combinations", "innies_outies")
+
+# Resultados de aplicar una regla
+CONTRADICTION = -1
+UNCHANGED = 0
+CHANGED = 1
+
+
+def find_sum_groups(puzzle: Puzzle) -> list[tuple[tuple[int, ...], int, bool]]:
+    """ Calcula los grupos de celdas con suma conocida según la regla del 45.
+
+    Cada fila, columna y noneto suma 45 (en un tablero de N x N, cada unidad suma 1 + 2 + ... + N). Restando
+    las jaulas que están completamente dentro de la unidad, las celdas restantes de la unidad ("innies") deben
+    sumar lo que falta. Del mismo modo, las celdas fuera de la unidad de las jaulas que la atraviesan
+    ("outies") deben sumar el total de esas jaulas menos la suma de los innies. Los innies están en la misma unidad, por lo que sus valores son distintos; los outies no
+    necesariamente.
+
+    :param puzzle: El tablero y sus jaulas
+    :return: Devuelve una lista de tuplas con los índices de las celdas, la suma del grupo y si sus valores
+             son necesariamente distintos
+    """
+    cage_cells = [frozenset(cells) for cells in puzzle.cage_cells]
+    size, unit_total = puzzle.geometry.size, puzzle.geometry.unit_total
+    groups = []
+    for unit in puzzle.geometry.units:
+        unit_cells = frozenset(unit)
+        inside_total = 0
+        overlap_total = 0
+        innies = set(unit)
+        outies = set()
+        for total, cells in zip(puzzle.cage_totals, cage_cells):
+            if cells <= unit_cells:
+                inside_total += total
+                innies -= cells
+            elif cells & unit_cells:
+                overlap_total += total
+                outies |= cells - unit_cells
+        innies = tuple(sorted(innies))
+        if 0 < len(innies) < size:
+            groups.append((innies, unit_total - inside_total, True))
+        if outies:
+            groups.append((tuple(sorted(outies)), overlap_total - (unit_total - inside_total), False))
+    return groups
+
+
+class Propagator:
+    """ Aplica reglas de propagación de restricciones sobre un `BitmaskState` hasta alcanzar un punto fijo.
+
+    Las reglas colocan valores con `state.assign` y descartan candidatos con `state.eliminate`, por lo que
+    todos sus cambios pueden deshacerse con `state.undo`. Cada vez que una regla deja una celda con un único
+    candidato, la celda se rellena y se suma en `resolved` bajo el nombre de la regla. Los candidatos que
+    descarta cada regla se suman del mismo modo en `eliminated`.
+    """
+
+    def __init__(self, state, puzzle: Puzzle, rules: Iterable[str] = RULES,
+                 resolved: Optional[dict[str, int]] = None, eliminated: Optional[dict[str, int]] = None) -> None:
+        """ Prepara el propagador para un estado y sus jaulas.
+
+        :param state: El estado de búsqueda sobre el que propagar
+        :param puzzle: El tablero y sus jaulas
+        :param rules: Los nombres de las reglas a aplicar, ver `RULES`
+        :param resolved: Diccionario opcional donde se suma el número de celdas resueltas por cada regla
+        :param eliminated: Diccionario opcional donde se suma el número de candidatos descartados por cada regla
+        """
+        rules = set(rules)
+        unknown = rules.difference(RULES)
+        if unknown:
+            raise ValueError(f"Reglas de propagación desconocidas: {', '.join(sorted(unknown))}")
+
+        self.state = state
+        self.resolved = resolved if resolved is not None else {}
+        self.eliminated = eliminated if eliminated is not None else {}
+        for rule in RULES:
+            self.resolved.setdefault(rule, 0)
+            self.eliminated.setdefault(rule, 0)
+        self.digits = puzzle.geometry.size
+        self.all_values = puzzle.geometry.all_values
+        self.units = puzzle.geometry.units
+        self.cages = [(cells, combination_masks(total, len(cells), self.digits))
+                      for total, cells in zip(puzzle.cage_totals, puzzle.cage_cells)]
+        self.sum_groups = find_sum_groups(puzzle)
+        self.rules = [getattr(self, rule) for rule in RULES if rule in rules]
+
+    def propagate(self) -> bool:
+        """ Aplica las reglas hasta que ninguna produzca cambios.
+
+        Cuando una regla produce cambios se vuelve a empezar por la primera, ya que las reglas más baratas
+        suelen aprovechar los cambios de las más costosas.
+
+        :return: Devuelve un booleano Falso si se encontró una contradicción
+        """
+        rules = self.rules
+        position = 0
+        while position < len(rules):
+            result = rules[position]()
+            if result == CONTRADICTION:
+                return False
+            position = 0 if result == CHANGED else position + 1
+        return True
+
+    def restrict(self, index: int, allowed: int, rule: str) -> int:
+        """ Limita los candidatos de una celda vacía a los valores de `allowed`.
+
+        :param index: El índice de la celda
+        :param allowed: La máscara de valores permitidos
+        :param rule: El nombre de la regla que aplica la restricción
+        :return: Devuelve CONTRADICTION, CHANGED o UNCHANGED
+        """
+        state = self.state
+        candidates = state.candidates(index)
+        remaining = candidates & allowed
+        if remaining == candidates:
+            return UNCHANGED
+        if not remaining:
+            return CONTRADICTION
+        self.eliminated[rule] += candidates.bit_count() - remaining.bit_count()
+        if remaining & (remaining - 1):
+            state.eliminate(index, candidates & ~allowed)
+        else:
+            state.assign(index, remaining.bit_length())
+            self.resolved[rule] += 1
+        return CHANGED
+
+    def naked_singles(self) -> int:
+        """ Rellena las celdas que solo tienen un candidato.
+
+        :return: Devuelve CONTRADICTION, CHANGED o UNCHANGED
+        """
+        state = self.state
+        values = state.values
+        result = UNCHANGED
+        for index in range(len(values)):
+            if not values[index]:
+                candidates = state.candidates(index)
+                if not candidates:
+                    return CONTRADICTION
+                if not candidates & (candidates - 1):
+                    state.assign(index, candidates.bit_length())
+                    self.resolved["naked_singles"] += 1
+                    result = CHANGED
+        return result
+
+    def hidden_singles(self) -> int:
+        """ Rellena las celdas que son el único lugar de su fila, columna o región donde cabe un valor.
+
+        :return: Devuelve CONTRADICTION, CHANGED o UNCHANGED
+        """
+        state = self.state
+        values = state.values
+        all_values = self.all_values
+        result = UNCHANGED
+        for unit in self.units:
+            placed = 0
+            once = 0
+            twice = 0
+            for index in unit:
+                if values[index]:
+                    placed |= value_bit(values[index])
+                else:
+                    candidates = state.candidates(index)
+                    twice |= once & candidates
+                    once |= candidates
+            if (placed | once) != all_values:
+                return CONTRADICTION
+            single = once & ~twice & ~placed
+            while single:
+                bit = single & -single
+                single ^= bit
+                for index in unit:
+                    if not values[index] and state.candidates(index) & bit:
+                        self.eliminated["hidden_singles"] += state.candidates(index).bit_count() - 1
+                        state.assign(index, bit.bit_length())
+                        self.resolved["hidden_singles"] += 1
+                        result = CHANGED
+                        break
+                else:
+                    return CONTRADICTION
+        return result
+
+    def restrict_group(self, cells: list[int], combinations: Iterable[int], rule: str) -> int:
+        """ Limita los candidatos de un grupo de celdas a las combinaciones de valores compatibles.
+
+        Una combinación es compatible si cada celda tiene al menos un candidato en ella, y entre todas las
+        celdas cubren todos sus valores.
+
+        :param cells: Los índices de las celdas vacías del grupo
+        :param combinations: Las máscaras de las combinaciones de valores posibles para esas celdas
+        :param rule: El nombre de la regla que aplica la restricción
+        :return: Devuelve CONTRADICTION, CHANGED o UNCHANGED
+        """
+        state = self.state
+        masks = [state.candidates(index) for index in cells]
+        union = 0
+        for mask in masks:
+            union |= mask
+        allowed = 0
+        for combination in combinations:
+            if combination & ~union == 0 and all(mask & combination for mask in masks):
+                allowed |= combination
+        result = UNCHANGED
+        for index in cells:
+            if not state.values[index]:
+                outcome = self.restrict(index, allowed, rule)
+                if outcome == CONTRADICTION:
+                    return CONTRADICTION
+                result |= outcome
+        return result
+
+    def cage_combinations(self) -> int:
+        """ Elimina los candidatos que no aparecen en ninguna combinación compatible de su jaula.
+
+        :return: Devuelve CONTRADICTION, CHANGED o UNCHANGED
+        """
+        state = self.state
+        values = state.values
+        result = UNCHANGED
+        for cage, (cells, combinations) in enumerate(self.cages):
+            used = state.cage_used[cage]
+            empty = [index for index in cells if not values[index]]
+            if not empty:
+                continue
+            remaining = [combination & ~used for combination in combinations if combination & used == used]
+            outcome = self.restrict_group(empty, remaining, "cage_combinations")
+            if outcome == CONTRADICTION:
+                return CONTRADICTION
+            result |= outcome
+        return result
+
+    def innies_outies(self) -> int:
+        """ Aplica la regla del 45 a los grupos de innies y outies de cada fila, columna y región.
+
+        Para los innies, cuyos valores son distintos, se usan las combinaciones de valores de la suma
+        restante. Para los outies solo se acotan los candidatos por mínimo y máximo.
+
+        :return: Devuelve CONTRADICTION, CHANGED o UNCHANGED
+        """
+        state = self.state
+        values = state.values
+        result = UNCHANGED
+        for cells, total, distinct in self.sum_groups:
+            empty = []
+            for index in cells:
+                if values[index]:
+                    total -= values[index]
+                else:
+                    empty.append(index)
+            if not empty:
+                if total != 0:
+                    return CONTRADICTION
+                continue
+            if distinct:
+                outcome = self.restrict_group(empty, combination_masks(total, len(empty), self.digits),
+                                              "innies_outies")
+            else:
+                outcome = self.restrict_bounds(empty, total)
+            if outcome == CONTRADICTION:
+                return CONTRADICTION
+            result |= outcome
+        return result
+
+    def restrict_bounds(self, cells: list[int], total: int) -> int:
+        """ Acota los candidatos de un grupo de celdas cuya suma es `total`, sin suponer valores distintos.
+
+        :param cells: Los índices de las celdas vacías del grupo
+        :param total: La suma que deben alcanzar las celdas
+        :return: Devuelve CONTRADICTION, CHANGED o UNCHANGED
+        """
+        state = self.state
+        masks = [state.candidates(index) for index in cells]
+        if not all(masks):
+            return CONTRADICTION
+        lows = [(mask & -mask).bit_length() for mask in masks]
+        highs = [mask.bit_length() for mask in masks]
+        low_sum = sum(lows)
+        high_sum = sum(highs)
+        result = UNCHANGED
+        for index, low, high in zip(cells, lows, highs):
+            minimum = max(total - (high_sum - high), 1)
+            maximum = min(total - (low_sum - low), self.digits)
+            if minimum > maximum:
+                return CONTRADICTION
+            if minimum > low or maximum < high:
+                allowed = self.all_values >> (self.digits - maximum) & ~(value_bit(minimum) - 1)
+                outcome = self.restrict(index, allowed, "innies_outies")
+                if outcome == CONTRADICTION:
+                    return CONTRADICTION
+                result = CHANGED
+        return result
@@ -0,0 +1,88 @@
+from array import array
+from typing import Optional
+
+from .common import Board, Cages, Regions
+from .grid import Geometry, geometry
+
+
+class Puzzle:
+    """ Representación compilada de un tablero y sus jaulas.
+
+    El tablero es un arreglo plano de N x N valores (índice = y * N + x, 0 para una celda vacía), y las
+    jaulas se guardan como arreglos de totales y tamaños, junto con el índice de la jaula de cada celda. Esto
+    evita buscar la jaula de una celda recorriendo la lista de jaulas, como hace `find_cage_index`.
+
+    El tamaño del tablero se deduce de su número de filas, y sus filas, columnas y regiones vienen de su
+    geometría (ver `grid.Geometry`), que es la misma para todos los tableros del mismo tamaño y regiones.
+
+    Se construye una sola vez a partir de las listas de `load_from_file`, y es lo que reciben los motores de
+    búsqueda.
+    """
+
+    __slots__ = ("board", "cell_cage", "cage_totals", "cage_sizes", "cage_cells", "peers", "geometry")
+
+    def __init__(self, board: Board, cages: Cages, regions: Optional[Regions] = None) -> None:
+        """ Compila un tablero y sus jaulas.
+
+        Si alguna celda no pertenece a ninguna jaula, se generará un AssertionError. Si el tablero no es
+        cuadrado o las regiones no son válidas, se generará un ValueError.
+
+        :param board: El tablero como lista de filas, un 0 indica una celda vacía
+        :param cages: Las jaulas del tablero
+        :param regions: Las coordenadas (x, y) de las celdas de cada región, o None para usar las cajas
+                        regulares (los nonetos en el tablero de 9 x 9)
+        """
+        size = len(board)
+        if any(len(row) != size for row in board):
+            raise ValueError(f"El tablero debe tener {size} valores en cada una de sus {size} filas")
+        self.geometry: Geometry = geometry(size, regions)
+        self.board = array('b', [value for row in board for value in row])
+        self.cage_totals = array('h', [total for total, _ in cages])
+        self.cage_sizes = array('b', [len(fields) for _, fields in cages])
+        self.cage_cells = tuple(tuple(y * size + x for x, y in fields) for _, fields in cages)
+        self.peers = self.geometry.peers
+
+        self.cell_cage = array('h', [-1] * (size * size))
+        for cage, cells in enumerate(self.cage_cells):
+            for index in cells:
+                self.cell_cage[index] = cage
+        if -1 in self.cell_cage:
+            index = self.cell_cage.index(-1)
+            raise AssertionError(f"No se encontró la jaula para las coordenadas ({index % size}, {index // size})")
+
+    @property
+    def cage_count(self) -> int:
+        """ El número de jaulas del tablero. """
+        return len(self.cage_totals)
+
+    def copy(self) -> "Puzzle":
+        """ Devuelve una copia con su propio tablero, que comparte las jaulas con este objeto.
+
+        :return: Devuelve el nuevo objeto
+        """
+        puzzle = Puzzle.__new__(Puzzle)
+        puzzle.board = array('b', self.board)
+        puzzle.cell_cage = self.cell_cage
+        puzzle.cage_totals = self.cage_totals
+        puzzle.cage_sizes = self.cage_sizes
+        puzzle.cage_cells = self.cage_cells
+        puzzle.peers = self.peers
+        puzzle.geometry = self.geometry
+        return puzzle
+
+    def to_board(self) -> Board:
+        """ Convierte el tablero plano en una lista de filas.
+
+        :return: Devuelve el tablero como lista de N filas de N valores
+        """
+        size = self.geometry.size
+        return [list(self.board[row * size:row * size + size]) for row in range(size)]
+
+    def to_cages(self) -> Cages:
+        """ Convierte las jaulas al formato de lista de (total, lista de coordenadas (x, y)).
+
+        :return: Devuelve la lista de jaulas
+        """
+        size = self.geometry.size
+        return [(total, [(index % size, index // size) for index in cells])
+                for total, cells in zip(self.cage_totals, self.cage_cells)]
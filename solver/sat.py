@@ -0,0 +1,522 @@
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from typing import Iterable, Iterator, Optional, TextIO
+
+from .combinations import combination_masks
+from .common import value_bit
+from .puzzle import Puzzle
+from .stats import SolveStats
+
+# Factor por el que crece el incremento de actividad de las variables después de cada conflicto (VSIDS)
+ACTIVITY_DECAY = 1 / 0.95
+
+# Conflictos hasta el primer reinicio, y factor por el que crece el intervalo después de cada reinicio
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+
+def cell_variable(index: int, value: int, size: int = 9) -> int:
+    """ Devuelve la variable que indica que una celda tiene un valor.
+
+    En un tablero de 9 x 9 las variables de celda van de 1 a 729, y en uno de N x N de 1 a N x N x N. Las
+    variables de selección de combinación de las jaulas empiezan después.
+
+    :param index: El índice de la celda, y * N + x
+    :param value: El valor del 1 al N
+    :param size: El tamaño N del tablero
+    :return: Devuelve el número de la variable, empezando por 1
+    """
+    return index * size + value
+
+
+def exactly_one(literals: list[int]) -> list[list[int]]:
+    """ Codifica que exactamente uno de los literales es verdadero, con una cláusula por cada par.
+
+    :param literals: Los literales
+    :return: Devuelve las cláusulas
+    """
+    clauses = [list(literals)]
+    for position, first in enumerate(literals):
+        for second in literals[position + 1:]:
+            clauses.append([-first, -second])
+    return clauses
+
+
+def encode(puzzle: Puzzle) -> tuple[int, list[list[int]]]:
+    """ Codifica un tablero como fórmula en forma normal conjuntiva (CNF).
+
+    Cada celda tiene exactamente un valor, y cada fila, columna y región tiene cada valor exactamente una vez.
+    Cada jaula tiene una variable por cada una de sus combinaciones de valores (ver
+    `combinations.combination_masks`) y exactamente una de ellas es verdadera. La combinación elegida prohíbe
+    en las celdas de la jaula los valores que no contiene y obliga a que cada uno de los suyos aparezca en
+    alguna celda. Como la jaula tiene tantas celdas como valores la combinación, sus celdas son distintas y
+    suman el total. Una jaula sin combinaciones produce una cláusula vacía, así que la fórmula es
+    insatisfacible.
+
+    :param puzzle: El tablero y sus jaulas
+    :return: Devuelve una tupla con el número de variables y la lista de cláusulas, cada una una lista de
+             literales distintos de cero
+    """
+    geometry = puzzle.geometry
+    digits = range(1, geometry.size + 1)
+    clauses: list[list[int]] = []
+    for index in range(geometry.cells):
+        clauses.extend(exactly_one([cell_variable(index, value, geometry.size) for value in digits]))
+        if puzzle.board[index]:
+            clauses.append([cell_variable(index, puzzle.board[index], geometry.size)])
+    for unit in geometry.units:
+        for value in digits:
+            clauses.extend(exactly_one([cell_variable(index, value, geometry.size) for index in unit]))
+
+    variables = geometry.cells * geometry.size
+    for cells, total, size in zip(puzzle.cage_cells, puzzle.cage_totals, puzzle.cage_sizes):
+        selectors = []
+        for combination in combination_masks(total, size, geometry.size):
+            variables += 1
+            selectors.append(variables)
+            for value in digits:
+                if combination & value_bit(value):
+                    clauses.append([-variables] + [cell_variable(index, value, geometry.size) for index in cells])
+                else:
+                    clauses.extend([-variables, -cell_variable(index, value, geometry.size)] for index in cells)
+        clauses.extend(exactly_one(selectors))
+    return variables, clauses
+
+
+def decode(model: Iterable[int], size: int = 9) -> array:
+    """ Convierte un modelo de la fórmula de `encode` en los valores del tablero.
+
+    :param model: Los literales verdaderos del modelo, basta con los positivos
+    :param size: El tamaño N del tablero
+    :return: Devuelve un arreglo plano de N x N valores, con 0 en las celdas que el modelo no asigna
+    """
+    values = array('b', [0] * (size * size))
+    for literal in model:
+        if 0 < literal <= size * size * size:
+            index, value = divmod(literal - 1, size)
+            values[index] = value + 1
+    return values
+
+
+def to_dimacs(variables: int, clauses: list[list[int]], out: TextIO) -> None:
+    """ Escribe una fórmula en formato DIMACS CNF.
+
+    :param variables: El número de variables
+    :param clauses: Las cláusulas
+    :param out: Donde escribir la fórmula
+    """
+    out.write(f"p cnf {variables} {len(clauses)}\n")
+    for clause in clauses:
+        out.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def read_dimacs(lines: Iterable[str]) -> tuple[int, list[list[int]]]:
+    """ Lee una fórmula en formato DIMACS CNF, ignorando los comentarios.
+
+    :param lines: Las líneas de la fórmula
+    :return: Devuelve una tupla con el número de variables y la lista de cláusulas
+    """
+    variables = 0
+    clauses: list[list[int]] = []
+    clause: list[int] = []
+    for line in lines:
+        if line.startswith("c"):
+            continue
+        if line.startswith("p"):
+            variables = int(line.split()[2])
+            continue
+        for literal in map(int, line.split()):
+            if literal:
+                clause.append(literal)
+            else:
+                clauses.append(clause)
+                clause = []
+    return variables, clauses
+
+
+def parse_model(output: str) -> Optional[list[int]]:
+    """ Lee el resultado de un solucionador SAT externo en el formato de las competiciones SAT.
+
+    El resultado tiene una línea "s SATISFIABLE" o "s UNSATISFIABLE" y, si es satisfacible, una o varias
+    líneas "v" con los literales del modelo terminados en 0.
+
+    Si el resultado no indica ninguno de los dos estados, se generará un ValueError.
+
+    :param output: La salida del solucionador
+    :return: Devuelve la lista de literales del modelo, o None si la fórmula es insatisfacible
+    """
+    status = None
+    model = []
+    for line in output.splitlines():
+        if line.startswith("s "):
+            status = line[2:].strip()
+        elif line.startswith("v "):
+            model.extend(literal for literal in map(int, line[2:].split()) if literal)
+    if status == "UNSATISFIABLE":
+        return None
+    if status != "SATISFIABLE":
+        raise ValueError("El solucionador SAT no devolvió un resultado")
+    return model
+
+
+class SatSolver:
+    """ Solucionador SAT con aprendizaje de cláusulas a partir de conflictos (CDCL).
+
+    La propagación unitaria usa dos literales vigilados por cláusula: una cláusula solo se revisa cuando uno
+    de sus dos literales vigilados pasa a ser falso. En cada conflicto se aprende la cláusula del primer punto
+    de implicación único (1UIP) y se retrocede directamente al nivel más profundo de los demás literales de
+    esa cláusula, donde pasa a obligar a su primer literal. Las variables se eligen por actividad (VSIDS) y con el último valor que tuvieron, y la búsqueda
+    se reinicia a intervalos crecientes conservando las cláusulas aprendidas.
+
+    Los literales son enteros distintos de cero como en DIMACS, y la lista de cláusulas que vigilan un literal
+    se guarda en la posición 2 * variable, o 2 * variable + 1 si el literal es negativo.
+    """
+
+    def __init__(self, variables: int, clauses: Iterable[list[int]]) -> None:
+        """ Crea el solucionador y añade las cláusulas de la fórmula.
+
+        :param variables: El número de variables
+        :param clauses: Las cláusulas, que no se modifican
+        """
+        self.variables = variables
+        self.values = [0] * (variables + 1)
+        self.level = [0] * (variables + 1)
+        self.reason: list[Optional[list[int]]] = [None] * (variables + 1)
+        self.phase = [1] * (variables + 1)
+        self.activity = [0.0] * (variables + 1)
+        self.increment = 1.0
+        self.watches: list[list[list[int]]] = [[] for _ in range(2 * variables + 2)]
+        self.trail: list[int] = []
+        self.trail_limits: list[int] = []
+        self.head = 0
+        self.decisions = 0
+        self.conflicts = 0
+        self.depth_nodes = [0] * (variables + 1)
+        self.consistent = True
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value(self, literal: int) -> int:
+        """ Devuelve 1 si el literal es verdadero, -1 si es falso y 0 si su variable no tiene valor. """
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause: list[int]) -> None:
+        """ Añade una cláusula en el nivel de decisión 0, antes de empezar la búsqueda o entre dos llamadas a
+        `solve`. Los literales que ya son falsos en el nivel 0 se descartan.
+
+        :param clause: Los literales de la cláusula
+        """
+        literals = [literal for literal in dict.fromkeys(clause) if self.value(literal) >= 0]
+        if any(-literal in literals or self.value(literal) > 0 for literal in literals):
+            return
+        if len(literals) > 1:
+            self.watch(literals)
+        elif not literals or self.value(literals[0]) < 0:
+            self.consistent = False
+        elif not self.value(literals[0]):
+            self.enqueue(literals[0])
+
+    def watch(self, clause: list[int]) -> None:
+        """ Vigila los dos primeros literales de una cláusula. """
+        for literal in clause[:2]:
+            self.watches[2 * abs(literal) + (literal < 0)].append(clause)
+
+    def enqueue(self, literal: int, reason: Optional[list[int]] = None) -> None:
+        """ Hace verdadero un literal en el nivel de decisión actual.
+
+        :param literal: El literal
+        :param reason: La cláusula que obliga a elegirlo, o None si es una decisión
+        """
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.level[variable] = len(self.trail_limits)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self) -> Optional[list[int]]:
+        """ Aplica la propagación unitaria a los literales asignados desde la última llamada.
+
+        :return: Devuelve la cláusula en conflicto, o None si no hay ninguno
+        """
+        values, watches, trail = self.values, self.watches, self.trail
+        while self.head < len(trail):
+            false_literal = -trail[self.head]
+            self.head += 1
+            watchers = watches[2 * abs(false_literal) + (false_literal < 0)]
+            kept = 0
+            position = 0
+            count = len(watchers)
+            while position < count:
+                clause = watchers[position]
+                position += 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                if (values[first] if first > 0 else -values[-first]) > 0:
+                    watchers[kept] = clause
+                    kept += 1
+                    continue
+                for other in range(2, len(clause)):
+                    literal = clause[other]
+                    if (values[literal] if literal > 0 else -values[-literal]) >= 0:
+                        clause[1], clause[other] = literal, false_literal
+                        watches[2 * abs(literal) + (literal < 0)].append(clause)
+                        break
+                else:
+                    watchers[kept] = clause
+                    kept += 1
+                    if (values[first] if first > 0 else -values[-first]) < 0:
+                        watchers[kept:] = watchers[position:]
+                        return clause
+                    self.enqueue(first, clause)
+            del watchers[kept:]
+        return None
+
+    def analyze(self, conflict: list[int]) -> tuple[list[int], int]:
+        """ Aprende una cláusula del conflicto, resolviendo hacia atrás hasta el primer punto de implicación
+        único del nivel actual.
+
+        :param conflict: La cláusula en conflicto
+        :return: Devuelve una tupla con la cláusula aprendida, cuyo primer literal es el que pasa a ser
+                 obligatorio, y el nivel al que retroceder
+        """
+        current = len(self.trail_limits)
+        seen = set()
+        learnt = [0]
+        pending = 0
+        literal = 0
+        position = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause if not literal else clause[1:]:
+                variable = abs(other)
+                if variable not in seen and self.level[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.level[variable] == current:
+                        pending += 1
+                    else:
+                        learnt.append(other)
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if not pending:
+                break
+            clause = self.reason[abs(literal)]
+        learnt[0] = -literal
+
+        backjump = 0
+        if len(learnt) > 1:
+            deepest = max(range(1, len(learnt)), key=lambda other: self.level[abs(learnt[other])])
+            learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+            backjump = self.level[abs(learnt[1])]
+        self.increment *= ACTIVITY_DECAY
+        return learnt, backjump
+
+    def bump(self, variable: int) -> None:
+        """ Aumenta la actividad de una variable que participa en un conflicto. """
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def backtrack(self, level: int) -> None:
+        """ Deshace las asignaciones de los niveles de decisión mayores que `level`. """
+        if len(self.trail_limits) <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            variable = abs(literal)
+            self.phase[variable] = self.values[variable]
+            self.values[variable] = 0
+            self.reason[variable] = None
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.head = limit
+
+    def decide(self) -> int:
+        """ Elige la variable sin valor más activa.
+
+        :return: Devuelve el literal de la decisión con el último valor de la variable, o 0 si todas tienen valor
+        """
+        best = 0
+        best_activity = -1.0
+        values, activity = self.values, self.activity
+        for variable in range(1, self.variables + 1):
+            if not values[variable] and activity[variable] > best_activity:
+                best, best_activity = variable, activity[variable]
+        return best * self.phase[best]
+
+    def solve(self) -> Optional[list[int]]:
+        """ Busca un modelo de la fórmula.
+
+        :return: Devuelve la lista de literales verdaderos, uno por variable, o None si es insatisfacible
+        """
+        if not self.consistent or self.propagate() is not None:
+            return None
+        restart = RESTART_FIRST
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    return None
+                learnt, backjump = self.analyze(conflict)
+                self.backtrack(backjump)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0])
+                else:
+                    self.watch(learnt)
+                    self.enqueue(learnt[0], learnt)
+                continue
+            if conflicts >= restart:
+                self.backtrack(0)
+                conflicts = 0
+                restart = int(restart * RESTART_GROWTH)
+            literal = self.decide()
+            if not literal:
+                return [variable * self.values[variable] for variable in range(1, self.variables + 1)]
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            self.depth_nodes[len(self.trail_limits) - 1] += 1
+            self.enqueue(literal)
+
+
+def solve_external(variables: int, clauses: list[list[int]], command: str,
+                   timeout: Optional[float] = None) -> Optional[list[int]]:
+    """ Resuelve una fórmula con un solucionador SAT instalado en el sistema.
+
+    La fórmula se escribe en un archivo DIMACS temporal, que se añade como último argumento de `command`, y
+    el resultado se lee de la salida estándar en el formato de las competiciones SAT (ver `parse_model`), que
+    usan kissat, cadical, glucose o cryptominisat, entre otros.
+
+    :param variables: El número de variables
+    :param clauses: Las cláusulas
+    :param command: El comando del solucionador, por ejemplo "kissat -q"
+    :param timeout: El tiempo máximo en segundos, sin límite por defecto
+    :return: Devuelve la lista de literales del modelo, o None si la fórmula es insatisfacible
+    """
+    descriptor, path = tempfile.mkstemp(suffix=".cnf")
+    try:
+        with os.fdopen(descriptor, "w") as cnf_file:
+            to_dimacs(variables, clauses, cnf_file)
+        # Los solucionadores suelen salir con el código 10 si la fórmula es satisfacible y 20 si no lo es, así
+        # que el código de salida no indica un error
+        result = subprocess.run(shlex.split(command) + [path], capture_output=True, text=True, timeout=timeout)
+    finally:
+        os.remove(path)
+    return parse_model(result.stdout)
+
+
+def iter_solutions(puzzle: Puzzle, stats: Optional[SolveStats] = None) -> Iterator[array]:
+    """ Recorre todas las soluciones del tablero con el solucionador SAT interno.
+
+    Después de cada solución se añade una cláusula que la prohíbe y se vuelve a resolver, conservando las
+    cláusulas aprendidas hasta entonces.
+
+    :param puzzle: El tablero y sus jaulas, no se modifica
+    :param stats: Las estadísticas donde registrar la búsqueda, opcional
+    :return: Devuelve un iterador con cada solución como un arreglo plano de N x N valores
+    """
+    start = time.perf_counter()
+    size = puzzle.geometry.size
+    solver = SatSolver(*encode(puzzle))
+    searching = time.perf_counter()
+    if stats is not None:
+        stats.phases["prepare"] += searching - start
+    elapsed = 0.0
+    try:
+        while True:
+            model = solver.solve()
+            elapsed += time.perf_counter() - searching
+            if model is None:
+                return
+            yield decode(model, size)
+            searching = time.perf_counter()
+            solver.backtrack(0)
+            solver.add_clause([-literal for literal in model if 0 < literal <= size * size * size])
+    finally:
+        if stats is not None:
+            stats.phases["search"] += elapsed
+            stats.nodes += solver.decisions
+            stats.backtracks += solver.conflicts
+            stats.record_depths(solver.depth_nodes)
+
+
+def search(puzzle: Puzzle, stats: Optional[SolveStats] = None,
+           command: Optional[str] = None) -> tuple[bool, int, int]:
+    """ Resuelve el tablero como fórmula SAT, con la misma interfaz que `bitmask.search`.
+
+    El tablero de `puzzle` se actualiza con la solución si se encuentra. Con el solucionador interno, las
+    estadísticas cuentan las decisiones como nodos y los conflictos como retrocesos. Con un solucionador
+    externo solo se registran los tiempos.
+
+    :param puzzle: El tablero a resolver y sus jaulas
+    :param stats: Las estadísticas donde registrar la resolución, opcional
+    :param command: El comando de un solucionador SAT externo (ver `solve_external`), o None para usar el
+                    solucionador interno
+    :return: Devuelve una tupla con un booleano verdadero si se encontró solución, el número de decisiones y
+             0 comprobaciones de jaulas, ya que las jaulas forman parte de la fórmula
+    """
+    own = stats if stats is not None else SolveStats()
+    nodes = own.nodes
+    if command is None:
+        solutions = iter_solutions(puzzle, own)
+        solution = next(solutions, None)
+        solutions.close()
+    else:
+        start = time.perf_counter()
+        variables, clauses = encode(puzzle)
+        searching = time.perf_counter()
+        model = solve_external(variables, clauses, command)
+        own.phases["prepare"] += searching - start
+        own.phases["search"] += time.perf_counter() - searching
+        solution = decode(model, puzzle.geometry.size) if model is not None else None
+    if solution is None:
+        return False, own.nodes - nodes, 0
+    puzzle.board[:] = solution
+    return True, own.nodes - nodes, 0
+
+
+def main(arguments: Optional[list[str]] = None) -> int:
+    """ Escribe un tablero como DIMACS CNF, o resuelve un archivo DIMACS con el solucionador interno.
+
+    Al resolver, el resultado se escribe en el formato de las competiciones SAT, así que el módulo se puede
+    usar como comando de `solve_external`.
+
+    :param arguments: Los argumentos de la línea de comandos, por defecto los del proceso
+    :return: Devuelve el código de salida habitual de los solucionadores: 10 si es satisfacible y 20 si no
+    """
+    parser = argparse.ArgumentParser(description="Exporta tableros a DIMACS CNF o resuelve archivos DIMACS")
+    parser.add_argument("--export", action="store_true",
+                        help="Escribe el tablero del archivo JSON como DIMACS CNF en lugar de resolver")
+    parser.add_argument("filename", help="El archivo JSON del tablero, o el archivo DIMACS a resolver")
+    parsed_args = parser.parse_args(arguments)
+
+    if parsed_args.export:
+        from .solver import load_puzzle
+        to_dimacs(*encode(Puzzle(*load_puzzle(parsed_args.filename))), sys.stdout)
+        return 0
+    with open(parsed_args.filename) as cnf_file:
+        model = SatSolver(*read_dimacs(cnf_file)).solve()
+    if model is None:
+        print("s UNSATISFIABLE")
+        return 20
+    print("s SATISFIABLE")
+    print("v " + " ".join(map(str, model)) + " 0")
+    return 10
+
+
+if __name__ == '__main__':
+    sys.exit(main())
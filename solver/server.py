@@ -0,0 +1,446 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from .cache import puzzle_key
+from .combinations import combination_masks
+from .common import Board, Cages, Regions
+from .ordering import ORDERINGS
+from .propagation import RULES
+from .puzzle import Puzzle
+from .solver import solve
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Tableros que pueden esperar en la cola sin contar los que se están resolviendo. Con la cola llena, las
+# peticiones nuevas se rechazan con un 503 en lugar de acumularse sin límite
+DEFAULT_QUEUE_SIZE = 64
+
+# Tiempo máximo en segundos para resolver cada tablero, para que un tablero imposible no ocupe un proceso del
+# grupo indefinidamente. Una petición puede pedir menos, pero no más
+DEFAULT_TIME_LIMIT = 10.0
+
+# Límites superiores en segundos de los intervalos del histograma de latencias
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+# Segundos de la ventana en la que se calculan las resoluciones por segundo
+RATE_WINDOW = 60.0
+
+# Tamaño máximo del cuerpo de una petición, en bytes
+MAX_BODY = 1 << 20
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def warm_up() -> None:
+    """ Prepara un proceso del grupo: construye las tablas de combinaciones de 9 valores antes de la primera
+    petición. """
+    combination_masks(45, 9)
+
+
+def solve_job(board: Board, cages: Cages, regions: Optional[Regions], rules: tuple[str, ...], ordering: str,
+              max_nodes: Optional[int], time_limit: float) -> dict:
+    """ Resuelve un tablero en un proceso del grupo.
+
+    El instante límite se calcula aquí, al empezar a resolver, así que el tiempo en la cola no cuenta.
+
+    :param board: El tablero inicial
+    :param cages: Las jaulas del tablero
+    :param regions: Las regiones del tablero, si son irregulares
+    :param rules: Las reglas de propagación a aplicar
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param max_nodes: El número máximo de nodos a visitar, sin límite si es None
+    :param time_limit: El tiempo máximo en segundos para resolver el tablero
+    :return: Devuelve un diccionario con el estado, la solución (o None), los nodos y la duración
+    """
+    result = solve(board, cages, rules, ordering, regions=regions, max_nodes=max_nodes,
+                   deadline=time.monotonic() + time_limit)
+    return {"status": result.status, "board": board if result else None, "nodes": result.nodes,
+            "duration": result.duration}
+
+
+class QueueFull(Exception):
+    """ Se genera al recibir un tablero cuando la cola del servicio está llena. """
+
+
+class BadRequest(Exception):
+    """ Se genera cuando una petición no tiene el formato esperado. """
+
+
+class Metrics:
+    """ Métricas del servicio: peticiones, histograma de latencias y resoluciones por segundo. """
+
+    def __init__(self) -> None:
+        """ Crea unas métricas vacías. """
+        self.started = time.monotonic()
+        self.requests = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.errors = 0
+        self.statuses: dict[str, int] = {}
+        # Un contador por intervalo de `LATENCY_BUCKETS`, más uno para las latencias mayores
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        # Instantes en que terminó cada resolución de la ventana `RATE_WINDOW`
+        self.solved: deque[float] = deque()
+
+    def record(self, latency: float, status: str) -> None:
+        """ Registra una petición respondida con una resolución.
+
+        :param latency: El tiempo en segundos desde que se recibió la petición hasta la respuesta
+        :param status: El estado de la resolución
+        """
+        self.latency[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency_sum += latency
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def record_solve(self) -> None:
+        """ Registra una resolución terminada en un proceso del grupo, sin contar las peticiones agrupadas. """
+        self.solved.append(time.monotonic())
+
+    def solves_per_second(self) -> float:
+        """ Calcula las resoluciones por segundo de la ventana `RATE_WINDOW`, o desde el arranque si es más
+        reciente. """
+        now = time.monotonic()
+        while self.solved and self.solved[0] < now - RATE_WINDOW:
+            self.solved.popleft()
+        elapsed = min(RATE_WINDOW, now - self.started)
+        return len(self.solved) / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self, queue_depth: int, running: int) -> dict:
+        """ Devuelve las métricas como un diccionario para convertirlo a JSON.
+
+        :param queue_depth: Los tableros que esperan en la cola
+        :param running: Los tableros que se están resolviendo
+        :return: Devuelve el diccionario
+        """
+        buckets = {str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.latency)}
+        buckets["+Inf"] = self.latency[-1]
+        return {
+            "uptime": time.monotonic() - self.started,
+            "queue_depth": queue_depth,
+            "running": running,
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "statuses": self.statuses,
+            "solves_per_second": self.solves_per_second(),
+            "latency": {"buckets": buckets, "count": sum(self.latency), "sum": self.latency_sum},
+        }
+
+
+class SolveService:
+    """ Servicio que resuelve tableros en un grupo de procesos ya arrancados.
+
+    Los tableros esperan en una cola acotada, de la que los sacan tantas tareas como procesos tiene el grupo,
+    así que nunca hay más tableros enviados al grupo que procesos. Si llega un tablero igual a uno que está en
+    la cola o resolviéndose, con las mismas opciones, la petición espera al mismo resultado en lugar de
+    resolverlo otra vez. Dos tableros son iguales si tienen la misma clave de la caché de soluciones (ver
+    `cache.puzzle_key`), aunque sus jaulas estén en otro orden.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 time_limit: float = DEFAULT_TIME_LIMIT) -> None:
+        """ Crea el servicio, sin arrancarlo.
+
+        :param workers: El número de procesos del grupo, por defecto uno por CPU
+        :param queue_size: El número máximo de tableros en la cola
+        :param time_limit: El tiempo máximo en segundos para resolver cada tablero
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.time_limit = time_limit
+        self.metrics = Metrics()
+        self.pending: dict[tuple, asyncio.Future] = {}
+        self.running = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.dispatchers: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """ Arranca los procesos del grupo y espera a que estén preparados. """
+        loop = asyncio.get_running_loop()
+        self.executor = ProcessPoolExecutor(self.workers, initializer=warm_up)
+        # El grupo crea los procesos a medida que recibe trabajo: con una tarea por proceso se crean todos
+        await asyncio.gather(*(loop.run_in_executor(self.executor, os.getpid) for _ in range(self.workers)))
+        self.queue = asyncio.Queue(self.queue_size)
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """ Detiene las tareas y el grupo de procesos, sin esperar a los tableros que se estén resolviendo. """
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def queue_depth(self) -> int:
+        """ El número de tableros que esperan en la cola. """
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def parse(self, request: dict) -> tuple[tuple, tuple]:
+        """ Comprueba una petición de resolución y calcula su clave.
+
+        Si la petición no tiene el formato esperado, se generará un BadRequest.
+
+        :param request: La petición, con las claves "board" y "cages" y, opcionalmente, "regions", "rules",
+                         "ordering", "max_nodes" y "time_limit"
+        :return: Devuelve una tupla con la clave de la petición y los argumentos de `solve_job`
+        """
+        try:
+            board, cages = request["board"], request["cages"]
+            regions = request.get("regions")
+            rules = tuple(request.get("rules", RULES))
+            if not set(rules) <= set(RULES):
+                raise BadRequest(f"Reglas de propagación desconocidas: "
+                                 f"{', '.join(sorted(map(str, set(rules) - set(RULES))))}")
+            ordering = request.get("ordering", "row_major")
+            if ordering not in ORDERINGS:
+                raise BadRequest(f"Orden de celdas desconocido: {ordering}")
+            max_nodes = request.get("max_nodes")
+            # bool es un subtipo de int, pero true no es un número de nodos
+            if max_nodes is not None and (type(max_nodes) is not int or max_nodes < 0):
+                raise BadRequest(f"Número máximo de nodos no válido: {max_nodes}")
+            time_limit = float(request.get("time_limit", self.time_limit))
+            # json.loads acepta NaN e Infinity, y con NaN la búsqueda nunca llegaría a su tiempo límite
+            if not math.isfinite(time_limit) or time_limit <= 0:
+                raise BadRequest(f"Tiempo límite no válido: {time_limit}")
+            time_limit = min(time_limit, self.time_limit)
+            puzzle = Puzzle(board, cages, regions)
+        except (AssertionError, KeyError, TypeError, ValueError, AttributeError, OverflowError) as error:
+            raise BadRequest(f"Tablero no válido: {type(error).__name__}: {error}")
+        key = (puzzle_key(puzzle), rules, ordering, max_nodes, time_limit)
+        return key, (board, cages, regions, rules, ordering, max_nodes, time_limit)
+
+    async def submit(self, request: dict) -> tuple[dict, bool]:
+        """ Resuelve el tablero de una petición, o espera al resultado de uno igual que ya esté pendiente.
+
+        Si la petición no es válida se generará un BadRequest, y si la cola está llena un QueueFull.
+
+        :param request: La petición (ver `parse`)
+        :return: Devuelve una tupla con el resultado de `solve_job` y un booleano verdadero si la petición se
+                 agrupó con otra igual
+        """
+        key, job = self.parse(request)
+        future = self.pending.get(key)
+        if future is not None:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(future), True
+        if self.queue.full():
+            raise QueueFull()
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        self.queue.put_nowait((key, job, future))
+        return await asyncio.shield(future), False
+
+    async def dispatch(self) -> None:
+        """ Saca tableros de la cola y los resuelve en el grupo de procesos, uno cada vez. """
+        loop = asyncio.get_running_loop()
+        while True:
+            key, job, future = await self.queue.get()
+            self.running += 1
+            try:
+                result = await loop.run_in_executor(self.executor, solve_job, *job)
+            except Exception as error:
+                future.set_exception(error)
+                # Evita el aviso de excepción no recogida si nadie espera ya a la petición
+                future.exception()
+            else:
+                self.metrics.record_solve()
+                future.set_result(result)
+            finally:
+                self.running -= 1
+                del self.pending[key]
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        """ Responde a una petición HTTP.
+
+        :param method: El método HTTP
+        :param path: La ruta pedida
+        :param body: El cuerpo de la petición
+        :return: Devuelve una tupla con el código de estado HTTP y el cuerpo de la respuesta
+        """
+        if path == "/metrics":
+            if method != "GET":
+                return 405, {"error": "Usa GET"}
+            return 200, self.metrics.to_dict(self.queue_depth, self.running)
+        if path != "/solve":
+            return 404, {"error": f"Ruta desconocida: {path}"}
+        if method != "POST":
+            return 405, {"error": "Usa POST"}
+
+        start = time.monotonic()
+        self.metrics.requests += 1
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise BadRequest("La petición debe ser un objeto JSON")
+            result, coalesced = await self.submit(request)
+        except (BadRequest, ValueError) as error:
+            self.metrics.errors += 1
+            return 400, {"error": str(error)}
+        except QueueFull:
+            self.metrics.rejected += 1
+            return 503, {"error": "La cola está llena, vuelve a intentarlo más tarde"}
+        except Exception as error:
+            self.metrics.errors += 1
+            return 500, {"error": f"{type(error).__name__}: {error}"}
+        self.metrics.record(time.monotonic() - start, result["status"])
+        return 200, dict(result, coalesced=coalesced)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Atiende una conexión HTTP/1.1, con varias peticiones seguidas si el cliente la mantiene abierta.
+
+        :param reader: El flujo de entrada de la conexión
+        :param writer: El flujo de salida de la conexión
+        """
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except BadRequest as error:
+                    write_response(writer, 400, {"error": str(error)}, False)
+                    break
+                if request is None:
+                    break
+                method, path, keep_alive, body = request
+                if body is None:
+                    status, payload = 413, {"error": f"El cuerpo supera {MAX_BODY} bytes"}
+                    keep_alive = False
+                else:
+                    status, payload = await self.route(method, path, body)
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[tuple[str, str, bool, Optional[bytes]]]:
+    """ Lee una petición HTTP/1.1 de una conexión.
+
+    Si la petición está mal formada, se generará un BadRequest.
+
+    :param reader: El flujo de entrada de la conexión
+    :return: Devuelve una tupla con el método, la ruta, si se mantiene la conexión abierta y el cuerpo (None si
+             supera `MAX_BODY`), o None si el cliente cerró la conexión
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, version = line.decode("latin-1").split()
+    except ValueError:
+        raise BadRequest("Línea de petición no válida")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise BadRequest("Content-Length no válido")
+    if length > MAX_BODY:
+        return method, path, False, None
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?")[0], keep_alive, body
+
+
+def write_response(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+    """ Escribe una respuesta HTTP/1.1 con un cuerpo JSON.
+
+    :param writer: El flujo de salida de la conexión
+    :param status: El código de estado HTTP
+    :param payload: El cuerpo de la respuesta
+    :param keep_alive: Si se mantiene la conexión abierta
+    """
+    body = json.dumps(payload).encode()
+    headers = [f"HTTP/1.1 {status} {REASONS[status]}", "Content-Type: application/json",
+               f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if status == 503:
+        headers.append("Retry-After: 1")
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+
+
+async def start_server(service: SolveService, host: str = DEFAULT_HOST,
+                       port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+    """ Arranca el servicio y empieza a aceptar conexiones.
+
+    :param service: El servicio a arrancar
+    :param host: La dirección donde escuchar, por defecto solo la máquina local
+    :param port: El puerto donde escuchar, 0 para uno libre
+    :return: Devuelve el servidor de `asyncio`
+    """
+    await service.start()
+    return await asyncio.start_server(service.handle, host, port)
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None,
+                queue_size: int = DEFAULT_QUEUE_SIZE, time_limit: float = DEFAULT_TIME_LIMIT) -> None:
+    """ Ejecuta el servicio hasta que se interrumpa.
+
+    :param host: La dirección donde escuchar
+    :param port: El puerto donde escuchar
+    :param workers: El número de procesos del grupo, por defecto uno por CPU
+    :param queue_size: El número máximo de tableros en la cola
+    :param time_limit: El tiempo máximo en segundos para resolver cada tablero
+    """
+    service = SolveService(workers, queue_size, time_limit)
+    server = await start_server(service, host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Sirviendo en http://{address[0]}:{address[1]} con {service.workers} procesos", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(arguments: Optional[list[str]] = None) -> int:
+    """ Ejecuta el servicio desde la línea de comandos.
+
+    :param arguments: Los argumentos de la línea de comandos, por defecto los del proceso
+    :return: Devuelve el código de salida
+    """
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON local del solucionador de Sudoku Asesino")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"La dirección donde escuchar ({DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"El puerto donde escuchar ({DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=0, help="Procesos del grupo, 0 para uno por CPU")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Tableros que pueden esperar en la cola antes de rechazar peticiones "
+                             f"({DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT,
+                        help=f"Tiempo máximo en segundos para resolver cada tablero ({DEFAULT_TIME_LIMIT})")
+    parsed_args = parser.parse_args(arguments)
+    if parsed_args.queue_size < 1:
+        parser.error("--queue-size debe ser al menos 1")
+    try:
+        asyncio.run(serve(parsed_args.host, parsed_args.port, parsed_args.workers or None, parsed_args.queue_size,
+                          parsed_args.time_limit))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+from typing import Iterable, Optional
+
+from .bitmask import BitmaskState, prepare, search_propagating
+from .common import Board, Cages, Regions, value_bit
+from .ordering import make_selector
+from .propagation import RULES, Propagator
+from .puzzle import Puzzle
+
+
+class Session:
+    """ Tablero en edición, que mantiene compilado el tablero y sus candidatos propagados entre cambios.
+
+    Pensado para un editor interactivo: en lugar de llamar a `solve` con el tablero entero en cada pulsación,
+    se crea una sesión con las jaulas y se le comunican los cambios. Cada valor introducido se coloca con
+    `BitmaskState.assign` y se propaga desde el punto fijo anterior, anotando en qué punto del registro de
+    cambios empieza, así que solo se propaga lo que el valor nuevo afecta. Al borrar un valor se deshace el
+    registro hasta ese punto y se vuelven a aplicar los valores introducidos después. Cambiar una jaula cambia
+    sus tablas de combinaciones y los grupos de la regla `innies_outies`, así que se vuelve a compilar el
+    tablero y se aplican de nuevo todos los valores.
+
+    Si un valor contradice a los anteriores, se guarda pero no se aplica, y tampoco los posteriores, hasta que
+    se borre: los candidatos reflejan los valores anteriores a la contradicción, y `solvable` devuelve falso.
+    """
+
+    def __init__(self, board: Board, cages: Cages, rules: Iterable[str] = RULES,
+                 regions: Optional[Regions] = None) -> None:
+        """ Crea la sesión a partir de un tablero y sus jaulas.
+
+        :param board: El tablero inicial, sus valores se tratan como valores introducidos
+        :param cages: Las jaulas del tablero
+        :param rules: Las reglas de propagación a aplicar después de cada cambio
+        :param regions: Las regiones del tablero, si son irregulares
+        """
+        self.cages = [(total, list(fields)) for total, fields in cages]
+        self.rules = tuple(rules)
+        self.size = len(board)
+        self.regions = regions
+        # Valores introducidos (índice y valor), en orden, y la longitud del registro de cambios antes de aplicar
+        # cada uno de los aplicados
+        self.entries: list[tuple[int, int]] = []
+        self.marks: list[int] = []
+        self.solution: Optional[list[int]] = None
+        self.solved = False
+        self.compile()
+        for index, value in enumerate(value for row in board for value in row):
+            if value:
+                self.entries.append((index, value))
+        self.replay()
+
+    def compile(self, puzzle: Optional[Puzzle] = None) -> None:
+        """ Compila el tablero vacío con las jaulas actuales y lo propaga.
+
+        :param puzzle: El tablero vacío ya compilado con las jaulas actuales, opcional
+        """
+        self.puzzle = puzzle or Puzzle(self.empty_board(), self.cages, self.regions)
+        self.state: BitmaskState = prepare(self.puzzle)
+        self.propagator = Propagator(self.state, self.puzzle, self.rules)
+        self.base_consistent = self.state.consistent and self.propagator.propagate()
+        self.consistent = self.base_consistent
+        self.marks = []
+
+    def replay(self) -> None:
+        """ Aplica los valores introducidos que aún no están aplicados, hasta el primero que dé una
+        contradicción. """
+        self.solved = False
+        while self.consistent and len(self.marks) < len(self.entries):
+            index, value = self.entries[len(self.marks)]
+            if not self.apply(index, value):
+                self.consistent = False
+
+    def apply(self, index: int, value: int) -> bool:
+        """ Coloca un valor introducido y propaga sus consecuencias.
+
+        :param index: El índice de la celda (y * N + x)
+        :param value: El valor a colocar
+        :return: Devuelve un booleano falso si el valor contradice a los anteriores, en cuyo caso el estado
+                 queda como estaba
+        """
+        state = self.state
+        mark = len(state.trail)
+        if state.values[index]:
+            # La propagación ya rellenó la celda: solo es válido si coincide
+            if state.values[index] != value:
+                return False
+        elif not state.candidates(index) & value_bit(value):
+            return False
+        else:
+            state.assign(index, value)
+            if not state.cage_feasible(state.cell_cage[index]) or not self.propagator.propagate():
+                state.undo(mark)
+                return False
+        self.marks.append(mark)
+        return True
+
+    def rewind(self, position: int) -> None:
+        """ Deshace los valores aplicados desde la posición indicada de `entries`.
+
+        :param position: La posición del primer valor a deshacer
+        """
+        if position < len(self.marks):
+            self.state.undo(self.marks[position])
+            del self.marks[position:]
+        # Los valores aún aplicados son consistentes; `replay` vuelve a comprobar los siguientes
+        self.consistent = self.base_consistent
+        self.solved = False
+
+    def set_cell(self, x: int, y: int, value: int) -> bool:
+        """ Introduce un valor en una celda, sustituyendo el que tuviera.
+
+        :param x: La columna de la celda
+        :param y: La fila de la celda
+        :param value: El valor, del 1 al N
+        :return: Devuelve un booleano falso si el tablero tiene una contradicción después del cambio
+        """
+        if not 1 <= value <= self.size:
+            raise ValueError(f"Valor no válido: {value}")
+        index = cell_index(x, y, self.size)
+        position = self.find(index)
+        if position is not None:
+            self.rewind(position)
+            del self.entries[position]
+        self.entries.append((index, value))
+        self.replay()
+        return self.consistent
+
+    def clear_cell(self, x: int, y: int) -> bool:
+        """ Borra el valor introducido en una celda.
+
+        :param x: La columna de la celda
+        :param y: La fila de la celda
+        :return: Devuelve un booleano falso si el tablero tiene una contradicción después del cambio
+        """
+        position = self.find(cell_index(x, y, self.size))
+        if position is not None:
+            self.rewind(position)
+            del self.entries[position]
+            self.replay()
+        return self.consistent
+
+    def edit_cage(self, cage: int, total: int, fields: Optional[list[tuple[int, int]]] = None) -> bool:
+        """ Cambia el total de una jaula y, opcionalmente, sus celdas.
+
+        Cada celda debe pertenecer a una sola jaula: si se mueven celdas de una jaula a otra, hay que cambiar
+        las dos. Si alguna celda se queda sin jaula, se genera un AssertionError (ver `Puzzle`) y la sesión no
+        cambia.
+
+        :param cage: La posición de la jaula en la lista de jaulas
+        :param total: El nuevo total
+        :param fields: Las nuevas coordenadas (x, y) de la jaula, o None para dejar las que tiene
+        :return: Devuelve un booleano falso si el tablero tiene una contradicción después del cambio
+        """
+        cages = list(self.cages)
+        cages[cage] = (total, list(fields) if fields is not None else self.cages[cage][1])
+        puzzle = Puzzle(self.empty_board(), cages, self.regions)
+        self.cages = cages
+        self.solved = False
+        self.compile(puzzle)
+        self.replay()
+        return self.consistent
+
+    def find(self, index: int) -> Optional[int]:
+        """ Busca el valor introducido en una celda.
+
+        :param index: El índice de la celda
+        :return: Devuelve la posición del valor en `entries`, o None si la celda no tiene valor introducido
+        """
+        for position, (entry, _) in enumerate(self.entries):
+            if entry == index:
+                return position
+        return None
+
+    def candidates(self, x: int, y: int) -> list[int]:
+        """ Devuelve los valores que aún puede tener una celda después de propagar los valores introducidos.
+
+        :param x: La columna de la celda
+        :param y: La fila de la celda
+        :return: Devuelve la lista de valores, de menor a mayor. Para una celda con valor, solo ese valor
+        """
+        index = cell_index(x, y, self.size)
+        value = self.state.values[index]
+        if value:
+            return [value]
+        mask = self.state.candidates(index)
+        return [value for value in range(1, self.size + 1) if mask & value_bit(value)]
+
+    def solvable(self) -> bool:
+        """ Comprueba si el tablero con los valores introducidos tiene solución.
+
+        La búsqueda parte de los candidatos ya propagados y se deshace al terminar, así que la sesión no cambia.
+        El resultado se guarda hasta el siguiente cambio.
+
+        :return: Devuelve un booleano verdadero si el tablero tiene al menos una solución
+        """
+        if not self.consistent:
+            return False
+        if not self.solved:
+            state = self.state
+            mark = len(state.trail)
+            select = make_selector("mrv", state, self.puzzle)
+            success, _, _ = search_propagating(state, self.propagator, select, [0] * (len(state.values) + 1))
+            self.solution = list(state.values) if success else None
+            state.undo(mark)
+            self.solved = True
+        return self.solution is not None
+
+    def to_board(self) -> Board:
+        """ Devuelve el tablero con los valores introducidos, sin los deducidos por la propagación.
+
+        :return: Devuelve el tablero como lista de filas
+        """
+        size = self.size
+        values = [0] * (size * size)
+        for index, value in self.entries:
+            values[index] = value
+        return [values[y * size:y * size + size] for y in range(size)]
+
+    def empty_board(self) -> Board:
+        """ Devuelve un tablero vacío del tamaño de la sesión. """
+        return [[0] * self.size for _ in range(self.size)]
+
+
+def cell_index(x: int, y: int, size: int = 9) -> int:
+    """ Calcula el índice de una celda, comprobando que está en el tablero.
+
+    :param x: La columna de la celda
+    :param y: La fila de la celda
+    :param size: El tamaño N del tablero
+    :return: Devuelve el índice de la celda (y * N + x)
+    """
+    if not (0 <= x < size and 0 <= y < size):
+        raise ValueError(f"Coordenadas fuera del tablero: ({x}, {y})")
+    return y * size + x
@@ -1,12 +1,30 @@
 import json
-import timeit
-
-Cages = list[tuple[int, list[tuple[int, int]]]]
-Board = list[list[int]]
-MinMaxCache = list[list[tuple[int, int]]]
-
-validations_performed = 0
-combinations_tried = 0
+import time
+from array import array
+from contextlib import nullcontext
+
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+
+from .bitmask import ENGINES, iter_solutions, search
+from .budget import BUDGET_EXHAUSTED, CancelToken, SearchInterrupted, SolveResult, make_budget
+from .common import Board, Cages, MinMaxCache, Regions
+from .grid import box_shape, geometry
+from .iterative import SOLVED, UNSOLVABLE
+from .ordering import ORDERINGS
+from .propagation import RULES
+from .puzzle import Puzzle
+from .stats import SolveStats
+
+# Los motores dlx y sat, la caché, la búsqueda en varios procesos y la simetría se importan dentro de las
+# funciones que los usan: traen módulos como sqlite3 o multiprocessing que tardan más en importarse que en
+# resolver un tablero fácil, y la mayoría de las ejecuciones no los necesita
+if TYPE_CHECKING:
+    from .cache import SolutionCache
+    from .trace import SearchTrace
+
+# Motores de resolución: la búsqueda con máscaras de bits y propagación, la cobertura exacta con Dancing Links o
+# la fórmula SAT
+BACKENDS = ("bitmask", "dlx", "sat")
 
 
 def find_cage_index(cages: Cages, x: int, y: int) -> int:
@@ -46,27 +64,38 @@ def is_same_cage(cages: Cages, x1: int, y1: int, x2: int, y2: int) -> bool:
     return find_cage_index(cages, x1, y1) == find_cage_index(cages, x2, y2)
 
 
-def print_board(board: Board, cages: Cages) -> None:
+def print_board(board: Board, cages: Cages, regions: Optional[Regions] = None) -> None:
     """Imprime el tablero con las jaulas en la consola.
 
+    Las celdas tienen el ancho del mayor valor del tablero, así que en tableros de más de 9 x 9 cada celda
+    ocupa dos caracteres.
+
     :param board: El tablero que se va a imprimir
     :param jaulas: La lista de jaulas para mostrar en el tablero
+    :param regions: Las regiones del tablero, si son irregulares
     """
 
-    print("+" + "---+" * 9)
-    for y in range(9):
+    # Índice de la jaula de cada celda, calculado una sola vez en lugar de buscarlo para cada par de celdas
+    cell_cage = Puzzle(board, cages, regions).cell_cage
+    size = len(board)
+    width = len(str(size))
+    border = "-" * (width + 2) + "+"
+    gap = " " * (width + 2) + "+"
+
+    print("+" + border * size)
+    for y in range(size):
         print("|", end="")
         sep_line = "|"
-        for x in range(9):
+        for x in range(size):
             value = board[y][x]
             end_char = "|"
-            if x < 8 and is_same_cage(cages, x, y, x + 1, y):
+            if x < size - 1 and cell_cage[y * size + x] == cell_cage[y * size + x + 1]:
                 end_char = " "
-            if y < 8 and is_same_cage(cages, x, y, x, y + 1):
-                sep_line += "   +"
+            if y < size - 1 and cell_cage[y * size + x] == cell_cage[y * size + x + size]:
+                sep_line += gap
             else:
-                sep_line += "---+"
-            print(f" {value if  value > 0 else ' '} {end_char}", end="")
+                sep_line += border
+            print(f" {value if value > 0 else ' ':>{width}} {end_char}", end="")
         print()
         print(sep_line)
 
@@ -84,10 +113,12 @@ def find_taken_value(board: Board, cages: Cages, cage_cache: Board,
     """
 
     taken_values = []
+    size = len(board)
+    height, width = box_shape(size)
 
     # Valores ocupados en el nodo
-    for ty in find_nonet_range(y):
-        for tx in find_nonet_range(x):
+    for ty in find_nonet_range(y, height, size):
+        for tx in find_nonet_range(x, width, size):
             if board[ty][tx] > 0:
                 taken_values.append(board[ty][tx])
 
@@ -104,15 +135,15 @@ def find_taken_value(board: Board, cages: Cages, cage_cache: Board,
     # valores ya ocupados del total y reducido el conteo de campos, esto podría reducir considerablemente el número
     # de valores posibles.
 
-    max_value = min(total - sum([i for i in range(1, 10)][:field_count - 1]), 9)
-    if max_value < 9:
-        taken_values.extend(range(max_value + 1, 10))
-    min_value = max(total - sum([i for i in range(9, 0, -1)][:field_count - 1]), 1)
+    max_value = min(total - sum([i for i in range(1, size + 1)][:field_count - 1]), size)
+    if max_value < size:
+        taken_values.extend(range(max_value + 1, size + 1))
+    min_value = max(total - sum([i for i in range(size, 0, -1)][:field_count - 1]), 1)
     if min_value > 1:
-        taken_values.extend(range(1, min(min_value, 10)))
+        taken_values.extend(range(1, min(min_value, size + 1)))
 
     # Encontrar valores ocupados en la columna y la fila en los que se encuentra la posición
-    for pos in range(9):
+    for pos in range(size):
         if board[y][pos] > 0:
             taken_values.append(board[y][pos])
         if board[pos][x] > 0:
@@ -121,7 +152,7 @@ def find_taken_value(board: Board, cages: Cages, cage_cache: Board,
     return taken_values
 
 
-def find_minmax_value(cages: Cages, x: int, y: int) -> tuple[int, int]:
+def find_minmax_value(cages: Cages, x: int, y: int, size: int = 9) -> tuple[int, int]:
     """ Encuentra los valores mínimo y máximo posibles para una celda en el tablero
 
     Dado que las jaulas son un subconjunto de campos que rara vez contienen los 9 números, es posible
@@ -135,32 +166,35 @@ def find_minmax_value(cages: Cages, x: int, y: int) -> tuple[int, int]:
     :param cages: Las jaulas a evaluar
     :param x: El índice basado en cero de la coordenada x
     :param y: El índice basado en cero de la coordenada y
+    :param size: El tamaño del tablero, que es también el mayor valor posible
     :return: Devuelve una tupla de los valores mínimo y máximo posibles
     """
 
     cage_index = find_cage_index(cages, x, y)
     total, fields = cages[cage_index]
     field_count = len(fields)
-    min_val = max(total - sum([i for i in range(9, 0, -1)][:field_count - 1]), 1)
-    max_val = min(total - sum([i for i in range(1, 10)][:field_count - 1]), 9)
+    min_val = max(total - sum([i for i in range(size, 0, -1)][:field_count - 1]), 1)
+    max_val = min(total - sum([i for i in range(1, size + 1)][:field_count - 1]), size)
     return min_val, max_val
 
 
-def find_nonet_range(coord: int) -> range:
+def find_nonet_range(coord: int, length: int = 3, size: int = 9) -> range:
     """ Encuentra el rango de un noneto a lo largo de un solo eje.
 
     Los primeros 3 campos a lo largo de un eje son iguales al noneto que reside en el rango [0;3[. El
     siguiente grupo de 3 campos es igual al rango [3;6[ y los últimos 3 campos son iguales a [6:9[. Ya que esto es igual para ambos ejes,
     este método se llama para un solo eje cada vez.
 
+    En tableros de otro tamaño, las cajas tienen `length` campos a lo largo del eje (ver `grid.box_shape`),
+    que pueden ser distintos en cada eje. Las coordenadas fuera del tablero quedan en la última caja.
+
     :param coord: La coordenada con base cero a lo largo de un eje
+    :param length: El número de campos de una caja a lo largo del eje
+    :param size: El número de campos del tablero a lo largo del eje
     :return: Devuelve el rango utilizado por el noneto a lo largo del eje específico
     """
-    if coord < 3:
-        return range(0, 3)
-    if coord < 6:
-        return range(3, 6)
-    return range(6, 9)
+    start = min(coord // length, size // length - 1) * length
+    return range(start, start + length)
 
 
 def find_next_cell(board: Board, x: int, y: int) -> tuple[int, int]:
@@ -180,12 +214,13 @@ def find_next_cell(board: Board, x: int, y: int) -> tuple[int, int]:
     """
     col = x
     row = y
+    last = len(board) - 1
     while True:
         col += 1
-        if col > 8:
+        if col > last:
             col = 0
             row += 1
-        if row > 8:
+        if row > last:
             return -1, -1
         if board[row][col] == 0:
             return col, row
@@ -201,9 +236,9 @@ def validate_rows(board: Board) -> bool:
     :param board: El tablero a validar
     :return: Devuelve un booleano Verdadero si ninguna fila contiene duplicados
     """
-    for col in range(9):
+    for col in range(len(board)):
         row_set = set()
-        for row in range(9):
+        for row in range(len(board)):
             value = board[row][col]
             if value != 0:
                 if value in row_set:
@@ -222,7 +257,7 @@ def validate_cols(board: Board) -> bool:
     :param board: El tablero a validar
     :return: Devuelve un booleano Verdadero si ninguna columna contiene duplicados
     """
-    for row in range(9):
+    for row in range(len(board)):
         col_set = set()
         for value in board[row]:
             if value != 0:
@@ -232,27 +267,28 @@ def validate_cols(board: Board) -> bool:
     return True
 
 
-def validate_nonets(board: Board) -> bool:
+def validate_nonets(board: Board, regions: Optional[Regions] = None) -> bool:
     """ Valida los nonetes en el tablero, verificando que no existan duplicados en un nonet.
 
     Solo se validarán las celdas completadas, lo que significa que un nonet medio completado puede ser válido siempre y cuando
     no contenga duplicados. Este método solo busca duplicados y detiene la búsqueda
     tan pronto como descubre uno.
 
+    En tableros de otro tamaño se validan sus cajas, o sus regiones si son irregulares (ver `grid.Geometry`).
+
     :param board: El tablero a validar
+    :param regions: Las regiones del tablero, si son irregulares
     :return: Devuelve un booleano Verdadero si no existen duplicados en ningún nonet
     """
-    for nonet_x in range(0, 9, 3):
-        range_x = find_nonet_range(nonet_x)
-        for nonet_y in range(0, 9, 3):
-            nonet_set = set()
-            for y in find_nonet_range(nonet_y):
-                for x in range_x:
-                    value = board[y][x]
-                    if value != 0:
-                        if value in nonet_set:
-                            return False
-                        nonet_set.add(value)
+    size = len(board)
+    for region in geometry(size, regions).regions:
+        nonet_set = set()
+        for index in region:
+            value = board[index // size][index % size]
+            if value != 0:
+                if value in nonet_set:
+                    return False
+                nonet_set.add(value)
     return True
 
 
@@ -291,7 +327,7 @@ def validate_cages(board: Board, cages: Cages) -> bool:
     return True
 
 
-def validate(board: Board, cages: Cages) -> bool:
+def validate(board: Board, cages: Cages, regions: Optional[Regions] = None) -> bool:
     """ Valida las columnas, filas, nonetes y jaulas en el tablero.
 
     Valida las columnas, filas, nonetes y campos en ese orden. Si alguna de estas no es válida, la
@@ -301,17 +337,15 @@ def validate(board: Board, cages: Cages) -> bool:
 
     :param board: El tablero a validar
     :param cages: Las jaulas a validar
+    :param regions: Las regiones del tablero, si son irregulares
     :return: Devuelve un booleano Verdadero si el tablero es válido
     """
-    global validations_performed
-    validations_performed += 1
-
-    return validate_cols(board) and validate_rows(board) and validate_nonets(board) and \
+    return validate_cols(board) and validate_rows(board) and validate_nonets(board, regions) and \
         validate_cages(board, cages)
 
 
 def fill_out_next(board: Board, cages: Cages, cage_cache: Board,
-                  minmax_cache: MinMaxCache, x: int, y: int) -> bool:
+                  minmax_cache: MinMaxCache, x: int, y: int, stats: Optional[SolveStats] = None) -> bool:
     """ Rellenar el siguiente valor en el tablero, y si todos los valores están completos, validar el tablero.
 
     Si el campo en (x, y) ya está lleno, el método generará un AssertionError.
@@ -327,14 +361,15 @@ def fill_out_next(board: Board, cages: Cages, cage_cache: Board,
     :param minmax_cache: Los límites de valor mínimo/máximo a usar para limitar el tamaño de la búsqueda
     :param x: La coordenada x basada en cero para rellenar
     :param y: La coordenada y basada en cero para rellenar
+    :param stats: Las estadísticas donde contar los nodos, retrocesos y validaciones, opcional
     :return: Devuelve un booleano Verdadero si este tablero es válido, y Falso si nunca podría serlo en su
              forma actual
     """
     if board[y][x] != 0:
         raise AssertionError(f"Field ({x}, {y}) is not empty")
 
-    global combinations_tried
-    combinations_tried += 1
+    if stats is not None:
+        stats.nodes += 1
 
     next_x, next_y = find_next_cell(board, x, y)
     taken_values = find_taken_value(board, cages, cage_cache, x, y)
@@ -348,25 +383,269 @@ def fill_out_next(board: Board, cages: Cages, cage_cache: Board,
         if value not in taken_values:
             board[y][x] = value
             if next_x == -1:
+                if stats is not None:
+                    stats.checks += 1
                 success = validate(board, cages)
                 if not success:
                     board[y][x] = 0
+                    if stats is not None:
+                        stats.backtracks += 1
                 return success
-            if fill_out_next(board, cages, cage_cache, minmax_cache, next_x, next_y):
+            if fill_out_next(board, cages, cage_cache, minmax_cache, next_x, next_y, stats):
                 return True
     board[y][x] = 0
+    if stats is not None:
+        stats.backtracks += 1
     return False
 
 
-def solve(board: Board, cages: Cages) -> bool:
+def solve(board: Board, cages: Cages, rules: Iterable[str] = RULES, ordering: str = "row_major",
+          debug: bool = False, engine: str = "recursive", stats: Optional[SolveStats] = None,
+          workers: Optional[int] = 1, backend: str = "bitmask", sat_command: Optional[str] = None,
+          cache: Optional["SolutionCache"] = None, trace: Optional["SearchTrace"] = None,
+          regions: Optional[Regions] = None, max_nodes: Optional[int] = None, deadline: Optional[float] = None,
+          cancel_token: Optional[CancelToken] = None) -> SolveResult:
     """ Resolver Sudoku a partir del tablero y las jaulas
 
+    El método devolverá un resultado (ver `budget.SolveResult`) que se evalúa como verdadero si el tablero fue
+    resuelto, o falso si por alguna razón no fue posible resolverlo. El parámetro del tablero se actualizará
+    para reflejar la solución, cuando la función termine.
+
+    La búsqueda la realiza el motor de máscaras de bits (ver `bitmask.search`), que recorre las celdas en
+    el mismo orden que `fill_out_next` y por lo tanto encuentra la misma solución. Antes de buscar, y después
+    de cada valor probado, se aplican las reglas de propagación indicadas. Con un orden de celdas distinto de
+    `row_major`, la solución solo puede cambiar si el tablero tiene varias.
+
+    La búsqueda comprueba las sumas de las jaulas de forma incremental, así que el tablero resuelto no se
+    vuelve a validar por completo. Con `debug` se llama además a `validate` sobre la solución, y se genera un
+    AssertionError si no es válida.
+
+    Si se indica un objeto `stats` (ver `stats.SolveStats`), la resolución se registra en él: nodos,
+    retrocesos, profundidad, celdas resueltas y candidatos descartados por cada regla y tiempo de cada fase.
+    Sin él no se registra nada, así que varias resoluciones no comparten ningún estado.
+
+    Con más de un proceso en `workers`, el árbol de búsqueda se reparte entre ellos (ver
+    `parallel.search_parallel`) y se usa la primera solución que encuentre cualquiera, que solo coincide con
+    la de la búsqueda normal si el tablero tiene solución única.
+
+    Con el motor `dlx` el tablero se resuelve como un problema de cobertura exacta (ver `dlx.build`), y con el
+    motor `sat` como una fórmula CNF (ver `sat.encode`), con el solucionador interno o con el solucionador
+    externo de `sat_command`. Estos motores ignoran `rules`, `ordering` y `engine`, y no reparten la búsqueda
+    entre procesos.
+
+    Con una caché de soluciones (ver `cache.SolutionCache`), el tablero solo se resuelve si no está ya en
+    ella, y el resultado se guarda para la próxima vez. Si el tablero tiene varias soluciones, la guardada es
+    la que encontró el motor que lo resolvió por primera vez. Si la caché es simétrica, se resuelve la forma
+    canónica del tablero (ver `symmetry.canonicalize`) y su solución se devuelve al tablero original, así que
+    los tableros que solo se diferencian por un giro, un reflejo o el orden de sus bandas y pilas comparten
+    la misma entrada.
+
+    Con una traza (ver `trace.SearchTrace`) se registra la búsqueda nodo a nodo. Solo la admite el motor
+    `bitmask` con un único proceso, y los tableros que se sacan de la caché no se trazan.
+
+    El tablero puede ser de N x N, hasta 16 x 16, con cajas regulares (ver `grid.box_shape`) o con las
+    regiones irregulares de `regions`. Solo el tablero de 9 x 9 con nonetos se canoniza en una caché
+    simétrica; los demás se guardan tal cual.
+
+    La búsqueda se puede limitar con un número máximo de nodos (`max_nodes`), un instante límite (`deadline`,
+    en la escala de `time.monotonic`) y una señal de cancelación (`cancel_token`, ver `budget.CancelToken`).
+    Los límites se comprueban cada pocos nodos (ver `budget.CHECK_INTERVAL`), no en cada uno. Si se agotan, el
+    estado del resultado es `BUDGET_EXHAUSTED` o `CANCELLED`, el tablero no cambia, la búsqueda interrumpida
+    no se guarda en la caché y `stats` tiene lo recorrido hasta entonces. Solo los admite el motor `bitmask`
+    con un único proceso.
+
+    :param board: El tablero inicial a utilizar
+    :param cages: Las jaulas de ese tablero
+    :param rules: Las reglas de propagación a aplicar, por defecto todas (ver `propagation.RULES`)
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar (ver `ordering.ORDERINGS`)
+    :param debug: Si se valida el tablero completo después de resolverlo
+    :param engine: El motor de búsqueda, recursivo o iterativo (ver `bitmask.ENGINES`)
+    :param stats: Las estadísticas donde registrar la resolución, opcional
+    :param workers: El número de procesos entre los que repartir la búsqueda, 1 por defecto, o None para usar
+                    uno por CPU
+    :param backend: El motor de resolución, uno de `BACKENDS`
+    :param sat_command: Con el motor `sat`, el comando de un solucionador SAT externo (ver
+                        `sat.solve_external`), o None para usar el interno
+    :param cache: La caché de soluciones a consultar y actualizar, opcional
+    :param trace: La traza donde registrar la búsqueda en detalle, opcional
+    :param regions: Las coordenadas (x, y) de las celdas de cada región, o None para usar las cajas regulares
+    :param max_nodes: El número máximo de nodos a visitar, sin límite por defecto
+    :param deadline: El instante en que abandonar la búsqueda, según `time.monotonic`, sin límite por defecto
+    :param cancel_token: La señal para cancelar la resolución desde otro hilo, opcional
+    :return: Devuelve el resultado, con su estado, los nodos visitados y la duración
+    """
+    check_backend(backend, workers)
+    if trace is not None and (backend != "bitmask" or workers != 1):
+        raise ValueError("La traza solo se puede usar con el motor bitmask y un único proceso")
+    budget = make_budget(max_nodes, deadline, cancel_token)
+    if budget is not None and (backend != "bitmask" or workers != 1):
+        raise ValueError("Los límites de búsqueda solo se pueden usar con el motor bitmask y un único proceso")
+    start = time.perf_counter()
+    nodes = 0
+    transform = None
+    with stats.phase("compile") if stats is not None else nullcontext():
+        if cache is not None and cache.symmetric and len(board) == 9 and regions is None:
+            from .symmetry import canonicalize
+            canonical_board, canonical_cages, transform = canonicalize(board, cages)
+            puzzle = Puzzle(canonical_board, canonical_cages)
+        else:
+            puzzle = Puzzle(board, cages, regions)
+        key = None
+        if cache is not None:
+            from .cache import puzzle_key
+            key = puzzle_key(puzzle)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        success = bool(cached)
+        if success:
+            puzzle.board = array('b', cached)
+    else:
+        if backend == "dlx":
+            from . import dlx
+            success, nodes, _ = dlx.search(puzzle, stats)
+        elif backend == "sat":
+            from . import sat
+            success, nodes, _ = sat.search(puzzle, stats, sat_command)
+        elif workers == 1:
+            try:
+                success, nodes, _ = search(puzzle, rules, stats, ordering, engine, trace, budget)
+            except SearchInterrupted as interrupted:
+                return SolveResult(interrupted.status, interrupted.nodes, time.perf_counter() - start, stats)
+        else:
+            from .parallel import search_parallel
+            solution, _ = search_parallel(puzzle, rules, stats, ordering, workers)
+            success = solution is not None
+            if success:
+                puzzle.board = solution
+            nodes = stats.nodes if stats is not None else 0
+        if cache is not None:
+            cache.put(key, puzzle.board if success else None)
+    if success and transform is not None:
+        board[:] = transform.restore(puzzle.board)
+    elif success:
+        for row, values in zip(board, puzzle.to_board()):
+            row[:] = values
+    if success and debug:
+        with stats.phase("validate") if stats is not None else nullcontext():
+            valid = validate(board, cages, regions)
+        if not valid:
+            raise AssertionError("La solución encontrada no es válida")
+    return SolveResult(SOLVED if success else UNSOLVABLE, nodes, time.perf_counter() - start, stats)
+
+
+def check_backend(backend: str, workers: Optional[int] = 1) -> None:
+    """ Comprueba que el motor de resolución existe y admite el número de procesos indicado.
+
+    Si no es así, se generará un ValueError.
+
+    :param backend: El motor de resolución, uno de `BACKENDS`
+    :param workers: El número de procesos entre los que repartir la búsqueda
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Motor de resolución desconocido: {backend}")
+    if backend != "bitmask" and workers != 1:
+        raise ValueError(f"El motor {backend} no puede repartir la búsqueda entre procesos")
+
+
+def find_solutions(board: Board, cages: Cages, rules: Iterable[str] = RULES, ordering: str = "row_major",
+                   stats: Optional[SolveStats] = None, backend: str = "bitmask",
+                   regions: Optional[Regions] = None) -> Iterator[Board]:
+    """ Recorre las soluciones del tablero una a una, sin buscar la siguiente hasta que se pide.
+
+    Usa la misma búsqueda que `solve`, con las mismas reglas de propagación y tablas de combinaciones, pero en
+    lugar de detenerse en la primera solución continúa recorriendo el árbol. El tablero no se modifica.
+
+    :param board: El tablero inicial a utilizar
+    :param cages: Las jaulas de ese tablero
+    :param rules: Las reglas de propagación a aplicar, por defecto todas (ver `propagation.RULES`)
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar (ver `ordering.ORDERINGS`)
+    :param stats: Las estadísticas donde registrar la búsqueda, opcional
+    :param backend: El motor de resolución, uno de `BACKENDS`
+    :param regions: Las regiones del tablero, si son irregulares
+    :return: Devuelve un iterador con cada solución como lista de filas
+    """
+    check_backend(backend)
+    with stats.phase("compile") if stats is not None else nullcontext():
+        puzzle = Puzzle(board, cages, regions)
+    size = puzzle.geometry.size
+    if backend == "dlx":
+        from . import dlx
+        solutions = dlx.iter_solutions(puzzle, stats)
+    elif backend == "sat":
+        from . import sat
+        solutions = sat.iter_solutions(puzzle, stats)
+    else:
+        solutions = iter_solutions(puzzle, rules, stats, ordering)
+    for values in solutions:
+        yield [list(values[y * size:y * size + size]) for y in range(size)]
+
+
+def count_solutions(board: Board, cages: Cages, limit: Optional[int] = 2, rules: Iterable[str] = RULES,
+                    ordering: str = "row_major", stats: Optional[SolveStats] = None,
+                    workers: Optional[int] = 1, backend: str = "bitmask",
+                    cancelled: Optional[Callable[[], bool]] = None, regions: Optional[Regions] = None) -> int:
+    """ Cuenta las soluciones del tablero, deteniéndose al llegar a `limit`.
+
+    Con el límite por defecto de 2 sirve para comprobar si un tablero tiene solución única: el resultado es 0
+    si no tiene solución, 1 si es única y 2 si tiene varias, sin recorrer el resto del árbol. Con más de un
+    proceso en `workers`, cada uno cuenta las soluciones de una parte del árbol y se suman.
+
+    Con `cancelled` la búsqueda se abandona en cuanto devuelva verdadero (ver `bitmask.iter_solutions`), y el
+    resultado son las soluciones encontradas hasta entonces. Solo lo admite el motor `bitmask` con un proceso.
+
+    :param board: El tablero inicial a utilizar, no se modifica
+    :param cages: Las jaulas de ese tablero
+    :param limit: El número de soluciones en el que detener la búsqueda, o None para contarlas todas
+    :param rules: Las reglas de propagación a aplicar, por defecto todas (ver `propagation.RULES`)
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar (ver `ordering.ORDERINGS`)
+    :param stats: Las estadísticas donde registrar la búsqueda, opcional
+    :param workers: El número de procesos entre los que repartir la búsqueda, 1 por defecto, o None para usar
+                    uno por CPU
+    :param backend: El motor de resolución, uno de `BACKENDS`
+    :param cancelled: Una función que devuelve verdadero si se debe abandonar la búsqueda, opcional
+    :param regions: Las regiones del tablero, si son irregulares
+    :return: Devuelve el número de soluciones encontradas, como mucho `limit`
+    """
+    check_backend(backend, workers)
+    if cancelled is not None and (backend != "bitmask" or workers != 1):
+        raise ValueError("La cancelación solo se puede usar con el motor bitmask y un único proceso")
+    count = 0
+    if limit is not None and limit <= 0:
+        return count
+    with stats.phase("compile") if stats is not None else nullcontext():
+        puzzle = Puzzle(board, cages, regions)
+    if workers != 1:
+        from .parallel import search_parallel
+        return search_parallel(puzzle, rules, stats, ordering, workers, limit)[1]
+    if backend == "dlx":
+        from . import dlx
+        solutions = dlx.iter_solutions(puzzle, stats)
+    elif backend == "sat":
+        from . import sat
+        solutions = sat.iter_solutions(puzzle, stats)
+    else:
+        solutions = iter_solutions(puzzle, rules, stats, ordering, cancelled)
+    for _ in solutions:
+        count += 1
+        if count == limit:
+            solutions.close()
+            break
+    return count
+
+
+def solve_classic(board: Board, cages: Cages, stats: Optional[SolveStats] = None) -> bool:
+    """ Resolver Sudoku con el motor recursivo original basado en listas
+
+    Se conserva como referencia para comparar el rendimiento con el motor de máscaras de bits usado por
+    `solve`. Ambos motores devuelven la misma solución.
+
     El método devolverá un booleano verdadero si el tablero fue resuelto, o falso si por alguna razón
     no fue posible resolverlo. El parámetro del tablero se actualizará para reflejar la solución, cuando
     la función termine.
 
     :param board: El tablero inicial a utilizar
     :param cages: Las jaulas de ese tablero
+    :param stats: Las estadísticas donde contar los nodos, retrocesos y validaciones, opcional
     :return: Devuelve un booleano verdadero si el Sudoku pudo ser resuelto
     """
 
@@ -397,15 +676,33 @@ def solve(board: Board, cages: Cages) -> bool:
     if board[next_x][next_y] != 0:
         next_x, next_y = find_next_cell(board, next_x, next_y)
 
-    return fill_out_next(board, cages, cage_cache, minmax_cache, next_x, next_y)
+    return fill_out_next(board, cages, cage_cache, minmax_cache, next_x, next_y, stats)
 
 
 def load_from_file(filename: str) -> tuple[Board, Cages]:
     """ Carga los datos del tablero y las jaulas desde un archivo JSON.
 
+    Las regiones irregulares del archivo, si las tiene, no se cargan: para esos tableros hay que usar
+    `load_puzzle`.
+
     :param filename: El nombre del archivo del cual cargar los datos del tablero y las jaulas
     :return: Devuelve una tupla con el tablero y las jaulas obtenidas del archivo
     """
+    board, cages, _ = load_puzzle(filename)
+    return board, cages
+
+
+def load_puzzle(filename: str) -> tuple[Board, Cages, Optional[Regions]]:
+    """ Carga los datos del tablero, las jaulas y las regiones desde un archivo JSON.
+
+    Además de las claves "board" y "cages" de `load_from_file`, el archivo puede tener la clave "regions" con
+    una lista de regiones, cada una con las coordenadas [x, y] de sus celdas, para un tablero irregular
+    (jigsaw). El tamaño del tablero es su número de filas.
+
+    :param filename: El nombre del archivo del cual cargar los datos
+    :return: Devuelve una tupla con el tablero, las jaulas y las regiones, o None si el archivo no tiene
+             regiones
+    """
     with open(filename) as board_file:
         data = json.load(board_file)
 
@@ -416,39 +713,93 @@ def load_from_file(filename: str) -> tuple[Board, Cages]:
             for x, y in fields:
                 tuples.append((x, y))
             cages.append((total, tuples))
-        return data["board"], cages
-
-
-def run_solver(filenames: list[str], show_stats: bool = False, benchmark: bool = False,
-               show_initial_board: bool = False) -> None:
+        regions = None
+        if "regions" in data:
+            regions = [[(x, y) for x, y in fields] for fields in data["regions"]]
+        return data["board"], cages, regions
+
+
+def run_solver(filenames: list[str], show_stats: Optional[str] = None, benchmark: bool = False,
+               show_initial_board: bool = False, rules: Iterable[str] = RULES,
+               ordering: str = "row_major", debug: bool = False, engine: str = "recursive",
+               count: bool = False, limit: Optional[int] = 2, workers: Optional[int] = 1,
+               backend: str = "bitmask", sat_command: Optional[str] = None,
+               cache: Optional["SolutionCache"] = None, trace: Optional["SearchTrace"] = None,
+               max_nodes: Optional[int] = None, time_limit: Optional[float] = None) -> None:
     """Ejecuta el solucionador para una lista de archivos.
     :param filenames: La lista de nombres de archivos para cargar y resolver
-    :param show_stats: Si se muestran estadísticas como el número de validaciones y combinaciones únicas
+    :param show_stats: El formato en que mostrar las estadísticas de cada tablero, "text" o "json", o None para
+                       no mostrarlas
     :param benchmark: Mostrará el tiempo que toma para una iteración
     :param show_initial_board: Si se muestra el diseño del tablero antes de resolverlo
+    :param rules: Las reglas de propagación a aplicar
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param debug: Si se valida el tablero completo después de resolverlo
+    :param engine: El motor de búsqueda a usar
+    :param count: Si se cuentan las soluciones en lugar de mostrar la primera
+    :param limit: El número de soluciones en el que dejar de contar, o None para contarlas todas
+    :param workers: El número de procesos entre los que repartir la búsqueda de cada tablero
+    :param backend: El motor de resolución a usar
+    :param sat_command: El comando de un solucionador SAT externo para el motor `sat`
+    :param cache: La caché de soluciones a usar al resolver, opcional. Al terminar se muestran sus aciertos y
+                  fallos
+    :param trace: La traza donde registrar las búsquedas de todos los tableros, opcional. Al terminar se
+                  muestra su resumen
+    :param max_nodes: El número máximo de nodos a visitar en cada tablero, sin límite por defecto
+    :param time_limit: El tiempo máximo en segundos para resolver cada tablero, sin límite por defecto
     """
+    rules = tuple(rules)
     for filename in filenames:
-        global validations_performed, combinations_tried
-        validations_performed, combinations_tried = 0, 0
-        board, cages = load_from_file(filename=filename)
+        stats = SolveStats()
+        board, cages, regions = load_puzzle(filename)
         print(f"Usando tablero y jaulas de {filename}")
         if show_initial_board:
-            print_board(board, cages)
+            print_board(board, cages, regions)
 
-        if benchmark:
+        if count:
+            print("Contando soluciones...")
+            solutions = count_solutions(board, cages, limit, rules, ordering, stats, workers, backend,
+                                        regions=regions)
+            if solutions == 0:
+                print("No se pudo encontrar solución")
+            elif solutions == 1 and (limit is None or limit > 1):
+                print("La solución es única")
+            limit_text = f" (límite {limit})" if limit is not None else ""
+            print(f"Soluciones encontradas: {solutions}{limit_text}")
+        elif benchmark:
             print("Haciendo benchmark...")
-            benchmark_result = timeit.timeit(lambda b=board, c=cages: solve(b, c), number=1)
-            print_board(board, cages)
+            import timeit
+            deadline = time.monotonic() + time_limit if time_limit is not None else None
+            benchmark_result = timeit.timeit(lambda b=board, c=cages: solve(b, c, rules, ordering, debug, engine,
+                                                                            stats, workers, backend, sat_command,
+                                                                            cache, trace, regions, max_nodes,
+                                                                            deadline),
+                                             number=1)
+            print_board(board, cages, regions)
             print(f"Benchmark completado para {filename}: duración: {benchmark_result} segundos")
         else:
             print("Calculando...")
-            success = solve(board, cages)
-            if success:
+            deadline = time.monotonic() + time_limit if time_limit is not None else None
+            result = solve(board, cages, rules, ordering, debug, engine, stats, workers, backend,
+                           sat_command, cache, trace, regions, max_nodes, deadline)
+            if result:
                 print("ÉXITO")
+            elif result.status == BUDGET_EXHAUSTED:
+                print(f"Límite de búsqueda agotado después de {result.nodes} nodos ({result.duration:.4f} s)")
             else:
                 print("No se pudo encontrar solución")
-            print_board(board, cages)
+            print_board(board, cages, regions)
+
+        if show_stats == "json":
+            print(stats.to_json())
+        elif show_stats:
+            if backend == "bitmask":
+                print(f"Orden de celdas: {ordering}")
+            else:
+                print(f"Motor de resolución: {backend}")
+            print(stats.to_text())
 
-        if show_stats:
-            print(f"Validaciones realizadas: {validations_performed}")
-            print(f"Combinaciones únicas probadas: {combinations_tried}")
+    if cache is not None:
+        print(cache.to_text())
+    if trace is not None:
+        print(trace.to_text())
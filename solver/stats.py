@@ -0,0 +1,121 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from .propagation import RULES
+
+# Fases de `solve` cuyo tiempo se mide por separado
+PHASES = ("compile", "prepare", "search", "validate")
+
+
+class SolveStats:
+    """ Estadísticas de una resolución, que sustituyen a los contadores globales del módulo `solver`.
+
+    Se crea un objeto por tablero y se pasa a `solve` (o a `bitmask.search`), que lo rellena. Sin objeto de
+    estadísticas la búsqueda no registra nada más que los contadores que ya necesita, y ninguna resolución
+    comparte estado con otra, así que se pueden resolver varios tableros a la vez en distintos hilos o procesos.
+    """
+
+    __slots__ = ("nodes", "checks", "backtracks", "depth_nodes", "resolved", "eliminated", "phases")
+
+    def __init__(self) -> None:
+        """ Crea unas estadísticas vacías. """
+        self.nodes = 0
+        self.checks = 0
+        self.backtracks = 0
+        self.depth_nodes: list[int] = []
+        self.resolved = {rule: 0 for rule in RULES}
+        self.eliminated = {rule: 0 for rule in RULES}
+        self.phases = {phase: 0.0 for phase in PHASES}
+
+    @property
+    def max_depth(self) -> int:
+        """ La profundidad máxima alcanzada por la búsqueda, contando desde 1. """
+        depth = len(self.depth_nodes)
+        while depth and not self.depth_nodes[depth - 1]:
+            depth -= 1
+        return depth
+
+    def record_depths(self, depth_nodes: list[int], offset: int = 0) -> None:
+        """ Suma un histograma de nodos por profundidad al de estas estadísticas.
+
+        :param depth_nodes: El número de nodos visitados en cada profundidad, empezando por la profundidad 1
+        :param offset: La profundidad a la que empieza el histograma, para búsquedas que parten de un nodo
+                       interior del árbol
+        """
+        missing = len(depth_nodes) + offset - len(self.depth_nodes)
+        if missing > 0:
+            self.depth_nodes.extend([0] * missing)
+        for depth, nodes in enumerate(depth_nodes, offset):
+            self.depth_nodes[depth] += nodes
+
+    def add(self, other: "SolveStats", offset: int = 0) -> None:
+        """ Suma los contadores de otras estadísticas a estas, sin sumar los tiempos de las fases.
+
+        Sirve para juntar las estadísticas de búsquedas hechas en otros procesos, cuyos tiempos se solapan.
+
+        :param other: Las estadísticas a sumar
+        :param offset: La profundidad a la que empezó la búsqueda de `other`
+        """
+        self.nodes += other.nodes
+        self.checks += other.checks
+        self.backtracks += other.backtracks
+        self.record_depths(other.depth_nodes, offset)
+        for rule in RULES:
+            self.resolved[rule] += other.resolved[rule]
+            self.eliminated[rule] += other.eliminated[rule]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """ Mide el tiempo de un bloque `with` y lo suma a la fase indicada.
+
+        :param name: El nombre de la fase, uno de `PHASES`
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def as_dict(self) -> dict:
+        """ Convierte las estadísticas en un diccionario con tipos básicos.
+
+        :return: Devuelve el diccionario, apto para `json.dumps`
+        """
+        return {
+            "nodes": self.nodes,
+            "checks": self.checks,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "depth_nodes": self.depth_nodes[:self.max_depth],
+            "resolved": dict(self.resolved),
+            "eliminated": dict(self.eliminated),
+            "phases": dict(self.phases),
+        }
+
+    def to_json(self) -> str:
+        """ Convierte las estadísticas en una cadena JSON.
+
+        :return: Devuelve la cadena JSON de `as_dict`
+        """
+        return json.dumps(self.as_dict())
+
+    def to_text(self) -> str:
+        """ Convierte las estadísticas en texto para mostrarlas en la consola.
+
+        :return: Devuelve el texto, con una estadística por línea
+        """
+        lines = [f"Validaciones realizadas (comprobaciones incrementales de jaulas): {self.checks}",
+                 f"Combinaciones únicas probadas: {self.nodes}",
+                 f"Retrocesos: {self.backtracks}",
+                 f"Profundidad máxima: {self.max_depth}"]
+        for rule in RULES:
+            lines.append(f"Celdas resueltas por {rule}: {self.resolved[rule]}, "
+                         f"candidatos descartados: {self.eliminated[rule]}")
+        for phase, duration in self.phases.items():
+            lines.append(f"Tiempo de {phase}: {duration:.6f} s")
+        if self.max_depth:
+            lines.append("Nodos por profundidad: " + ", ".join(
+                f"{depth}: {nodes}" for depth, nodes in enumerate(self.depth_nodes[:self.max_depth], 1)))
+        return "\n".join(lines)
@@ -0,0 +1,186 @@
+import json
+import sys
+from functools import partial
+from math import isqrt
+from typing import Iterable, Iterator, Optional, TextIO
+
+from .batch import SOLVED, BatchResult, map_jobs, solve_source
+from .common import Board, Cages, Regions
+from .propagation import RULES
+
+# Formatos de salida del modo de flujo: la solución como cadena de dígitos, o una línea JSON por tablero con
+# su estado y sus estadísticas
+OUTPUTS = ("string", "jsonl")
+
+# Tamaño máximo de un tablero en forma de cadena, con un carácter por celda: con más de 9 valores hay valores
+# de dos dígitos y la cadena sería ambigua, así que esos tableros se escriben como listas de filas
+STRING_MAX_SIZE = 9
+
+
+def parse_board(board) -> Board:
+    """ Convierte el tablero de una línea JSONL en una lista de filas.
+
+    :param board: El tablero como lista de filas, o como cadena de N x N caracteres (81 en el tablero de
+                  9 x 9, N hasta `STRING_MAX_SIZE`) donde un 0 o un punto indican una celda vacía
+    :return: Devuelve el tablero como lista de filas
+    """
+    if not isinstance(board, str):
+        return board
+    size = isqrt(len(board))
+    if size * size != len(board) or not 1 <= size <= STRING_MAX_SIZE:
+        raise ValueError(f"Un tablero en forma de cadena debe tener N x N celdas con N hasta {STRING_MAX_SIZE}, "
+                         f"no {len(board)}")
+    values = [0 if char == "." else int(char) for char in board]
+    return [values[row * size:row * size + size] for row in range(size)]
+
+
+def parse_puzzle(line: str) -> tuple[Board, Cages, Optional[Regions]]:
+    """ Carga el tablero, las jaulas y las regiones de una línea JSONL.
+
+    Cada línea tiene el mismo formato que los archivos de `load_puzzle`, con las claves "board", "cages" y,
+    opcionalmente, "regions", pero el tablero también puede ser una cadena (ver `parse_board`). Las
+    coordenadas de las jaulas y las regiones se dejan como listas, ya que `Puzzle` las acepta igual que las
+    tuplas.
+
+    :param line: La línea a cargar
+    :return: Devuelve una tupla con el tablero, las jaulas y las regiones, o None si la línea no tiene
+             regiones
+    """
+    data = json.loads(line)
+    return parse_board(data["board"]), data["cages"], data.get("regions")
+
+
+def parse_line(line: str) -> tuple[Board, Cages]:
+    """ Carga el tablero y las jaulas de una línea JSONL.
+
+    Las regiones irregulares de la línea, si las tiene, no se cargan: para esos tableros hay que usar
+    `parse_puzzle`.
+
+    :param line: La línea a cargar
+    :return: Devuelve una tupla con el tablero y las jaulas
+    """
+    board, cages, _ = parse_puzzle(line)
+    return board, cages
+
+
+def board_string(board: Board) -> str:
+    """ Convierte un tablero en una cadena compacta de dígitos, fila por fila.
+
+    Si el tablero tiene más de `STRING_MAX_SIZE` filas se generará un ValueError, ya que sus valores de dos
+    dígitos harían ambigua la cadena.
+
+    :param board: El tablero a convertir
+    :return: Devuelve la cadena, con un 0 por cada celda vacía
+    """
+    if len(board) > STRING_MAX_SIZE:
+        raise ValueError(f"Un tablero de {len(board)} x {len(board)} no se puede escribir como cadena, solo "
+                         f"hasta {STRING_MAX_SIZE} x {STRING_MAX_SIZE}")
+    return "".join(str(value) for row in board for value in row)
+
+
+def read_lines(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """ Recorre las líneas de una entrada JSONL sin cargarla entera en memoria, saltando las líneas vacías.
+
+    :param lines: Las líneas de la entrada, por ejemplo un archivo abierto
+    :return: Devuelve un iterador de tuplas con el número de línea, empezando por 1, y la línea
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line:
+            yield number, line
+
+
+def solve_stream(lines: Iterable[str], jobs: Optional[int] = 1, ordered: bool = True,
+                 timeout: Optional[float] = None, rules: Iterable[str] = RULES, ordering: str = "row_major",
+                 engine: str = "recursive", debug: bool = False) -> Iterator[BatchResult]:
+    """ Resuelve los tableros de una entrada JSONL a medida que se leen.
+
+    Cada línea se carga en el proceso que la resuelve, y los errores de una línea se devuelven en su resultado
+    sin detener el flujo. La posición de cada resultado es el número de línea.
+
+    :param lines: Las líneas de la entrada, con un tablero por línea
+    :param jobs: El número de procesos, por defecto se resuelve en el proceso actual (ver `batch.map_jobs`)
+    :param ordered: Si los resultados se devuelven en el orden de entrada, o si no en el orden en que terminan
+    :param timeout: El tiempo máximo en segundos para cada tablero, sin límite por defecto
+    :param rules: Las reglas de propagación a aplicar
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param engine: El motor de búsqueda a usar
+    :param debug: Si se valida el tablero completo después de resolverlo
+    :return: Devuelve un iterador con el resultado de cada tablero
+    """
+    work = partial(solve_source, rules=tuple(rules), ordering=ordering, engine=engine, timeout=timeout,
+                   debug=debug, load=parse_puzzle)
+    return map_jobs(work, read_lines(lines), jobs, ordered)
+
+
+def format_result(result: BatchResult, output: str = "string") -> str:
+    """ Convierte el resultado de un tablero en una línea de salida.
+
+    En la salida `jsonl` la solución de un tablero de más de `STRING_MAX_SIZE` filas se escribe como lista de
+    filas en lugar de como cadena. La salida `string` no admite esos tableros y genera un ValueError.
+
+    :param result: El resultado a convertir
+    :param output: El formato de salida, uno de `OUTPUTS`
+    :return: Devuelve la línea, sin salto de línea final
+    """
+    solution = None
+    if result.status == SOLVED:
+        solution = result.board if output == "jsonl" and len(result.board) > STRING_MAX_SIZE \
+            else board_string(result.board)
+    if output == "string":
+        return solution or ""
+    record = {"line": result.position, "status": result.status, "solution": solution,
+              "duration": result.duration, "stats": result.stats.as_dict()}
+    if result.error:
+        record["error"] = result.error
+    return json.dumps(record)
+
+
+def run_stream(filenames: list[str], output: str = "string", jobs: Optional[int] = 1, ordered: bool = True,
+               timeout: Optional[float] = None, rules: Iterable[str] = RULES, ordering: str = "row_major",
+               engine: str = "recursive", debug: bool = False, out: Optional[TextIO] = None,
+               err: Optional[TextIO] = None) -> int:
+    """ Resuelve archivos JSONL, con un tablero por línea, y escribe una línea de salida por cada tablero.
+
+    Con la salida `string` solo se escriben las soluciones, y los tableros sin solución, con errores o de más
+    de `STRING_MAX_SIZE` filas se indican en `err` con su archivo y número de línea. Con la salida `jsonl` cada
+    línea incluye el estado, el error si lo hay y las estadísticas del tablero.
+
+    :param filenames: Los archivos JSONL a resolver, "-" para leer de la entrada estándar
+    :param output: El formato de salida, uno de `OUTPUTS`
+    :param jobs: El número de procesos, por defecto se resuelve en el proceso actual
+    :param ordered: Si los resultados se escriben en el orden de entrada
+    :param timeout: El tiempo máximo en segundos para cada tablero
+    :param rules: Las reglas de propagación a aplicar
+    :param ordering: La estrategia para elegir la siguiente celda a rellenar
+    :param engine: El motor de búsqueda a usar
+    :param debug: Si se valida el tablero completo después de resolverlo
+    :param out: Donde escribir las líneas de salida, por defecto la salida estándar
+    :param err: Donde indicar los tableros fallidos con la salida `string`, por defecto la salida de errores
+    :return: Devuelve el número de tableros que no se pudieron resolver
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"Formato de salida desconocido: {output}")
+
+    out = out or sys.stdout
+    err = err or sys.stderr
+    failures = 0
+    for filename in filenames:
+        lines = sys.stdin if filename == "-" else open(filename)
+        try:
+            for result in solve_stream(lines, jobs, ordered, timeout, rules, ordering, engine, debug):
+                if output == "string" and result.status == SOLVED and len(result.board) > STRING_MAX_SIZE:
+                    failures += 1
+                    print(f"{filename}:{result.position}: la salida string solo admite tableros de hasta "
+                          f"{STRING_MAX_SIZE} x {STRING_MAX_SIZE}, use --output jsonl", file=err)
+                    continue
+                if result.status != SOLVED:
+                    failures += 1
+                    if output == "string":
+                        print(f"{filename}:{result.position}: {result.status} {result.error}".rstrip(), file=err)
+                        continue
+                print(format_result(result, output), file=out)
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+    return failures
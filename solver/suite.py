@@ -0,0 +1,306 @@
+import argparse
+import copy
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Iterable, NamedTuple, Optional, TextIO
+
+from .common import Board, Cages, Regions
+from .propagation import RULES
+from .solver import BACKENDS, load_puzzle, solve
+from .stats import SolveStats
+from .stream import parse_puzzle, read_lines
+
+# Directorio raíz del repositorio, desde el que se buscan los archivos del corpus
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Niveles del corpus de benchmarks, de menor a mayor dificultad, con sus archivos JSON o JSONL. Los tableros
+# generados tienen solución única; el de `test_solve.py` no tiene solución. Los últimos niveles tienen un
+# tablero de cada tamaño y uno con regiones irregulares; los de 12 x 12 y 16 x 16 pueden tener varias
+# soluciones.
+CORPUS = (
+    ("reference", ("Killer.json",)),
+    ("unsolvable", ("puzzles/test_solve.json",)),
+    ("easy", ("puzzles/corpus/easy.jsonl",)),
+    ("medium", ("puzzles/corpus/medium.jsonl",)),
+    ("expert", ("puzzles/corpus/expert.jsonl",)),
+    ("pathological", ("puzzles/corpus/pathological.jsonl",)),
+    ("6x6", ("puzzles/sizes/killer_6x6.json",)),
+    ("jigsaw", ("puzzles/sizes/jigsaw_9x9.json",)),
+    ("12x12", ("puzzles/sizes/killer_12x12.json",)),
+    ("16x16", ("puzzles/sizes/killer_16x16.json",)),
+)
+TIERS = tuple(tier for tier, _ in CORPUS)
+
+# Ejecuciones de calentamiento y medidas de cada tablero por defecto
+DEFAULT_WARMUP = 1
+DEFAULT_REPEAT = 10
+
+# Aumento relativo de la mediana a partir del cual una comparación se marca como regresión
+DEFAULT_THRESHOLD = 0.10
+
+# La orden cuyo arranque en frío mide `measure_startup`: resolver el tablero de referencia en un proceso nuevo
+STARTUP_COMMAND = ("solve.py", "Killer.json")
+
+# Ejecuciones medidas del arranque por defecto
+STARTUP_REPEAT = 20
+
+# Objetivo de la mediana del arranque en frío hasta la solución, en segundos. El intérprete vacío ya tarda
+# unos 15-20 ms de esos
+STARTUP_TARGET = 0.075
+
+
+class Case(NamedTuple):
+    """ Un tablero del corpus de benchmarks. """
+    tier: str
+    name: str
+    board: Board
+    cages: Cages
+    regions: Optional[Regions] = None
+
+
+def load_corpus(tiers: Iterable[str] = TIERS) -> list[Case]:
+    """ Carga los tableros de los niveles indicados del corpus.
+
+    :param tiers: Los niveles a cargar, por defecto todos
+    :return: Devuelve la lista de tableros, en el orden de `CORPUS`. Los tableros de un archivo JSONL se
+             nombran con el archivo y su número de línea
+    """
+    tiers = set(tiers)
+    cases = []
+    for tier, filenames in CORPUS:
+        if tier not in tiers:
+            continue
+        for filename in filenames:
+            path = os.path.join(ROOT, filename)
+            if not filename.endswith(".jsonl"):
+                cases.append(Case(tier, filename, *load_puzzle(path)))
+                continue
+            with open(path) as lines:
+                for number, line in read_lines(lines):
+                    cases.append(Case(tier, f"{filename}:{number}", *parse_puzzle(line)))
+    return cases
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """ Calcula un percentil por el método del rango más cercano.
+
+    :param values: Los valores, en cualquier orden
+    :param fraction: El percentil como fracción, por ejemplo 0.95
+    :return: Devuelve el menor valor que es mayor o igual que esa fracción de los valores
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * fraction))
+    return ordered[rank - 1]
+
+
+def measure(case: Case, repeat: int = DEFAULT_REPEAT, warmup: int = DEFAULT_WARMUP,
+            rules: Iterable[str] = RULES, backend: str = "bitmask") -> dict:
+    """ Mide la resolución de un tablero con `solve`, sobre una copia nueva del tablero en cada ejecución.
+
+    Después de las ejecuciones de calentamiento se toman `repeat` medidas del tiempo total de `solve`,
+    incluida la compilación del tablero. La memoria máxima se mide en una ejecución aparte con
+    `tracemalloc`, que ralentiza la resolución y no debe afectar a los tiempos.
+
+    :param case: El tablero a medir
+    :param repeat: El número de medidas
+    :param warmup: El número de ejecuciones previas que no se miden
+    :param rules: Las reglas de propagación a aplicar
+    :param backend: El motor de resolución
+    :return: Devuelve un diccionario con el nivel, el nombre, el estado, la mediana y el percentil 95 en
+             segundos, los nodos, los nodos por segundo y la memoria máxima en bytes
+    """
+    if repeat < 1:
+        raise ValueError(f"Hace falta al menos una medida, no {repeat}")
+    rules = tuple(rules)
+    for _ in range(warmup):
+        solve(copy.deepcopy(case.board), case.cages, rules, backend=backend, regions=case.regions)
+
+    durations = []
+    for _ in range(repeat):
+        board = copy.deepcopy(case.board)
+        stats = SolveStats()
+        start = time.perf_counter()
+        result = solve(board, case.cages, rules, stats=stats, backend=backend, regions=case.regions)
+        durations.append(time.perf_counter() - start)
+
+    board = copy.deepcopy(case.board)
+    tracemalloc.start()
+    try:
+        solve(board, case.cages, rules, backend=backend, regions=case.regions)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = percentile(durations, 0.5)
+    return {
+        "tier": case.tier,
+        "name": case.name,
+        "status": result.status,
+        "median": median,
+        "p95": percentile(durations, 0.95),
+        "nodes": stats.nodes,
+        "nodes_per_second": stats.nodes / median if median > 0 else 0.0,
+        "peak_memory": peak,
+    }
+
+
+def measure_startup(repeat: int = STARTUP_REPEAT, warmup: int = DEFAULT_WARMUP) -> dict:
+    """ Mide el arranque en frío de `solve.py` hasta la solución del tablero de referencia.
+
+    Cada medida lanza un proceso nuevo, así que incluye el arranque del intérprete, las importaciones y el
+    cálculo de las tablas además de la resolución. Para separar lo que cuesta el propio intérprete también se
+    mide un proceso que no hace nada. El calentamiento deja compilados los módulos, como en cualquier arranque
+    después del primero.
+
+    :param repeat: El número de medidas de cada orden
+    :param warmup: El número de ejecuciones previas que no se miden
+    :return: Devuelve un diccionario con el mínimo y la mediana en segundos del arranque hasta la solución y
+             del intérprete vacío, y el objetivo
+    """
+    if repeat < 1:
+        raise ValueError(f"Hace falta al menos una medida, no {repeat}")
+    def run(command: list[str]) -> list[float]:
+        durations = []
+        for attempt in range(warmup + repeat):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+            if attempt >= warmup:
+                durations.append(time.perf_counter() - start)
+        return durations
+
+    solution = run([sys.executable, *STARTUP_COMMAND])
+    interpreter = run([sys.executable, "-c", "pass"])
+    return {
+        "min": min(solution),
+        "median": percentile(solution, 0.5),
+        "interpreter_min": min(interpreter),
+        "interpreter_median": percentile(interpreter, 0.5),
+        "target": STARTUP_TARGET,
+    }
+
+
+def run_suite(tiers: Iterable[str] = TIERS, repeat: int = DEFAULT_REPEAT, warmup: int = DEFAULT_WARMUP,
+              rules: Iterable[str] = RULES, backend: str = "bitmask", out: Optional[TextIO] = None) -> dict:
+    """ Mide todos los tableros de los niveles indicados y muestra una línea por tablero.
+
+    :param tiers: Los niveles del corpus a medir
+    :param repeat: El número de medidas de cada tablero
+    :param warmup: El número de ejecuciones de calentamiento de cada tablero
+    :param rules: Las reglas de propagación a aplicar
+    :param backend: El motor de resolución
+    :param out: Donde mostrar el progreso, por defecto la salida estándar
+    :return: Devuelve los resultados con la configuración y el entorno de la medida, aptos para `json.dump`
+    """
+    out = out or sys.stdout
+    rules = tuple(rules)
+    results = []
+    for case in load_corpus(tiers):
+        result = measure(case, repeat, warmup, rules, backend)
+        results.append(result)
+        print(f"{case.tier:>12} {case.name:<38} {result['status']:>10} mediana {result['median'] * 1000:9.3f} ms, "
+              f"p95 {result['p95'] * 1000:9.3f} ms, {result['nodes_per_second']:12,.0f} nodos/s, "
+              f"{result['peak_memory'] / 1024:8.1f} KB", file=out)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": backend,
+        "rules": list(rules),
+        "repeat": repeat,
+        "warmup": warmup,
+        "results": results,
+    }
+
+
+def compare_results(old: dict, new: dict, threshold: float = DEFAULT_THRESHOLD,
+                    out: Optional[TextIO] = None) -> int:
+    """ Compara dos resultados de `run_suite` y marca las regresiones.
+
+    Un tablero tiene una regresión si su mediana aumenta más de `threshold` o si cambia su estado. Los
+    tableros que solo están en uno de los dos resultados se ignoran.
+
+    :param old: Los resultados de referencia
+    :param new: Los resultados nuevos
+    :param threshold: El aumento relativo de la mediana permitido, por ejemplo 0.10 para un 10 %
+    :param out: Donde mostrar la comparación, por defecto la salida estándar
+    :return: Devuelve el número de regresiones
+    """
+    out = out or sys.stdout
+    previous = {(result["tier"], result["name"]): result for result in old["results"]}
+    regressions = 0
+    for result in new["results"]:
+        before = previous.get((result["tier"], result["name"]))
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] > 0 else 1.0
+        regression = ratio > 1 + threshold or result["status"] != before["status"]
+        regressions += regression
+        print(f"{result['tier']:>12} {result['name']:<38} {before['median'] * 1000:9.3f} ms -> "
+              f"{result['median'] * 1000:9.3f} ms ({ratio - 1:+7.1%}), nodos {before['nodes']} -> "
+              f"{result['nodes']}{'  REGRESIÓN' if regression else ''}", file=out)
+    print(f"{regressions} regresiones con un umbral de {threshold:.0%}", file=out)
+    return regressions
+
+
+def main(arguments: Optional[list[str]] = None) -> int:
+    """ Ejecuta la suite de benchmarks, mide el arranque o compara dos resultados desde la línea de comandos.
+
+    :param arguments: Los argumentos de la línea de comandos, por defecto los del proceso
+    :return: Devuelve el código de salida: 1 si la comparación encuentra regresiones o el arranque no cumple
+             el objetivo, 0 si no
+    """
+    parser = argparse.ArgumentParser(description="Suite de benchmarks del solucionador de Sudoku Asesino")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Mide el corpus y guarda los resultados")
+    run.add_argument("--tier", action="append", choices=TIERS,
+                     help="Mide solo un nivel del corpus, se puede indicar varias veces")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Medidas de cada tablero")
+    run.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Ejecuciones de calentamiento")
+    run.add_argument("--disable-rule", action="append", default=[], choices=RULES,
+                     help="Desactiva una regla de propagación")
+    run.add_argument("--backend", default="bitmask", choices=BACKENDS, help="Motor de resolución")
+    run.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    startup = commands.add_parser("startup", help="Mide el arranque en frío hasta resolver el tablero de referencia")
+    startup.add_argument("--repeat", type=int, default=STARTUP_REPEAT, help="Medidas del arranque")
+    compare = commands.add_parser("compare", help="Compara dos archivos de resultados")
+    compare.add_argument("old", help="Los resultados de referencia")
+    compare.add_argument("new", help="Los resultados nuevos")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help=f"Aumento relativo de la mediana que se considera regresión ({DEFAULT_THRESHOLD})")
+    parsed_args = parser.parse_args(arguments)
+    if getattr(parsed_args, "repeat", 1) < 1:
+        parser.error("--repeat debe ser al menos 1")
+
+    if parsed_args.command == "compare":
+        with open(parsed_args.old) as old_file, open(parsed_args.new) as new_file:
+            old, new = json.load(old_file), json.load(new_file)
+        return 1 if compare_results(old, new, parsed_args.threshold) else 0
+
+    if parsed_args.command == "startup":
+        result = measure_startup(parsed_args.repeat)
+        met = result["median"] <= result["target"]
+        print(f"{' '.join(STARTUP_COMMAND)}: mínimo {result['min'] * 1000:.1f} ms, mediana "
+              f"{result['median'] * 1000:.1f} ms (objetivo {result['target'] * 1000:.0f} ms"
+              f"{'' if met else ', NO CUMPLIDO'})")
+        print(f"Intérprete vacío: mínimo {result['interpreter_min'] * 1000:.1f} ms, mediana "
+              f"{result['interpreter_median'] * 1000:.1f} ms")
+        return 0 if met else 1
+
+    rules = [rule for rule in RULES if rule not in parsed_args.disable_rule]
+    results = run_suite(parsed_args.tier or TIERS, parsed_args.repeat, parsed_args.warmup, rules,
+                        parsed_args.backend)
+    if parsed_args.output:
+        with open(parsed_args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
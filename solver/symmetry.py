@@ -0,0 +1,157 @@
+from functools import cache
+from itertools import permutations
+from typing import NamedTuple
+
+from .common import Board, Cages
+
+# Reetiquetado de valores que no cambia nada: el valor v pasa a ser v, y el 0 (celda vacía) sigue siendo 0
+IDENTITY_DIGITS = tuple(range(10))
+
+
+class Transform(NamedTuple):
+    """ Una simetría del Sudoku, que lleva un tablero a su forma canónica.
+
+    `cells[nuevo]` es el índice de la celda original que pasa a ocupar la celda `nuevo`, y `digits[v]` es el
+    valor que sustituye al valor original `v`.
+    """
+    cells: tuple[int, ...]
+    digits: tuple[int, ...] = IDENTITY_DIGITS
+
+    def apply(self, board: Board) -> Board:
+        """ Lleva un tablero del espacio original al canónico.
+
+        :param board: El tablero como lista de filas
+        :return: Devuelve un tablero nuevo
+        """
+        values = [value for row in board for value in row]
+        moved = [self.digits[values[old]] for old in self.cells]
+        return [moved[y * 9:y * 9 + 9] for y in range(9)]
+
+    def apply_cages(self, cages: Cages) -> Cages:
+        """ Lleva las jaulas del espacio original al canónico.
+
+        Las celdas de cada jaula se ordenan fila por fila, y las jaulas por su primera celda.
+
+        :param cages: Las jaulas originales
+        :return: Devuelve las jaulas nuevas
+        """
+        inverse = [0] * 81
+        for new, old in enumerate(self.cells):
+            inverse[old] = new
+        moved = [(total, sorted(inverse[y * 9 + x] for x, y in fields)) for total, fields in cages]
+        moved.sort(key=lambda cage: cage[1][0])
+        return [(total, [(index % 9, index // 9) for index in cells]) for total, cells in moved]
+
+    def restore(self, values) -> Board:
+        """ Lleva un tablero del espacio canónico al original, por ejemplo la solución de la forma canónica.
+
+        :param values: Los 81 valores del tablero canónico, fila por fila
+        :return: Devuelve el tablero original como lista de filas
+        """
+        digits = [0] * 10
+        for old, new in enumerate(self.digits):
+            digits[new] = old
+        restored = [0] * 81
+        for new, old in enumerate(self.cells):
+            restored[old] = digits[values[new]]
+        return [restored[y * 9:y * 9 + 9] for y in range(9)]
+
+
+@cache
+def cell_permutations() -> tuple[tuple[int, ...], ...]:
+    """ Devuelve las permutaciones de celdas de todas las simetrías geométricas que se consideran.
+
+    Las filas se pueden reordenar cambiando el orden de las bandas (grupos de 3 filas) e invirtiendo a la vez
+    el orden de las filas dentro de todas las bandas, y lo mismo las columnas con las pilas. Junto con la
+    trasposición del tablero, esto incluye los giros y reflejos y forma un grupo de 288 simetrías. Los
+    intercambios de filas dentro de una sola banda también son simetrías del Sudoku, pero multiplicarían el
+    grupo por 6 ^ 6 y no se consideran.
+
+    Se calcula una sola vez por proceso.
+
+    :return: Devuelve una tupla de permutaciones, cada una con el índice de la celda original de cada celda
+             nueva, empezando por la identidad
+    """
+    lines = [tuple(band * 3 + (2 - line if reverse else line) for band in bands for line in range(3))
+             for reverse in (False, True) for bands in permutations(range(3))]
+    return tuple(tuple(cols[x] * 9 + rows[y] if transpose else rows[y] * 9 + cols[x]
+                       for y in range(9) for x in range(9))
+                 for transpose in (False, True) for rows in lines for cols in lines)
+
+
+def relabel(values: list[int]) -> tuple[int, ...]:
+    """ Calcula el reetiquetado que numera los valores en el orden en que aparecen por primera vez.
+
+    :param values: Los 81 valores del tablero, fila por fila
+    :return: Devuelve el valor nuevo de cada valor del 0 al 9
+    """
+    digits = [0] * 10
+    label = 0
+    for value in values:
+        if value and not digits[value]:
+            label += 1
+            digits[value] = label
+    for value in range(1, 10):
+        if not digits[value]:
+            label += 1
+            digits[value] = label
+    return tuple(digits)
+
+
+def canonicalize(board: Board, cages: Cages) -> tuple[Board, Cages, Transform]:
+    """ Calcula la forma canónica de un tablero, la misma para todos los tableros de su clase de simetría.
+
+    Se prueban todas las simetrías de `cell_permutations` y se elige la que da el menor tablero, comparando los
+    valores fila por fila, después el total de la jaula de cada celda y, si aún hay empate, la primera celda
+    de la jaula de cada celda. Sin jaulas (un Sudoku clásico) también se reetiquetan los valores, que con jaulas
+    cambiarían las sumas.
+
+    Las simetrías son las del tablero de 9 x 9 con nonetos, así que para otros tableros se generará un
+    ValueError.
+
+    :param board: El tablero como lista de filas
+    :param cages: Las jaulas del tablero, que pueden estar vacías
+    :return: Devuelve una tupla con el tablero canónico, sus jaulas y la transformación que lleva el tablero
+             original al canónico, para devolver la solución del canónico con `Transform.restore`
+    """
+    if len(board) != 9:
+        raise ValueError(f"Solo se puede canonizar un tablero de 9 x 9, no de {len(board)} x {len(board)}")
+    values = [value for row in board for value in row]
+    totals = [0] * 81
+    for total, fields in cages:
+        for x, y in fields:
+            totals[y * 9 + x] = total
+    best_values = None
+    best: list[Transform] = []
+    for cells in cell_permutations():
+        moved = [values[old] for old in cells]
+        digits = IDENTITY_DIGITS
+        if cages:
+            moved += [totals[old] for old in cells]
+        else:
+            digits = relabel(moved)
+            moved = [digits[value] for value in moved]
+        if best_values is None or moved < best_values:
+            best_values, best = moved, [Transform(cells, digits)]
+        elif moved == best_values:
+            best.append(Transform(cells, digits))
+
+    transform = best[0]
+    if cages and len(best) > 1:
+        transform = min(best, key=lambda candidate: cage_signature(candidate, cages))
+    return transform.apply(board), transform.apply_cages(cages), transform
+
+
+def cage_signature(transform: Transform, cages: Cages) -> list[tuple[int, int]]:
+    """ Resume las jaulas de un tablero transformado, para desempatar entre simetrías.
+
+    :param transform: La transformación a aplicar
+    :param cages: Las jaulas originales
+    :return: Devuelve el total y la primera celda de la jaula de cada celda transformada
+    """
+    signature = [(0, 0)] * 81
+    for total, cells in transform.apply_cages(cages):
+        first = cells[0][1] * 9 + cells[0][0]
+        for x, y in cells:
+            signature[y * 9 + x] = (total, first)
+    return signature
@@ -0,0 +1,206 @@
+import json
+import os
+import time
+from typing import Optional, TextIO
+
+# Formatos en los que se puede exportar una traza: pilas plegadas para generar un flamegraph (con
+# `flamegraph.pl` o speedscope) o el JSON de eventos de Chrome (chrome://tracing o Perfetto)
+FORMATS = ("folded", "chrome")
+
+# Número máximo de eventos que se guardan para el formato de Chrome. Los nodos visitados después se siguen
+# contando en los demás datos de la traza, pero no generan eventos.
+MAX_EVENTS = 200_000
+
+# Nombres de los marcos de la raíz de la búsqueda y de la propagación en las pilas y los eventos
+ROOT_FRAME = "búsqueda"
+PROPAGATION_FRAME = "propagación"
+
+
+def cell_name(index: int, size: int = 9) -> str:
+    """ Nombra una celda con sus coordenadas, como en las jaulas de los archivos JSON.
+
+    :param index: El índice de la celda (y * N + x)
+    :param size: El tamaño N del tablero
+    :return: Devuelve el nombre de la celda, "(x,y)", sin espacios para poder usarlo en una pila plegada
+    """
+    return f"({index % size},{index // size})"
+
+
+class SearchTrace:
+    """ Traza detallada de una búsqueda con máscaras de bits (ver `bitmask.search`).
+
+    Registra los nodos por profundidad, los retrocesos de cada celda (valores probados en ella que no
+    llevaron a una solución), el número de candidatos de cada ramificación y el tiempo dedicado a propagar
+    frente al resto de la búsqueda. Además guarda el tiempo propio de cada camino del árbol, para exportarlo
+    como pilas plegadas, y un evento por nodo para el formato de Chrome.
+
+    La traza es opcional: sin ella la búsqueda usa sus funciones normales y no paga nada por la traza. Con
+    ella la búsqueda es bastante más lenta, así que sus tiempos son útiles para comparar partes de una misma
+    búsqueda, no con búsquedas sin traza. Una misma traza puede acumular varias búsquedas seguidas.
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS) -> None:
+        """ Crea una traza vacía.
+
+        :param max_events: El número máximo de eventos para el formato de Chrome
+        """
+        self.max_events = max_events
+        self.size = 9
+        self.depth_nodes: list[int] = []
+        self.backtracks = [0] * 81
+        self.branching = [0] * 10
+        self.propagation_time = 0.0
+        self.search_time = 0.0
+        self.folded: dict[str, float] = {}
+        self.events: list[dict] = []
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        # Marcos abiertos: nombre, inicio y tiempo de los marcos hijos
+        self.frames: list[list] = []
+
+    def enter(self, index: int, candidates: int) -> None:
+        """ Abre el marco de un nodo de la búsqueda, en el que se van a probar los candidatos de una celda.
+
+        :param index: El índice de la celda
+        :param candidates: La máscara de candidatos de la celda
+        """
+        self.branching[candidates.bit_count()] += 1
+        self.frames.append([cell_name(index, self.size), time.perf_counter(), 0.0])
+
+    def leave(self, depth: int, candidates: int) -> None:
+        """ Cierra el último marco abierto con `enter` o `begin`.
+
+        :param depth: La profundidad del nodo, o -1 para la raíz
+        :param candidates: El número de candidatos que tenía la celda del nodo
+        """
+        end = time.perf_counter()
+        name, start, children = self.frames[-1]
+        self.close(end - start, children)
+        self.frames.pop()
+        self.event(name, start, end, {"profundidad": depth, "candidatos": candidates} if depth >= 0 else None)
+
+    def propagated(self, start: float, end: float) -> None:
+        """ Anota una llamada a la propagación, como un marco hijo del nodo abierto.
+
+        :param start: El momento en que empezó la propagación, de `time.perf_counter`
+        :param end: El momento en que terminó
+        """
+        duration = end - start
+        self.propagation_time += duration
+        self.frames[-1][2] += duration
+        self.frames.append([PROPAGATION_FRAME, start, 0.0])
+        self.close(duration, 0.0)
+        self.frames.pop()
+        self.event(PROPAGATION_FRAME, start, end, None)
+
+    def begin(self, size: int = 9) -> None:
+        """ Abre el marco raíz de una búsqueda.
+
+        :param size: El tamaño N del tablero, para los contadores por celda y por número de candidatos
+        """
+        self.size = size
+        self.backtracks.extend([0] * (size * size - len(self.backtracks)))
+        self.branching.extend([0] * (size + 1 - len(self.branching)))
+        self.frames.append([ROOT_FRAME, time.perf_counter(), 0.0])
+
+    def finish(self, depth_nodes: list[int]) -> None:
+        """ Cierra el marco raíz de una búsqueda y suma su histograma de nodos por profundidad.
+
+        :param depth_nodes: El número de nodos visitados en cada profundidad
+        """
+        start = self.frames[-1][1]
+        self.leave(-1, 0)
+        self.search_time += time.perf_counter() - start
+        missing = len(depth_nodes) - len(self.depth_nodes)
+        if missing > 0:
+            self.depth_nodes.extend([0] * missing)
+        for depth, nodes in enumerate(depth_nodes):
+            self.depth_nodes[depth] += nodes
+
+    def close(self, duration: float, children: float) -> None:
+        """ Suma el tiempo propio del marco abierto a su pila y su tiempo total al marco padre. """
+        stack = ";".join(frame[0] for frame in self.frames)
+        self.folded[stack] = self.folded.get(stack, 0.0) + duration - children
+        if len(self.frames) > 1:
+            self.frames[-2][2] += duration
+
+    def event(self, name: str, start: float, end: float, args: Optional[dict]) -> None:
+        """ Guarda un evento completo para el formato de Chrome, si no se ha llegado al máximo. """
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        event = {"name": name, "ph": "X", "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6,
+                 "pid": os.getpid(), "tid": 0}
+        if args is not None:
+            event["args"] = args
+        self.events.append(event)
+
+    def top_backtracks(self, limit: int = 10) -> list[tuple[int, int]]:
+        """ Devuelve las celdas con más retrocesos.
+
+        :param limit: El número máximo de celdas
+        :return: Devuelve una lista de tuplas con el índice de la celda y sus retrocesos, de más a menos
+        """
+        cells = sorted(range(len(self.backtracks)), key=lambda index: (-self.backtracks[index], index))
+        return [(index, self.backtracks[index]) for index in cells[:limit] if self.backtracks[index]]
+
+    def write_folded(self, out: TextIO) -> None:
+        """ Escribe las pilas plegadas, una línea por camino con su tiempo propio en microsegundos.
+
+        :param out: El archivo donde escribir
+        """
+        for stack, seconds in self.folded.items():
+            print(f"{stack} {max(1, round(seconds * 1e6))}", file=out)
+
+    def write_chrome(self, out: TextIO) -> None:
+        """ Escribe los eventos en el formato JSON de Chrome, con el resumen de la traza en `otherData`.
+
+        :param out: El archivo donde escribir
+        """
+        summary = {
+            "depth_nodes": self.depth_nodes,
+            "backtracks": {cell_name(index, self.size): count
+                           for index, count in self.top_backtracks(len(self.backtracks))},
+            "branching": self.branching,
+            "propagation_time": self.propagation_time,
+            "search_time": self.search_time,
+            "dropped_events": self.dropped,
+        }
+        json.dump({"traceEvents": self.events, "displayTimeUnit": "ms", "otherData": summary}, out)
+
+    def write(self, out: TextIO, format: str = "folded") -> None:
+        """ Exporta la traza en uno de los formatos de `FORMATS`.
+
+        :param out: El archivo donde escribir
+        :param format: El formato, "folded" o "chrome"
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Formato de traza desconocido: {format}")
+        if format == "chrome":
+            self.write_chrome(out)
+        else:
+            self.write_folded(out)
+
+    def to_text(self) -> str:
+        """ Resume la traza en texto para mostrarla en la consola.
+
+        :return: Devuelve el texto, en varias líneas
+        """
+        nodes = sum(self.depth_nodes)
+        others = self.search_time - self.propagation_time
+        share = self.propagation_time / self.search_time if self.search_time > 0 else 0.0
+        lines = [f"Traza de la búsqueda: {nodes} nodos" +
+                 (f", {self.dropped} eventos descartados" if self.dropped else ""),
+                 f"  Tiempo: {self.propagation_time:.6f} s propagando ({share:.0%}), {others:.6f} s en el resto "
+                 f"de la búsqueda"]
+        cells = self.top_backtracks()
+        if cells:
+            lines.append("  Celdas con más retrocesos: " +
+                         ", ".join(f"{cell_name(index, self.size)} {count}" for index, count in cells))
+        branches = [f"{count}: {nodes}" for count, nodes in enumerate(self.branching) if nodes]
+        if branches:
+            lines.append("  Ramificaciones por número de candidatos: " + ", ".join(branches))
+        depths = [f"{depth + 1}: {nodes}" for depth, nodes in enumerate(self.depth_nodes) if nodes]
+        if depths:
+            lines.append("  Nodos por profundidad: " + ", ".join(depths))
+        return "\n".join(lines)
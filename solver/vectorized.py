@@ -0,0 +1,183 @@
+from typing import Iterable, Optional
+
+from .combinations import combination_masks
+from .common import ALL_VALUES, Board, Cages
+from .grid import COLS, NONETS, PEERS, ROWS
+from .propagation import RULES
+from .solver import solve
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy es opcional: sin él, `solve_many` resuelve los tableros uno por uno con `solve`
+    np = None
+
+# Tamaño de bloque a partir del cual `solve_many` usa NumPy por defecto: con pocos tableros, preparar los
+# arreglos cuesta más de lo que ahorra la propagación en bloque
+MIN_BATCH = 32
+
+# Vueltas máximas de la propagación en bloque antes de pasar los tableros que queden al motor normal
+MAX_ROUNDS = 100
+
+
+def solve_many(puzzles: Iterable[tuple[Board, Cages]], rules: Iterable[str] = RULES,
+               ordering: str = "row_major", use_numpy: Optional[bool] = None) -> list[bool]:
+    """ Resuelve muchos tableros a la vez.
+
+    Con NumPy, los candidatos de todos los tableros se guardan en un arreglo de N x 81 máscaras de 16 bits y
+    se propagan a la vez con operaciones vectorizadas (ver `propagate_batch`). Los tableros que la propagación
+    no termina de resolver pasan a `solve`, uno por uno, con los valores deducidos como valores iniciales. Sin
+    NumPy, o con `use_numpy` falso, todos los tableros se resuelven con `solve`.
+
+    Si un tablero tiene varias soluciones, la encontrada puede no coincidir con la de `solve`. La propagación
+    en bloque solo admite tableros de 9 x 9; si hay alguno de otro tamaño, todos se resuelven con `solve`.
+
+    :param puzzles: Los tableros y sus jaulas. Cada tablero se actualiza con su solución
+    :param rules: Las reglas de propagación que aplica `solve` a los tableros que quedan sin resolver
+    :param ordering: La estrategia de `solve` para elegir la siguiente celda a rellenar
+    :param use_numpy: Si se usa la propagación en bloque, por defecto si NumPy está instalado y hay al menos
+                      `MIN_BATCH` tableros
+    :return: Devuelve una lista con un booleano verdadero por cada tablero resuelto
+    """
+    puzzles = list(puzzles)
+    if use_numpy is None:
+        use_numpy = np is not None and len(puzzles) >= MIN_BATCH
+    elif use_numpy and np is None:
+        raise ValueError("La propagación en bloque necesita NumPy")
+    if not use_numpy or not puzzles or any(len(board) != 9 for board, _ in puzzles):
+        return [bool(solve(board, cages, rules, ordering)) for board, cages in puzzles]
+
+    values = np.array([[value for row in board for value in row] for board, _ in puzzles], dtype=np.int16)
+    candidates = np.where(values == 0, ALL_VALUES, np.left_shift(1, values - 1)).astype(np.uint16)
+    propagate_batch(candidates, CageArrays([cages for _, cages in puzzles]))
+
+    failed = (candidates == 0).any(axis=1)
+    deduced = VALUE_OF[candidates]
+    solved = (deduced != 0).all(axis=1)
+    results = []
+    for position, (board, cages) in enumerate(puzzles):
+        if failed[position]:
+            results.append(False)
+            continue
+        rows = deduced[position].reshape(9, 9).tolist()
+        if not solved[position] and not solve(rows, cages, rules, ordering):
+            results.append(False)
+            continue
+        for y in range(9):
+            board[y][:] = rows[y]
+        results.append(True)
+    return results
+
+
+class CageArrays:
+    """ Las jaulas de todos los tableros de un bloque, como arreglos de NumPy.
+
+    Las jaulas de todos los tableros se ponen en una sola lista. Para cada jaula se guarda el tablero al que
+    pertenece, sus celdas (rellenando hasta 9 con la celda ficticia 81) y sus combinaciones de valores
+    (rellenando con 0 hasta la jaula con más combinaciones).
+    """
+
+    def __init__(self, cages_list: list[Cages]) -> None:
+        """ Crea los arreglos.
+
+        :param cages_list: Las jaulas de cada tablero
+        """
+        puzzle_of, cells, combinations = [], [], []
+        for position, cages in enumerate(cages_list):
+            for total, fields in cages:
+                puzzle_of.append(position)
+                cells.append([y * 9 + x for x, y in fields] + [81] * (9 - len(fields)))
+                combinations.append(combination_masks(total, len(fields)))
+        width = max((len(masks) for masks in combinations), default=1)
+        self.puzzle_of = np.array(puzzle_of, dtype=np.intp)[:, None]
+        self.cells = np.array(cells, dtype=np.intp)
+        self.padding = self.cells == 81
+        self.combinations = np.array([list(masks) + [0] * (width - len(masks)) for masks in combinations],
+                                     dtype=np.uint16)
+
+
+def propagate_batch(candidates, cages: CageArrays) -> None:
+    """ Propaga las restricciones de todos los tableros a la vez, hasta un punto fijo o `MAX_ROUNDS` vueltas.
+
+    Cada vuelta aplica tres reglas sobre todo el bloque:
+
+    - Celdas resueltas: el valor de cada celda con un solo candidato se descarta en sus 20 vecinas, usando
+      los índices precalculados de `grid.PEERS`.
+    - Únicos ocultos: un valor que solo cabe en una celda de una fila, columna o noneto se coloca en ella.
+    - Combinaciones de jaulas: se descartan los valores de las celdas resueltas de cada jaula en el resto de
+      sus celdas, y cada celda se limita a la unión de las combinaciones de su jaula que aún son posibles.
+
+    Una contradicción deja a 0 los candidatos de alguna celda del tablero.
+
+    :param candidates: El arreglo de N x 81 máscaras de candidatos, se actualiza en el sitio
+    :param cages: Las jaulas de los tableros
+    """
+    for _ in range(MAX_ROUNDS):
+        previous = candidates.copy()
+        eliminate_peers(candidates)
+        hidden_singles(candidates)
+        restrict_cages(candidates, cages)
+        if np.array_equal(candidates, previous):
+            return
+
+
+def is_single(candidates):
+    """ Indica qué máscaras tienen un solo candidato. """
+    return (candidates != 0) & ((candidates & (candidates - 1)) == 0)
+
+
+def eliminate_peers(candidates) -> None:
+    """ Descarta el valor de cada celda resuelta en sus vecinas. """
+    resolved = np.where(is_single(candidates), candidates, 0).astype(np.uint16)
+    used = np.bitwise_or.reduce(resolved[:, PEER_INDEX], axis=2)
+    candidates &= ~used
+
+
+def hidden_singles(candidates) -> None:
+    """ Coloca los valores que solo caben en una celda de una fila, columna o noneto. """
+    for units in UNIT_GROUPS:
+        grouped = candidates[:, units]
+        hidden = np.zeros_like(grouped)
+        for bit in BITS:
+            present = (grouped & bit) != 0
+            once = present.sum(axis=2) == 1
+            hidden |= np.where(present & once[:, :, None], bit, 0).astype(np.uint16)
+        # Dos valores ocultos en la misma celda son una contradicción
+        placed = np.where(is_single(hidden), grouped & hidden, 0).astype(np.uint16)
+        grouped = np.where(hidden != 0, placed, grouped)
+        candidates[:, units.reshape(-1)] = grouped.reshape(len(candidates), 81)
+
+
+def restrict_cages(candidates, cages: CageArrays) -> None:
+    """ Limita las celdas de cada jaula a los valores de sus combinaciones posibles. """
+    extended = np.concatenate([candidates, np.full((len(candidates), 1), ALL_VALUES, dtype=np.uint16)], axis=1)
+    cells = extended[cages.puzzle_of, cages.cells]
+    single = is_single(cells) & ~cages.padding
+    resolved = np.where(single, cells, 0).astype(np.uint16)
+    taken = np.bitwise_or.reduce(resolved, axis=1)
+    # Dos celdas resueltas de la jaula con el mismo valor son una contradicción
+    repeated = POPCOUNT[resolved].sum(axis=1) != POPCOUNT[taken]
+    cells = np.where(single, cells, cells & ~taken[:, None]).astype(np.uint16)
+
+    combinations = cages.combinations
+    union = np.bitwise_or.reduce(np.where(cages.padding, 0, cells), axis=1).astype(np.uint16)
+    possible = (combinations != 0) & ((combinations & taken[:, None]) == taken[:, None]) & \
+        ((combinations & union[:, None]) == combinations) & \
+        (((cells[:, None, :] & combinations[:, :, None]) != 0) | cages.padding[:, None, :]).all(axis=2)
+    allowed = np.bitwise_or.reduce(np.where(possible, combinations, 0), axis=1).astype(np.uint16)
+    allowed[repeated] = 0
+    cells &= allowed[:, None]
+
+    inside = ~cages.padding
+    rows = np.broadcast_to(cages.puzzle_of, cages.cells.shape)
+    candidates[rows[inside], cages.cells[inside]] = cells[inside]
+
+
+if np is not None:
+    # Índices de las vecinas, de las unidades y tablas de valores y de número de candidatos por máscara
+    PEER_INDEX = np.array(PEERS, dtype=np.intp)
+    UNIT_GROUPS = tuple(np.array(units, dtype=np.intp) for units in (ROWS, COLS, NONETS))
+    BITS = tuple(np.uint16(1 << value) for value in range(9))
+    VALUE_OF = np.array([mask.bit_length() if mask and not mask & (mask - 1) else 0
+                         for mask in range(ALL_VALUES + 1)], dtype=np.int8)
+    POPCOUNT = np.array([mask.bit_count() for mask in range(ALL_VALUES + 1)], dtype=np.int8)
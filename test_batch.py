@@ -0,0 +1,46 @@
+import unittest
+
+import solver
+from solver import batch
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.solution, cages = solver.load_from_file("Killer.json")
+        solver.solve(self.solution, cages)
+        self.filenames = ["Killer.json", "puzzles/test_solve.json", "Killer.json", "missing.json"]
+
+    def test_in_process(self):
+        results = list(batch.solve_batch(self.filenames, jobs=1))
+        self.assertListEqual([result.position for result in results], [0, 1, 2, 3])
+        self.assertListEqual([result.status for result in results],
+                             [batch.SOLVED, batch.UNSOLVABLE, batch.SOLVED, batch.ERROR])
+        self.assertListEqual(results[0].board, self.solution)
+        self.assertIn("FileNotFoundError", results[3].error)
+
+    def test_regions(self):
+        result, = batch.solve_batch(["puzzles/sizes/jigsaw_9x9.json"], jobs=1, debug=True)
+        self.assertEqual(result.status, batch.SOLVED)
+        self.assertIsNotNone(result.regions)
+        self.assertTrue(solver.validate(result.board, result.cages, result.regions))
+
+    def test_stats_are_values(self):
+        first, _, second, _ = batch.solve_batch(self.filenames, jobs=1, rules=())
+        self.assertGreater(first.stats.nodes, 0)
+        self.assertEqual(first.stats.nodes, second.stats.nodes)
+        self.assertEqual(first.stats.checks, second.stats.checks)
+        self.assertEqual(sum(first.stats.resolved.values()), 0)
+
+    def test_process_pool(self):
+        results = list(batch.solve_batch(self.filenames * 3, jobs=2))
+        self.assertListEqual([result.position for result in results], list(range(12)))
+        self.assertListEqual([result.board for result in results[::4]], [self.solution] * 3)
+
+        unordered = batch.solve_batch(self.filenames * 3, jobs=2, ordered=False)
+        self.assertListEqual(sorted(result.position for result in unordered), list(range(12)))
+
+    def test_timeout(self):
+        # Sin propagación Killer.json necesita miles de nodos, mucho más de lo que permite el límite
+        result, = batch.solve_batch(["Killer.json"], jobs=1, timeout=0.0001, rules=())
+        self.assertEqual(result.status, batch.TIMEOUT)
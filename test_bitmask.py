@@ -0,0 +1,43 @@
+import unittest
+
+import solver
+from solver import bitmask
+from solver.common import mask_values
+from solver.puzzle import Puzzle
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.board, self.cages = solver.load_from_file("Killer.json")
+
+    def test_state_place_remove(self):
+        state = bitmask.BitmaskState(Puzzle(self.board, self.cages))
+        before = state.candidates(1)
+        state.place(0, 4)
+        self.assertListEqual(mask_values(state.candidates(1)), [9])
+        state.remove(0)
+        self.assertEqual(state.candidates(1), before)
+
+    def test_search_infeasible_cage(self):
+        # Con un 9 en (0, 0), la jaula de 13 en (0, 0) y (1, 0) necesita un 4 en (1, 0), pero hay un 4 en la
+        # misma fila, así que la búsqueda termina en el primer nodo
+        self.board[0][0] = 9
+        self.board[0][7] = 4
+        success, nodes, _ = bitmask.search(Puzzle(self.board, self.cages))
+        self.assertFalse(success)
+        self.assertEqual(nodes, 1)
+
+    def test_search(self):
+        puzzle = Puzzle(self.board, self.cages)
+        success, nodes, checks = bitmask.search(puzzle)
+        self.assertTrue(success)
+        self.assertGreater(nodes, 0)
+        self.assertGreaterEqual(checks, nodes - 1)
+        self.assertTrue(solver.validate(puzzle.to_board(), self.cages))
+        self.assertListEqual(puzzle.to_board()[0], [4, 9, 6, 1, 5, 7, 8, 3, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
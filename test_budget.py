@@ -0,0 +1,125 @@
+import asyncio
+import copy
+import threading
+import time
+import unittest
+
+import solver
+from solver.aio import solve_async
+from solver.budget import BUDGET_EXHAUSTED, CANCELLED, CancelToken
+from solver.iterative import SOLVED, UNSOLVABLE
+from solver.solver import load_puzzle
+from solver.trace import SearchTrace
+
+
+def empty_12x12():
+    """ Un tablero de 12 x 12 sin valores, que sin reglas de propagación tarda mucho en resolverse. """
+    board, cages, _ = load_puzzle("puzzles/sizes/killer_12x12.json")
+    return [[0] * 12 for _ in range(12)], cages
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+
+    def test_max_nodes(self):
+        for engine in solver.ENGINES:
+            for rules in ((), ("naked_singles",)):
+                board = copy.deepcopy(self.board)
+                stats = solver.SolveStats()
+                result = solver.solve(board, self.cages, rules, engine=engine, stats=stats, max_nodes=50)
+                self.assertEqual(result.status, BUDGET_EXHAUSTED, engine)
+                self.assertFalse(result)
+                self.assertLessEqual(result.nodes, 50)
+                self.assertEqual(stats.nodes, result.nodes)
+                self.assertListEqual(board, self.board)
+
+                result = solver.solve(board, self.cages, rules, engine=engine, max_nodes=100000)
+                self.assertEqual(result.status, SOLVED)
+                self.assertTrue(result)
+                self.assertTrue(solver.validate(board, self.cages))
+
+    def test_max_nodes_boundary(self):
+        # Un tablero de 4 x 4 cuya primera celda no tiene ningún valor posible: (1, 0) debería ser un 1 o un 2,
+        # pero los dos están ya en su columna
+        board = [[0] * 4 for _ in range(4)]
+        board[2][1], board[3][1] = 1, 2
+        rest = [(x, y) for y in range(4) for x in range(4) if (y or x > 1) and (x, y) not in ((1, 2), (1, 3))]
+        cages = [(3, [(0, 0), (1, 0)]), (3, [(1, 2), (1, 3)])] + [(7, rest[i:i + 2]) for i in range(0, 12, 2)]
+        for ordering in ("row_major", "mrv"):
+            for engine in solver.ENGINES:
+                result = solver.solve(copy.deepcopy(board), cages, (), ordering, engine=engine, max_nodes=0)
+                self.assertEqual((result.status, result.nodes), (BUDGET_EXHAUSTED, 0), engine)
+                result = solver.solve(copy.deepcopy(board), cages, (), ordering, engine=engine, max_nodes=1)
+                self.assertEqual((result.status, result.nodes), (UNSOLVABLE, 1), engine)
+                result = solver.solve(copy.deepcopy(self.board), self.cages, (), ordering, engine=engine,
+                                      max_nodes=1)
+                self.assertEqual((result.status, result.nodes), (BUDGET_EXHAUSTED, 1), engine)
+
+    def test_deadline(self):
+        board = copy.deepcopy(self.board)
+        result = solver.solve(board, self.cages, (), deadline=time.monotonic() - 1)
+        self.assertEqual(result.status, BUDGET_EXHAUSTED)
+        self.assertListEqual(board, self.board)
+
+        board, cages = empty_12x12()
+        start = time.monotonic()
+        result = solver.solve(board, cages, (), deadline=start + 0.2)
+        self.assertEqual(result.status, BUDGET_EXHAUSTED)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_cancel(self):
+        token = CancelToken()
+        token.cancel()
+        result = solver.solve(copy.deepcopy(self.board), self.cages, (), cancel_token=token)
+        self.assertEqual(result.status, CANCELLED)
+
+        board, cages = empty_12x12()
+        token = CancelToken()
+        threading.Timer(0.1, token.cancel).start()
+        result = solver.solve(board, cages, ("naked_singles",), engine="iterative", cancel_token=token)
+        self.assertEqual(result.status, CANCELLED)
+        self.assertGreater(result.nodes, 0)
+
+    def test_trace(self):
+        trace = SearchTrace()
+        result = solver.solve(copy.deepcopy(self.board), self.cages, (), trace=trace, max_nodes=10)
+        self.assertEqual(result.status, BUDGET_EXHAUSTED)
+        self.assertEqual(sum(trace.depth_nodes), 10)
+
+    def test_unsolvable(self):
+        board = copy.deepcopy(self.board)
+        board[0][0], board[0][1] = 1, 1
+        result = solver.solve(board, self.cages, max_nodes=1000)
+        self.assertEqual(result.status, UNSOLVABLE)
+        self.assertFalse(result)
+
+    def test_backends(self):
+        with self.assertRaises(ValueError):
+            solver.solve(copy.deepcopy(self.board), self.cages, backend="dlx", max_nodes=10)
+        with self.assertRaises(ValueError):
+            solver.solve(copy.deepcopy(self.board), self.cages, workers=2, cancel_token=CancelToken())
+        with self.assertRaises(ValueError):
+            solver.solve(copy.deepcopy(self.board), self.cages, max_nodes=-1)
+
+    def test_async(self):
+        board = copy.deepcopy(self.board)
+        result = asyncio.run(solve_async(board, self.cages))
+        self.assertEqual(result.status, SOLVED)
+        self.assertTrue(solver.validate(board, self.cages))
+
+        board, cages = empty_12x12()
+
+        async def cancelled():
+            await asyncio.wait_for(solve_async(board, cages, ()), 0.1)
+
+        start = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(cancelled())
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertListEqual(board, empty_12x12()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
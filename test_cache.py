@@ -0,0 +1,87 @@
+import copy
+import os
+import tempfile
+import unittest
+from array import array
+
+import solver
+from solver.cache import SolutionCache, puzzle_key
+from solver.puzzle import Puzzle
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache", "solutions.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key(self):
+        key = puzzle_key(Puzzle(self.board, self.cages))
+        shuffled = [(total, list(reversed(fields))) for total, fields in reversed(self.cages)]
+        self.assertEqual(puzzle_key(Puzzle(self.board, shuffled)), key)
+
+        given = copy.deepcopy(self.board)
+        given[0][0] = 4
+        self.assertNotEqual(puzzle_key(Puzzle(given, self.cages)), key)
+        changed = list(self.cages)
+        changed[0] = (changed[0][0] + 1, changed[0][1])
+        changed[1] = (changed[1][0] - 1, changed[1][1])
+        self.assertNotEqual(puzzle_key(Puzzle(self.board, changed)), key)
+
+    def test_get_put(self):
+        with SolutionCache(self.path) as cache:
+            self.assertIsNone(cache.get("a"))
+            cache.put("a", array('b', [1] * 81))
+            cache.put("b", None)
+            self.assertEqual(cache.get("a"), bytes([1] * 81))
+            self.assertEqual(cache.get("b"), b"")
+            self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+        with SolutionCache(self.path, read=False) as cache:
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(len(cache), 2)
+
+    def test_eviction(self):
+        with SolutionCache(self.path, max_entries=2) as cache:
+            cache.put("a", None)
+            cache.put("b", None)
+            cache.get("a")
+            cache.put("c", None)
+            self.assertEqual(cache.evictions, 1)
+            self.assertIsNone(cache.get("b"))
+            self.assertIsNotNone(cache.get("a"))
+            self.assertIsNotNone(cache.get("c"))
+
+            # Reemplazar una entrada no cuenta como una nueva
+            cache.put("a", None)
+            self.assertEqual((cache.entries, len(cache), cache.evictions), (2, 2, 1))
+
+        # Al abrir de nuevo la caché se cuentan las entradas ya guardadas
+        with SolutionCache(self.path, max_entries=2) as cache:
+            self.assertEqual(cache.entries, 2)
+            cache.put("d", None)
+            self.assertEqual((cache.entries, len(cache), cache.evictions), (2, 2, 1))
+
+    def test_solve(self):
+        expected = copy.deepcopy(self.board)
+        solver.solve(expected, self.cages)
+        for hits in range(2):
+            with SolutionCache(self.path) as cache:
+                board = copy.deepcopy(self.board)
+                self.assertTrue(solver.solve(board, self.cages, debug=True, cache=cache))
+                self.assertListEqual(board, expected)
+                self.assertEqual(cache.hits, hits)
+
+        unsolvable, cages = solver.load_from_file("puzzles/test_solve.json")
+        with SolutionCache(self.path) as cache:
+            self.assertFalse(solver.solve(copy.deepcopy(unsolvable), cages, cache=cache))
+            self.assertFalse(solver.solve(unsolvable, cages, cache=cache))
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from solver import combinations
+from solver.common import ALL_VALUES, mask_values, value_bit
+
+
+class Test(unittest.TestCase):
+
+    def test_mask_values(self):
+        self.assertListEqual(mask_values(0), [])
+        self.assertListEqual(mask_values(ALL_VALUES), [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertListEqual(mask_values(value_bit(3) | value_bit(9)), [3, 9])
+
+    def test_cage_combinations(self):
+        self.assertListEqual(combinations.cage_combinations(17, 2), [(8, 9)])
+        self.assertListEqual(combinations.cage_combinations(10, 3),
+                             [(2, 3, 5), (1, 4, 5), (1, 3, 6), (1, 2, 7)])
+        self.assertListEqual(combinations.cage_combinations(18, 2), [])
+        self.assertListEqual(combinations.cage_combinations(45, 9), [tuple(range(1, 10))])
+
+    def test_allowed_values(self):
+        # 10 en dos celdas nunca puede usar el 5, aunque esté dentro del rango de mínimo y máximo
+        self.assertNotIn(5, mask_values(combinations.allowed_values(10, 2)))
+        self.assertListEqual(mask_values(combinations.allowed_values(10, 3, value_bit(2))), [1, 3, 5, 7])
+        self.assertListEqual(mask_values(combinations.allowed_values(13, 2, value_bit(4))), [9])
+        self.assertEqual(combinations.allowed_values(13, 2, value_bit(2)), 0)
+
+    def test_cage_table_cached(self):
+        self.assertIs(combinations.cage_table(15, 3), combinations.cage_table(15, 3))
+        self.assertEqual(len(combinations.cage_table(15, 3)), ALL_VALUES + 1)
+
+    def test_tables_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tables", "tables-9.bin")
+            combinations.save_tables(9, path)
+            expected = combinations._combinations.pop(9)
+            self.addCleanup(combinations._combinations.__setitem__, 9, expected)
+            self.assertTrue(combinations.load_tables(9, path))
+            self.assertDictEqual(combinations._combinations[9], expected)
+            self.assertFalse(os.path.exists(f"{path}.{os.getpid()}.tmp"))
+
+            # Un archivo de otro número de valores, truncado o que no es de tablas se descarta
+            self.assertFalse(combinations.load_tables(4, path))
+            with open(path, "r+b") as file:
+                file.truncate(os.path.getsize(path) - 2)
+            self.assertFalse(combinations.load_tables(9, path))
+            with open(path, "wb") as file:
+                file.write(b"no es un archivo de tablas")
+            self.assertFalse(combinations.load_tables(9, path))
+            self.assertFalse(combinations.load_tables(9, os.path.join(directory, "missing.bin")))
+
+    def test_tables_path(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(combinations, "TABLES_PATH", os.path.join(directory, "tables-{digits}.bin")):
+            combinations._combinations.pop(6, None)
+            combinations.combination_masks(10, 3, 6)
+            self.assertListEqual(os.listdir(directory), [])
+
+            # Solo los tableros con muchos valores usan el archivo, que se crea la primera vez
+            with mock.patch.object(combinations, "TABLES_MIN_DIGITS", 4):
+                combinations._combinations.pop(4, None)
+                self.addCleanup(combinations._combinations.pop, 4, None)
+                self.assertListEqual(combinations.cage_combinations(7, 2, 4), [(3, 4)])
+                self.assertListEqual(os.listdir(directory), ["tables-4.bin"])
+                expected = combinations._combinations.pop(4)
+                self.assertListEqual(combinations.cage_combinations(7, 2, 4), [(3, 4)])
+                self.assertDictEqual(combinations._combinations[4], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import copy
+import unittest
+
+import solver
+from solver.stats import SolveStats
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.solution = copy.deepcopy(self.board)
+        solver.solve(self.solution, self.cages)
+
+        # Con una jaula de 45 por fila, cualquier Sudoku clásico es válido. Las cuatro celdas vaciadas forman un
+        # rectángulo cuyos valores se pueden intercambiar, así que el tablero tiene exactamente dos soluciones.
+        self.row_cages = [(45, [(x, y) for x in range(9)]) for y in range(9)]
+        self.ambiguous = copy.deepcopy(self.solution)
+        for x, y in [(0, 0), (5, 0), (0, 2), (5, 2)]:
+            self.ambiguous[y][x] = 0
+
+    def test_unique(self):
+        for rules in [(), solver.RULES]:
+            self.assertEqual(solver.count_solutions(self.board, self.cages, rules=rules), 1)
+        self.assertListEqual(list(solver.find_solutions(self.board, self.cages)), [self.solution])
+
+    def test_unsolvable(self):
+        board, cages = solver.load_from_file("puzzles/test_solve.json")
+        self.assertEqual(solver.count_solutions(board, cages), 0)
+
+    def test_multiple(self):
+        for rules in [(), solver.RULES]:
+            for ordering in ["row_major", "mrv"]:
+                self.assertEqual(solver.count_solutions(self.ambiguous, self.row_cages, None, rules, ordering), 2)
+        solutions = list(solver.find_solutions(self.ambiguous, self.row_cages))
+        self.assertIn(self.solution, solutions)
+        self.assertNotEqual(solutions[0], solutions[1])
+        self.assertEqual(self.ambiguous[0][0], 0)  # El tablero no se modifica
+
+    def test_limit(self):
+        empty = [[0] * 9 for _ in range(9)]
+        stats = SolveStats()
+        self.assertEqual(solver.count_solutions(empty, self.row_cages, 5, stats=stats), 5)
+        self.assertGreater(stats.nodes, 0)
+        self.assertEqual(solver.count_solutions(empty, self.row_cages, 1), 1)
+        self.assertEqual(solver.count_solutions(empty, self.row_cages, 0), 0)
+
+    def test_lazy(self):
+        empty = [[0] * 9 for _ in range(9)]
+        solutions = solver.find_solutions(empty, self.row_cages, ())
+        first, second = next(solutions), next(solutions)
+        self.assertNotEqual(first, second)
+        self.assertTrue(solver.validate(first, self.row_cages))
+        solutions.close()
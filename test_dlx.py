@@ -0,0 +1,67 @@
+import copy
+import unittest
+
+import solver
+from solver.dlx import ExactCover, build
+from solver.puzzle import Puzzle
+from solver.stats import SolveStats
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.row_cages = [(45, [(x, y) for x in range(9)]) for y in range(9)]
+
+    def test_exact_cover(self):
+        # El ejemplo de Knuth: la única cobertura exacta son las filas 0, 3 y 4
+        matrix = ExactCover(7)
+        for columns in [[2, 4, 5], [0, 3, 6], [1, 2, 5], [0, 3], [1, 6], [3, 4, 6]]:
+            matrix.add_row(columns)
+        depth_nodes = [0] * 7
+        self.assertListEqual([sorted(rows) for rows in matrix.solutions(depth_nodes)], [[0, 3, 4]])
+        self.assertGreater(sum(depth_nodes), 0)
+
+    def test_build(self):
+        puzzle = Puzzle(self.board, self.cages)
+        matrix, rows = build(puzzle)
+        self.assertEqual(matrix.rows, len(rows))
+        self.assertLess(matrix.rows, 81 * 9 + puzzle.cage_count * 126)
+
+    def test_solve(self):
+        expected = copy.deepcopy(self.board)
+        board = copy.deepcopy(self.board)
+        stats = SolveStats()
+        self.assertTrue(solver.solve(expected, self.cages))
+        self.assertTrue(solver.solve(board, self.cages, stats=stats, backend="dlx"))
+        self.assertListEqual(board, expected)
+        self.assertEqual(stats.backtracks, stats.nodes - stats.max_depth)
+
+    def test_unsolvable(self):
+        board, cages = solver.load_from_file("puzzles/test_solve.json")
+        self.assertFalse(solver.solve(board, cages, backend="dlx"))
+        self.assertEqual(solver.count_solutions(board, cages, backend="dlx"), 0)
+
+    def test_count(self):
+        solution = copy.deepcopy(self.board)
+        solver.solve(solution, self.cages)
+        for x, y in [(0, 0), (5, 0), (0, 2), (5, 2)]:
+            solution[y][x] = 0
+        self.assertEqual(solver.count_solutions(solution, self.row_cages, None, backend="dlx"), 2)
+        self.assertEqual(solver.count_solutions(self.board, self.cages, backend="dlx"), 1)
+
+        empty = [[0] * 9 for _ in range(9)]
+        solutions = list(zip(range(3), solver.find_solutions(empty, self.row_cages, backend="dlx")))
+        self.assertEqual(len(solutions), 3)
+        for _, board in solutions:
+            self.assertTrue(solver.validate(board, self.row_cages))
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            solver.solve(self.board, self.cages, backend="unknown")
+        with self.assertRaises(ValueError):
+            solver.solve(self.board, self.cages, workers=2, backend="dlx")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import random
+import unittest
+
+import solver
+from solver.generator import NodeBudget, generate, generate_many, neighbours, random_cages, random_grid
+
+
+class Test(unittest.TestCase):
+
+    def test_grid(self):
+        grid = random_grid(random.Random(1))
+        board = [grid[y * 9:y * 9 + 9] for y in range(9)]
+        self.assertTrue(solver.validate_rows(board))
+        self.assertTrue(solver.validate_cols(board))
+        self.assertTrue(solver.validate_nonets(board))
+        self.assertNotEqual(random_grid(random.Random(2)), grid)
+
+    def test_cages(self):
+        rng = random.Random(3)
+        grid = random_grid(rng)
+        for min_size, max_size in ((1, 1), (2, 4), (4, 7)):
+            cages = random_cages(rng, grid, min_size, max_size)
+            cells = sorted(y * 9 + x for _, fields in cages for x, y in fields)
+            self.assertEqual(cells, list(range(81)))
+            for total, fields in cages:
+                indexes = [y * 9 + x for x, y in fields]
+                self.assertTrue(min_size <= len(indexes) <= max_size)
+                self.assertEqual(total, sum(grid[index] for index in indexes))
+                self.assertEqual(len({grid[index] for index in indexes}), len(indexes))
+                # La jaula es conexa: se recorre entera desde su primera celda
+                reached = {indexes[0]}
+                pending = [indexes[0]]
+                while pending:
+                    for neighbour in neighbours(pending.pop()):
+                        if neighbour in indexes and neighbour not in reached:
+                            reached.add(neighbour)
+                            pending.append(neighbour)
+                self.assertEqual(reached, set(indexes))
+        with self.assertRaises(ValueError):
+            random_cages(rng, grid, 3, 2)
+
+    def test_unique(self):
+        board, cages, givens, nodes, resolved = generate(random.Random(4))
+        self.assertEqual(solver.count_solutions(board, cages), 1)
+        self.assertEqual(sum(value != 0 for row in board for value in row), givens)
+        self.assertLess(givens, 81)
+        self.assertGreaterEqual(sum(resolved.values()) + nodes, 81 - givens)
+
+        generated = generate(random.Random(4), givens=40)
+        self.assertEqual(sum(value != 0 for row in generated.board for value in row), 40)
+        self.assertEqual(solver.count_solutions(generated.board, generated.cages), 1)
+        self.assertEqual(generated.to_dict()["difficulty"],
+                         {"givens": 40, "nodes": generated.nodes, "resolved": generated.resolved})
+
+    def test_seed(self):
+        first = list(generate_many(2, "semilla"))
+        self.assertEqual(list(generate_many(2, "semilla", jobs=2)), first)
+        self.assertNotEqual(list(generate_many(2, "otra")), first)
+
+    def test_budget(self):
+        # Sin valores iniciales ni propagación, la búsqueda no encuentra ninguna solución en pocos nodos
+        rng = random.Random(6)
+        cages = random_cages(rng, random_grid(rng), 4, 7)
+        board = [[0] * 9 for _ in range(9)]
+        budget = NodeBudget(2000)
+        self.assertEqual(solver.count_solutions(board, cages, 2, (), "mrv", cancelled=budget), 0)
+        self.assertTrue(budget.exhausted)
+        with self.assertRaises(ValueError):
+            solver.count_solutions(board, cages, backend="dlx", cancelled=NodeBudget(2000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import copy
+import unittest
+
+import solver
+from solver import bitmask, iterative
+from solver.ordering import make_selector, static_order
+from solver.propagation import Propagator
+from solver.puzzle import Puzzle
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.puzzle = Puzzle(self.board, self.cages)
+        self.solution = copy.deepcopy(self.board)
+        solver.solve(self.solution, self.cages)
+
+    def test_same_result_as_recursive(self):
+        for rules in [(), ["naked_singles"], solver.RULES]:
+            for ordering in ["row_major", "mrv"]:
+                result = bitmask.search(self.puzzle.copy(), rules, ordering=ordering)
+                puzzle = self.puzzle.copy()
+                self.assertTupleEqual(bitmask.search(puzzle, rules, ordering=ordering, engine="iterative"), result)
+                self.assertListEqual(puzzle.to_board(), self.solution)
+
+    def test_suspend_and_resume(self):
+        state = bitmask.prepare(self.puzzle)
+        search = iterative.IterativeSearch(state, order=static_order("row_major", state, self.puzzle))
+        self.assertEqual(search.run(max_nodes=100), iterative.SEARCHING)
+        self.assertEqual(search.nodes, 100)
+        frames = search.frames()
+        self.assertEqual(len(frames), search.depth)
+        self.assertEqual(frames[0][0], 0)
+        while search.run(max_nodes=1000) == iterative.SEARCHING:
+            pass
+        self.assertEqual(search.status, iterative.SOLVED)
+        self.assertListEqual(state.values[:9], self.solution[0])
+
+    def test_suspend_and_resume_propagating(self):
+        state = bitmask.prepare(self.puzzle)
+        propagator = Propagator(state, self.puzzle, ["naked_singles"])
+        search = iterative.IterativeSearch(state, propagator=propagator,
+                                           select=make_selector("row_major", state, self.puzzle))
+        self.assertEqual(search.run(max_nodes=10), iterative.SEARCHING)
+        self.assertEqual(search.run(), iterative.SOLVED)
+        self.assertEqual(search.run(), iterative.SOLVED)
+        self.assertListEqual(state.values[72:], self.solution[8])
+
+    def test_unsolvable(self):
+        puzzle = Puzzle(*solver.load_from_file("puzzles/test_solve.json"))
+        state = bitmask.BitmaskState(puzzle)
+        search = iterative.IterativeSearch(state, order=static_order("row_major", state, puzzle))
+        self.assertEqual(search.run(), iterative.UNSOLVABLE)
+        self.assertEqual(search.depth, 0)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            bitmask.search(self.puzzle, engine="threaded")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import copy
+import unittest
+
+import solver
+from solver import bitmask, ordering
+from solver.puzzle import Puzzle
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.puzzle = Puzzle(self.board, self.cages)
+        self.solution = copy.deepcopy(self.board)
+        solver.solve(self.solution, self.cages)
+
+    def test_static_order(self):
+        state = bitmask.prepare(self.puzzle)
+        row_major = ordering.static_order("row_major", state, self.puzzle)
+        self.assertEqual(row_major[:3], [0, 1, 2])
+        self.assertNotIn(14, row_major)  # La jaula de una celda en (5, 1) ya está rellena
+        static = ordering.static_order("static", state, self.puzzle)
+        self.assertCountEqual(static, row_major)
+        # La jaula de 3 en dos celdas solo admite 1 + 2, así que va antes que la de 13 en dos celdas
+        self.assertLess(static.index(9), static.index(0))
+        with self.assertRaises(ValueError):
+            ordering.static_order("mrv", state, self.puzzle)
+
+    def test_make_selector(self):
+        state = bitmask.prepare(self.puzzle)
+        self.assertEqual(ordering.make_selector("row_major", state, self.puzzle)(), 0)
+        mrv = ordering.make_selector("mrv", state, self.puzzle)()
+        self.assertEqual(bin(state.candidates(mrv)).count("1"),
+                         min(bin(state.candidates(index)).count("1")
+                             for index in range(81) if not state.values[index]))
+        with self.assertRaises(ValueError):
+            ordering.make_selector("random", state, self.puzzle)
+
+    def test_orderings_solve(self):
+        for name in ordering.ORDERINGS:
+            for rules in [(), solver.RULES]:
+                puzzle = self.puzzle.copy()
+                self.assertTrue(bitmask.search(puzzle, rules, ordering=name)[0])
+                self.assertListEqual(puzzle.to_board(), self.solution)
+
+
+if __name__ == '__main__':
+    unittest.main()
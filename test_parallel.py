@@ -0,0 +1,48 @@
+import copy
+import unittest
+
+import solver
+from solver import parallel
+from solver.puzzle import Puzzle
+from solver.stats import SolveStats
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.solution = copy.deepcopy(self.board)
+        solver.solve(self.solution, self.cages)
+        self.row_cages = [(45, [(x, y) for x in range(9)]) for y in range(9)]
+
+    def test_split(self):
+        puzzle = Puzzle(self.board, self.cages)
+        subproblems, depth = parallel.split(puzzle, (), 8)
+        self.assertGreater(len(subproblems), 1)
+        self.assertGreater(depth, 0)
+        # Exactamente uno de los subproblemas contiene la solución única
+        counts = [solver.count_solutions([list(board[y * 9:y * 9 + 9]) for y in range(9)], self.cages)
+                  for board in subproblems]
+        self.assertEqual(sum(counts), 1)
+
+    def test_solve(self):
+        for rules in [(), solver.RULES]:
+            board = copy.deepcopy(self.board)
+            stats = SolveStats()
+            self.assertTrue(solver.solve(board, self.cages, rules, stats=stats, workers=2))
+            self.assertListEqual(board, self.solution)
+
+    def test_unsolvable(self):
+        board, cages = solver.load_from_file("puzzles/test_solve.json")
+        self.assertFalse(solver.solve(board, cages, (), workers=2))
+        self.assertEqual(solver.count_solutions(board, cages, workers=2), 0)
+
+    def test_count(self):
+        ambiguous = copy.deepcopy(self.solution)
+        for x, y in [(0, 0), (5, 0), (0, 2), (5, 2)]:
+            ambiguous[y][x] = 0
+        self.assertEqual(solver.count_solutions(ambiguous, self.row_cages, None, (), workers=2), 2)
+        self.assertEqual(solver.count_solutions(self.board, self.cages, None, (), workers=2), 1)
+
+        empty = [[0] * 9 for _ in range(9)]
+        self.assertEqual(solver.count_solutions(empty, self.row_cages, 5, (), workers=2), 5)
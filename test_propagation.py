@@ -0,0 +1,71 @@
+import copy
+import unittest
+
+import solver
+from solver import bitmask, propagation
+from solver.common import mask_values
+from solver.puzzle import Puzzle
+from solver.stats import SolveStats
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.puzzle = Puzzle(self.board, self.cages)
+        self.solution = copy.deepcopy(self.board)
+        solver.solve(self.solution, self.cages)
+
+    def test_find_sum_groups(self):
+        groups = propagation.find_sum_groups(self.puzzle)
+        # En la primera fila, las jaulas de (0, 0) a (1, 0), (5, 0) a (6, 0) y (7, 0) a (8, 0) están dentro, así
+        # que las celdas (2, 0), (3, 0) y (4, 0) deben sumar 45 - 13 - 15 - 5 = 12
+        self.assertIn(((2, 3, 4), 12, True), groups)
+        for cells, total, _ in groups:
+            self.assertEqual(total, sum(self.solution[index // 9][index % 9] for index in cells))
+
+    def test_rules_only_remove_invalid_values(self):
+        for rule in propagation.RULES:
+            state = bitmask.prepare(self.puzzle)
+            self.assertTrue(propagation.Propagator(state, self.puzzle, [rule]).propagate())
+            for index in range(81):
+                value = self.solution[index // 9][index % 9]
+                if state.values[index]:
+                    self.assertEqual(state.values[index], value)
+                else:
+                    self.assertIn(value, mask_values(state.candidates(index)))
+
+    def test_undo(self):
+        state = bitmask.prepare(self.puzzle)
+        before = [state.candidates(index) for index in range(81)]
+        self.assertTrue(propagation.Propagator(state, self.puzzle).propagate())
+        state.undo(0)
+        self.assertListEqual([state.candidates(index) for index in range(81)], before)
+
+    def test_resolved_counts(self):
+        stats = SolveStats()
+        puzzle = self.puzzle.copy()
+        success, nodes, _ = bitmask.search(puzzle, propagation.RULES, stats)
+        self.assertTrue(success)
+        self.assertEqual(nodes, 0)
+        self.assertListEqual(puzzle.to_board(), self.solution)
+        self.assertEqual(sum(stats.resolved.values()), 81 - 2)
+        self.assertGreater(stats.eliminated["cage_combinations"], 0)
+
+    def test_disabled_rules(self):
+        stats = SolveStats()
+        puzzle = self.puzzle.copy()
+        self.assertTrue(bitmask.search(puzzle, ["naked_singles"], stats)[0])
+        self.assertListEqual(puzzle.to_board(), self.solution)
+        self.assertEqual(stats.resolved["hidden_singles"], 0)
+        self.assertEqual(stats.resolved["innies_outies"], 0)
+
+    def test_unknown_rule(self):
+        state = bitmask.prepare(self.puzzle)
+        with self.assertRaises(ValueError):
+            propagation.Propagator(state, self.puzzle, ["x_wing"])
+
+
+if __name__ == '__main__':
+    unittest.main()
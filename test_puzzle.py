@@ -0,0 +1,38 @@
+import unittest
+
+import solver
+from solver.puzzle import Puzzle
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.puzzle = Puzzle(self.board, self.cages)
+
+    def test_cage_arrays(self):
+        self.assertEqual(self.puzzle.cage_count, len(self.cages))
+        self.assertEqual(sum(self.puzzle.cage_sizes), 81)
+        for cage, (total, fields) in enumerate(self.cages):
+            self.assertEqual(self.puzzle.cage_totals[cage], total)
+            for x, y in fields:
+                self.assertEqual(self.puzzle.cell_cage[y * 9 + x], cage)
+
+    def test_peers(self):
+        self.assertTrue(all(len(peers) == 20 for peers in self.puzzle.peers))
+        self.assertNotIn(0, self.puzzle.peers[0])
+        self.assertIn(80, self.puzzle.peers[8])
+
+    def test_round_trip(self):
+        self.assertListEqual(self.puzzle.to_board(), self.board)
+        self.assertListEqual(self.puzzle.to_cages(), [(total, list(fields)) for total, fields in self.cages])
+
+    def test_copy(self):
+        copied = self.puzzle.copy()
+        copied.board[0] = 4
+        self.assertEqual(self.puzzle.board[0], self.board[0][0])
+        self.assertIs(copied.cell_cage, self.puzzle.cell_cage)
+
+    def test_missing_cage(self):
+        with self.assertRaises(AssertionError):
+            Puzzle(self.board, self.cages[1:])
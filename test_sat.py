@@ -0,0 +1,80 @@
+import copy
+import io
+import sys
+import unittest
+
+import solver
+from solver.puzzle import Puzzle
+from solver.sat import SatSolver, encode, parse_model, read_dimacs, to_dimacs
+from solver.stats import SolveStats
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.solution = copy.deepcopy(self.board)
+        solver.solve(self.solution, self.cages)
+
+    def test_sat_solver(self):
+        model = SatSolver(3, [[1, 2], [-1, 3], [-3, -2], [-2, 1]]).solve()
+        self.assertListEqual(model, [1, -2, 3])
+        self.assertIsNone(SatSolver(1, [[1], [-1]]).solve())
+        self.assertIsNone(SatSolver(1, [[]]).solve())
+
+    def test_pigeonhole(self):
+        # Cuatro palomas en tres agujeros: insatisfacible, y solo se demuestra aprendiendo cláusulas
+        pigeons, holes = 4, 3
+        clauses = [[pigeon * holes + hole + 1 for hole in range(holes)] for pigeon in range(pigeons)]
+        for hole in range(holes):
+            for first in range(pigeons):
+                for second in range(first + 1, pigeons):
+                    clauses.append([-(first * holes + hole + 1), -(second * holes + hole + 1)])
+        sat_solver = SatSolver(pigeons * holes, clauses)
+        self.assertIsNone(sat_solver.solve())
+        self.assertGreater(sat_solver.conflicts, 0)
+
+    def test_dimacs(self):
+        variables, clauses = encode(Puzzle(self.board, self.cages))
+        out = io.StringIO()
+        to_dimacs(variables, clauses, out)
+        self.assertTrue(out.getvalue().startswith(f"p cnf {variables} {len(clauses)}\n"))
+        self.assertEqual(read_dimacs(io.StringIO(out.getvalue())), (variables, clauses))
+
+    def test_parse_model(self):
+        self.assertListEqual(parse_model("c comentario\ns SATISFIABLE\nv 1 -2\nv 3 0\n"), [1, -2, 3])
+        self.assertIsNone(parse_model("s UNSATISFIABLE\n"))
+        with self.assertRaises(ValueError):
+            parse_model("")
+
+    def test_solve(self):
+        board = copy.deepcopy(self.board)
+        stats = SolveStats()
+        self.assertTrue(solver.solve(board, self.cages, debug=True, stats=stats, backend="sat"))
+        self.assertListEqual(board, self.solution)
+        self.assertGreater(stats.phases["search"], 0)
+
+        unsolvable, cages = solver.load_from_file("puzzles/test_solve.json")
+        self.assertFalse(solver.solve(unsolvable, cages, backend="sat"))
+
+    def test_external(self):
+        # El propio módulo se comporta como un solucionador SAT de línea de comandos
+        command = f"{sys.executable} -m solver.sat"
+        board = copy.deepcopy(self.board)
+        self.assertTrue(solver.solve(board, self.cages, backend="sat", sat_command=command))
+        self.assertListEqual(board, self.solution)
+
+        unsolvable, cages = solver.load_from_file("puzzles/test_solve.json")
+        self.assertFalse(solver.solve(unsolvable, cages, backend="sat", sat_command=command))
+
+    def test_count(self):
+        row_cages = [(45, [(x, y) for x in range(9)]) for y in range(9)]
+        ambiguous = copy.deepcopy(self.solution)
+        for x, y in [(0, 0), (5, 0), (0, 2), (5, 2)]:
+            ambiguous[y][x] = 0
+        self.assertEqual(solver.count_solutions(ambiguous, row_cages, None, backend="sat"), 2)
+        self.assertEqual(solver.count_solutions(self.board, self.cages, backend="sat"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import unittest
+
+import solver
+from solver.loadtest import http_request
+from solver.server import SolveService, start_server
+from solver.solver import load_puzzle
+
+
+def slow_payload(time_limit):
+    """ Una petición que agota su tiempo límite: un tablero de 12 x 12 vacío, sin reglas de propagación. """
+    _, cages, _ = load_puzzle("puzzles/sizes/killer_12x12.json")
+    return {"board": [[0] * 12 for _ in range(12)], "cages": cages, "rules": [], "time_limit": time_limit}
+
+
+class Test(unittest.TestCase):
+
+    def run_service(self, scenario, queue_size=8):
+        """ Arranca un servicio con un proceso en un puerto libre, ejecuta el escenario y lo detiene. """
+        async def run():
+            service = SolveService(1, queue_size)
+            server = await start_server(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+
+            async def request(method, path, payload=None):
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                try:
+                    return await http_request(reader, writer, method, path, payload)
+                finally:
+                    writer.close()
+            try:
+                return await scenario(request)
+            finally:
+                server.close()
+                await server.wait_closed()
+                await service.stop()
+        return asyncio.run(run())
+
+    def test_solve(self):
+        board, cages = solver.load_from_file("Killer.json")
+
+        async def scenario(request):
+            code, response = await request("POST", "/solve", {"board": board, "cages": cages})
+            self.assertEqual(code, 200)
+            self.assertEqual(response["status"], "solved")
+            self.assertFalse(response["coalesced"])
+            self.assertTrue(solver.validate(response["board"], cages))
+            code, metrics = await request("GET", "/metrics")
+            self.assertEqual(code, 200)
+            self.assertEqual(metrics["requests"], 1)
+            self.assertEqual(metrics["statuses"], {"solved": 1})
+            self.assertEqual(metrics["latency"]["count"], 1)
+            self.assertEqual(metrics["queue_depth"], 0)
+        self.run_service(scenario)
+
+    def test_coalesce(self):
+        async def scenario(request):
+            payload = slow_payload(0.3)
+            responses = await asyncio.gather(*(request("POST", "/solve", payload) for _ in range(4)))
+            self.assertTrue(all(code == 200 for code, _ in responses))
+            self.assertEqual({response["status"] for _, response in responses}, {"budget_exhausted"})
+            self.assertEqual(sum(response["coalesced"] for _, response in responses), 3)
+            _, metrics = await request("GET", "/metrics")
+            self.assertEqual(metrics["coalesced"], 3)
+        self.run_service(scenario)
+
+    def test_backpressure(self):
+        async def scenario(request):
+            running = asyncio.create_task(request("POST", "/solve", slow_payload(0.3)))
+            await asyncio.sleep(0.1)
+            queued = asyncio.create_task(request("POST", "/solve", slow_payload(0.2)))
+            await asyncio.sleep(0.1)
+            code, response = await request("POST", "/solve", slow_payload(0.1))
+            self.assertEqual(code, 503)
+            self.assertEqual((await running)[0], 200)
+            self.assertEqual((await queued)[0], 200)
+            _, metrics = await request("GET", "/metrics")
+            self.assertEqual(metrics["rejected"], 1)
+        self.run_service(scenario, queue_size=1)
+
+    def test_errors(self):
+        async def scenario(request):
+            self.assertEqual((await request("POST", "/solve", {"board": [[0] * 9] * 9}))[0], 400)
+            self.assertEqual((await request("POST", "/solve", [1, 2]))[0], 400)
+            board, cages = solver.load_from_file("Killer.json")
+            self.assertEqual((await request("POST", "/solve", {"board": board, "cages": cages,
+                                                               "rules": ["unknown"]}))[0], 400)
+            for invalid in ({"rules": 5}, {"rules": [["naked_singles"]]}, {"ordering": []}, {"max_nodes": -1},
+                            {"max_nodes": True}, {"max_nodes": 1.5}, {"time_limit": float("nan")},
+                            {"time_limit": float("inf")}, {"time_limit": 0}, {"time_limit": 10 ** 400}):
+                code, response = await request("POST", "/solve", {"board": board, "cages": cages, **invalid})
+                self.assertEqual(code, 400, invalid)
+            huge = [row[:] for row in board]
+            huge[0][0] = 10 ** 30
+            self.assertEqual((await request("POST", "/solve", {"board": huge, "cages": cages}))[0], 400)
+            self.assertEqual((await request("GET", "/solve"))[0], 405)
+            self.assertEqual((await request("GET", "/unknown"))[0], 404)
+        self.run_service(scenario)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import copy
+import unittest
+
+import solver
+from solver.session import Session
+
+# Killer.json se resuelve entero por propagación, así que las pruebas usan menos reglas para que queden
+# celdas sin resolver
+RULES = ("naked_singles",)
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.solution = copy.deepcopy(self.board)
+        self.assertTrue(solver.solve(self.solution, self.cages))
+
+    def test_candidates(self):
+        session = Session(self.board, self.cages, RULES)
+        self.assertTrue(session.solvable())
+        candidates = session.candidates(0, 0)
+        self.assertIn(self.solution[0][0], candidates)
+        self.assertGreater(len(candidates), 1)
+
+        full = Session(self.board, self.cages)
+        self.assertEqual(full.candidates(0, 0), [self.solution[0][0]])
+
+    def test_set_clear(self):
+        session = Session(self.board, self.cages, RULES)
+        before = [session.candidates(x, 0) for x in range(9)]
+        self.assertTrue(session.set_cell(0, 0, self.solution[0][0]))
+        self.assertEqual(session.candidates(0, 0), [self.solution[0][0]])
+        self.assertNotIn(self.solution[0][0], session.candidates(5, 0))
+        self.assertTrue(session.solvable())
+
+        wrong = next(value for value in before[1] if value != self.solution[0][1])
+        session.set_cell(1, 0, wrong)
+        self.assertFalse(session.solvable())
+        self.assertTrue(session.set_cell(1, 0, self.solution[0][1]))
+        self.assertTrue(session.solvable())
+
+        self.assertTrue(session.clear_cell(1, 0))
+        self.assertTrue(session.clear_cell(0, 0))
+        self.assertEqual([session.candidates(x, 0) for x in range(9)], before)
+        self.assertEqual(session.to_board(), self.board)
+
+    def test_contradiction(self):
+        session = Session(self.board, self.cages, RULES)
+        self.assertTrue(session.set_cell(0, 0, self.solution[0][0]))
+        self.assertFalse(session.set_cell(1, 0, self.solution[0][0]))
+        self.assertFalse(session.solvable())
+        # Los valores posteriores a la contradicción se guardan, pero no se aplican hasta borrarla
+        self.assertFalse(session.set_cell(8, 8, self.solution[8][8]))
+        self.assertEqual(session.to_board()[8][8], self.solution[8][8])
+        self.assertTrue(session.clear_cell(1, 0))
+        self.assertEqual(session.candidates(8, 8), [self.solution[8][8]])
+        self.assertTrue(session.solvable())
+
+    def test_edit_cage(self):
+        session = Session(self.board, self.cages, RULES)
+        cage = next(cage for cage, (_, fields) in enumerate(self.cages) if len(fields) > 1)
+        total, fields = self.cages[cage]
+        self.assertFalse(session.edit_cage(cage, total + 50))
+        self.assertFalse(session.solvable())
+        self.assertTrue(session.edit_cage(cage, total))
+        self.assertTrue(session.solvable())
+        with self.assertRaises(AssertionError):
+            session.edit_cage(cage, total, fields[:1])
+        self.assertTrue(session.solvable())
+
+    def test_invalid(self):
+        session = Session(self.board, self.cages, RULES)
+        with self.assertRaises(ValueError):
+            session.set_cell(9, 0, 1)
+        with self.assertRaises(ValueError):
+            session.set_cell(0, 0, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
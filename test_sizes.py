@@ -0,0 +1,105 @@
+import contextlib
+import copy
+import io
+import unittest
+
+import solver
+from solver.cache import puzzle_key
+from solver.grid import STANDARD, box_shape, geometry
+from solver.puzzle import Puzzle
+from solver.session import Session
+from solver.solver import load_puzzle
+
+SIZES = ("puzzles/sizes/killer_6x6.json", "puzzles/sizes/jigsaw_9x9.json", "puzzles/sizes/killer_12x12.json")
+
+
+class Test(unittest.TestCase):
+
+    def test_geometry(self):
+        self.assertEqual(box_shape(6), (2, 3))
+        self.assertEqual(box_shape(9), (3, 3))
+        self.assertEqual(box_shape(12), (3, 4))
+        self.assertEqual(box_shape(16), (4, 4))
+        self.assertIsNone(box_shape(7))
+        self.assertIs(geometry(9), STANDARD)
+        for size in (6, 12, 16):
+            grid = geometry(size)
+            self.assertEqual(len(grid.units), 3 * size)
+            self.assertTrue(all(len(unit) == size for unit in grid.units))
+            height, width = grid.box
+            self.assertEqual(len(grid.peers[0]), 3 * size - height - width - 1)
+        # Unas regiones iguales a las cajas regulares dan la geometría regular
+        boxes = [[(index % 6, index // 6) for index in region] for region in geometry(6).regions]
+        self.assertIs(geometry(6, boxes[::-1]), geometry(6))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            geometry(17)
+        with self.assertRaises(ValueError):
+            geometry(7)
+        with self.assertRaises(ValueError):
+            geometry(4, [[(0, 0), (1, 0), (2, 0), (3, 0)]] * 4)
+        with self.assertRaises(ValueError):
+            Puzzle([[0] * 9] * 8, [])
+
+    def test_solve(self):
+        for filename in SIZES:
+            board, cages, regions = load_puzzle(filename)
+            expected = copy.deepcopy(board)
+            self.assertTrue(solver.solve(expected, cages, regions=regions, debug=True), filename)
+            self.assertTrue(all(expected[y][x] == value for y, row in enumerate(board)
+                                for x, value in enumerate(row) if value))
+            for rules, ordering, engine in (((), "row_major", "recursive"), ((), "static", "iterative"),
+                                            (("naked_singles",), "mrv_cage", "recursive")):
+                solution = copy.deepcopy(board)
+                self.assertTrue(solver.solve(solution, cages, rules, ordering, engine=engine, regions=regions))
+                self.assertTrue(solver.validate(solution, cages, regions), filename)
+
+    def test_backends(self):
+        for filename in SIZES[:2]:
+            board, cages, regions = load_puzzle(filename)
+            expected = copy.deepcopy(board)
+            self.assertTrue(solver.solve(expected, cages, regions=regions))
+            self.assertEqual(solver.count_solutions(board, cages, regions=regions), 1)
+            for backend in ("dlx", "sat"):
+                solution = copy.deepcopy(board)
+                self.assertTrue(solver.solve(solution, cages, backend=backend, regions=regions))
+                self.assertEqual(solution, expected, backend)
+
+    def test_jigsaw(self):
+        board, cages, regions = load_puzzle("puzzles/sizes/jigsaw_9x9.json")
+        solution = copy.deepcopy(board)
+        self.assertTrue(solver.solve(solution, cages, regions=regions))
+        # La solución respeta las regiones irregulares, no los nonetos
+        self.assertTrue(solver.validate_nonets(solution, regions))
+        self.assertFalse(solver.validate_nonets(solution))
+        self.assertNotEqual(puzzle_key(Puzzle(board, cages, regions)), puzzle_key(Puzzle(board, cages)))
+
+    def test_session(self):
+        board, cages, _ = load_puzzle("puzzles/sizes/killer_6x6.json")
+        session = Session([[0] * 6 for _ in range(6)], cages, ("naked_singles",))
+        self.assertTrue(set(session.candidates(0, 0)) <= set(range(1, 7)))
+        self.assertTrue(session.solvable())
+        with self.assertRaises(ValueError):
+            session.set_cell(0, 0, 7)
+        with self.assertRaises(ValueError):
+            session.set_cell(6, 0, 1)
+
+    def test_print_board(self):
+        board, cages, _ = load_puzzle("puzzles/sizes/killer_12x12.json")
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            solver.print_board(board, cages)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2 * 12 + 1)
+        self.assertEqual(lines[0], "+" + "----+" * 12)
+
+    def test_nonet_range(self):
+        self.assertListEqual(list(solver.find_nonet_range(5, 2, 6)), [4, 5])
+        self.assertListEqual(list(solver.find_nonet_range(5, 3, 6)), [3, 4, 5])
+        self.assertListEqual(list(solver.find_nonet_range(13, 4, 16)), [12, 13, 14, 15])
+        self.assertListEqual(list(solver.find_nonet_range(800, 4, 12)), [8, 9, 10, 11])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -125,6 +125,21 @@ class Test(unittest.TestCase):
     def test_validate(self):
         self.assertTrue(solver.validate(self.board, self.cages))
 
+    def test_solve(self):
+        board = [[0] * 9 for _ in range(9)]
+        classic_board = [[0] * 9 for _ in range(9)]
+        dlx_board = [[0] * 9 for _ in range(9)]
+        self.assertTrue(solver.solve(board, self.cages, debug=True))
+        self.assertTrue(solver.solve_classic(classic_board, self.cages))
+        self.assertTrue(solver.solve(dlx_board, self.cages, debug=True, backend="dlx"))
+        self.assertListEqual(board, classic_board)
+        self.assertListEqual(board, dlx_board)
+
+    def test_solve_unsolvable(self):
+        # La celda (5, 5) tiene un 6 y la jaula de una celda en (5, 1) también exige un 6 en la misma columna
+        self.assertFalse(solver.solve(self.board, self.cages))
+        self.assertFalse(solver.solve(self.board, self.cages, backend="dlx"))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import unittest
+
+from solver.suite import ROOT, measure_startup
+
+# Módulos que resolver un archivo con las opciones por defecto no necesita y no debe importar
+HEAVY_MODULES = ("argparse", "cProfile", "multiprocessing", "concurrent.futures", "sqlite3", "hashlib",
+                 "solver.sat", "solver.dlx", "solver.cache", "solver.batch", "solver.trace")
+
+
+class Test(unittest.TestCase):
+
+    def test_fast_path(self):
+        process = subprocess.run([sys.executable, "-X", "importtime", "solve.py", "Killer.json"], cwd=ROOT,
+                                 capture_output=True, text=True, check=True)
+        self.assertIn("Usando tablero y jaulas de Killer.json", process.stdout)
+        self.assertIn("| 1   8 | 5   7   6 | 3 | 4   2 | 9 |", process.stdout)
+        imported = {line.rpartition("|")[2].strip() for line in process.stderr.splitlines()}
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+
+    def test_options(self):
+        process = subprocess.run([sys.executable, "solve.py", "--disable-rule", "innies_outies", "Killer.json"],
+                                 cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertIn("| 1   8 | 5   7   6 | 3 | 4   2 | 9 |", process.stdout)
+
+    def test_measure_startup(self):
+        result = measure_startup(repeat=1, warmup=0)
+        self.assertLessEqual(result["min"], result["median"])
+        self.assertGreater(result["median"], 0)
+        self.assertGreater(result["target"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import copy
+import json
+import unittest
+
+import solver
+from solver import bitmask
+from solver.puzzle import Puzzle
+from solver.stats import SolveStats
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+
+    def test_search_stats(self):
+        stats = SolveStats()
+        success, nodes, checks = bitmask.search(Puzzle(self.board, self.cages), (), stats)
+        self.assertTrue(success)
+        self.assertEqual(stats.nodes, nodes)
+        self.assertEqual(stats.checks, checks)
+        self.assertEqual(sum(stats.depth_nodes), nodes)
+        # Todos los nodos son retrocesos salvo uno por cada celda vacía en el camino de la solución
+        self.assertEqual(stats.backtracks, nodes - stats.max_depth)
+        self.assertEqual(stats.depth_nodes[0], 1)
+        self.assertGreater(stats.phases["search"], 0)
+
+    def test_engines_agree(self):
+        results = []
+        for engine in bitmask.ENGINES:
+            for rules in [(), ["naked_singles"]]:
+                stats = SolveStats()
+                bitmask.search(Puzzle(self.board, self.cages), rules, stats, engine=engine)
+                results.append((stats.nodes, stats.backtracks, stats.depth_nodes))
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[1], results[3])
+
+    def test_solve_stats(self):
+        board = copy.deepcopy(self.board)
+        first, second = SolveStats(), SolveStats()
+        self.assertTrue(solver.solve(board, self.cages, (), stats=first))
+        self.assertTrue(solver.solve(copy.deepcopy(self.board), self.cages, (), stats=second))
+        self.assertEqual(first.nodes, second.nodes)
+        self.assertGreater(first.phases["compile"], 0)
+
+        data = json.loads(first.to_json())
+        self.assertEqual(data["nodes"], first.nodes)
+        self.assertEqual(len(data["depth_nodes"]), first.max_depth)
+        self.assertIn("Retrocesos", first.to_text())
+
+    def test_classic_stats(self):
+        stats = SolveStats()
+        self.assertTrue(solver.solve_classic(copy.deepcopy(self.board), self.cages, stats))
+        self.assertGreater(stats.nodes, stats.backtracks)
+        self.assertEqual(stats.checks, 1)
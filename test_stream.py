@@ -0,0 +1,76 @@
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import solver
+from solver import stream
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.solution = copy.deepcopy(self.board)
+        solver.solve(self.solution, self.cages)
+        self.line = json.dumps({"board": self.board, "cages": self.cages})
+
+    def test_parse_line(self):
+        board, cages = stream.parse_line(self.line)
+        self.assertListEqual(board, self.board)
+        compact = json.dumps({"board": stream.board_string(self.board).replace("0", "."), "cages": self.cages})
+        self.assertListEqual(stream.parse_line(compact)[0], self.board)
+        with self.assertRaises(ValueError):
+            stream.parse_board("123")
+        self.assertListEqual(stream.parse_board("1" * 36), [[1] * 6] * 6)
+        with self.assertRaises(ValueError):
+            stream.board_string([[10] * 12] * 12)
+
+    def test_solve_stream(self):
+        lines = iter([self.line + "\n", "\n", "{\"board\": []}\n", self.line + "\n"])
+        results = list(stream.solve_stream(lines))
+        self.assertListEqual([result.position for result in results], [1, 3, 4])
+        self.assertListEqual([result.status for result in results], ["solved", "error", "solved"])
+        self.assertEqual(stream.format_result(results[0]), stream.board_string(self.solution))
+
+    def test_run_stream(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as corpus:
+            corpus.write(self.line + "\nnot json\n")
+        self.addCleanup(os.remove, corpus.name)
+
+        out, err = io.StringIO(), io.StringIO()
+        self.assertEqual(stream.run_stream([corpus.name], "jsonl", out=out, err=err), 1)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(records[0]["solution"], stream.board_string(self.solution))
+        self.assertIn("nodes", records[0]["stats"])
+        self.assertEqual(records[1]["status"], "error")
+        self.assertEqual(err.getvalue(), "")
+
+        out = io.StringIO()
+        self.assertEqual(stream.run_stream([corpus.name], "string", out=out, err=err), 1)
+        self.assertEqual(out.getvalue(), stream.board_string(self.solution) + "\n")
+        self.assertTrue(err.getvalue().startswith(f"{corpus.name}:2: error"))
+
+    def test_sizes(self):
+        lines = []
+        for filename in ("puzzles/sizes/jigsaw_9x9.json", "puzzles/sizes/killer_12x12.json"):
+            with open(filename) as puzzle_file:
+                lines.append(json.dumps(json.load(puzzle_file)))
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as corpus:
+            corpus.write("\n".join(lines) + "\n")
+        self.addCleanup(os.remove, corpus.name)
+
+        out, err = io.StringIO(), io.StringIO()
+        self.assertEqual(stream.run_stream([corpus.name], "jsonl", out=out, err=err), 0)
+        jigsaw, large = [json.loads(line)["solution"] for line in out.getvalue().splitlines()]
+        board, cages, regions = stream.parse_puzzle(lines[0])
+        self.assertTrue(solver.validate(stream.parse_board(jigsaw), cages, regions))
+        self.assertEqual(len(large), 12)
+        self.assertTrue(solver.validate(large, stream.parse_puzzle(lines[1])[1]))
+
+        out = io.StringIO()
+        self.assertEqual(stream.run_stream([corpus.name], "string", out=out, err=err), 1)
+        self.assertEqual(out.getvalue(), jigsaw + "\n")
+        self.assertIn(f"{corpus.name}:2: la salida string solo admite", err.getvalue())
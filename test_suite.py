@@ -0,0 +1,51 @@
+import contextlib
+import io
+import unittest
+
+import solver
+from solver.suite import TIERS, compare_results, load_corpus, main, measure, percentile
+
+
+class Test(unittest.TestCase):
+
+    def test_percentile(self):
+        values = [5.0, 1.0, 4.0, 2.0, 3.0]
+        self.assertEqual(percentile(values, 0.5), 3.0)
+        self.assertEqual(percentile(values, 0.95), 5.0)
+        self.assertEqual(percentile([7.0], 0.95), 7.0)
+
+    def test_corpus(self):
+        cases = load_corpus()
+        self.assertSetEqual({case.tier for case in cases}, set(TIERS))
+        for case in load_corpus(["easy", "medium"]):
+            self.assertEqual(solver.count_solutions(case.board, case.cages), 1, case.name)
+
+    def test_measure(self):
+        case = load_corpus(["reference"])[0]
+        board = [row[:] for row in case.board]
+        result = measure(case, repeat=3, warmup=0)
+        self.assertEqual(result["status"], "solved")
+        self.assertLessEqual(result["median"], result["p95"])
+        self.assertGreater(result["peak_memory"], 0)
+        self.assertListEqual(case.board, board)  # Cada medida usa una copia del tablero
+
+        unsolvable = load_corpus(["unsolvable"])[0]
+        self.assertEqual(measure(unsolvable, repeat=1, warmup=0, rules=())["status"], "unsolvable")
+        with self.assertRaises(ValueError):
+            measure(case, repeat=0)
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            main(["run", "--tier", "reference", "--repeat", "0"])
+
+    def test_compare(self):
+        def results(*medians):
+            return {"results": [{"tier": "easy", "name": str(index), "status": "solved", "median": median,
+                                 "nodes": 0} for index, median in enumerate(medians)]}
+
+        out = io.StringIO()
+        self.assertEqual(compare_results(results(1.0, 1.0, 1.0), results(1.05, 1.5, 0.5), 0.10, out), 1)
+        self.assertIn("REGRESIÓN", out.getvalue())
+        self.assertEqual(compare_results(results(1.0), results(1.5), 0.60, io.StringIO()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
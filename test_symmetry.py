@@ -0,0 +1,83 @@
+import copy
+import unittest
+
+import solver
+from solver.cache import SolutionCache
+from solver.symmetry import Transform, canonicalize, cell_permutations
+
+
+def rotate(board):
+    """ Gira un tablero 90 grados en el sentido de las agujas del reloj. """
+    return [[board[8 - x][y] for x in range(9)] for y in range(9)]
+
+
+def rotate_cages(cages):
+    """ Gira las jaulas de un tablero igual que `rotate`. """
+    return [(total, [(8 - y, x) for x, y in fields]) for total, fields in cages]
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+        self.solution = copy.deepcopy(self.board)
+        solver.solve(self.solution, self.cages)
+
+    def test_permutations(self):
+        cells = cell_permutations()
+        self.assertEqual(len(set(cells)), 288)
+        self.assertEqual(cells[0], tuple(range(81)))
+        for permutation in cells:
+            self.assertListEqual(sorted(permutation), list(range(81)))
+
+    def test_transform(self):
+        transform = Transform(cell_permutations()[200], (0, 3, 1, 2, 4, 5, 6, 7, 9, 8))
+        moved = transform.apply(self.solution)
+        self.assertNotEqual(moved, self.solution)
+        self.assertListEqual(transform.restore([value for row in moved for value in row]), self.solution)
+
+    def test_canonical_killer(self):
+        canonical_board, canonical_cages, _ = canonicalize(self.board, self.cages)
+        variants = [(rotate(self.board), rotate_cages(self.cages))]
+        for permutation in cell_permutations()[::37]:
+            transform = Transform(permutation)
+            variants.append((transform.apply(self.board), transform.apply_cages(self.cages)))
+        for board, cages in variants:
+            board_, cages_, transform = canonicalize(board, cages)
+            self.assertListEqual(board_, canonical_board)
+            self.assertListEqual(cages_, canonical_cages)
+
+            solution = copy.deepcopy(board_)
+            self.assertTrue(solver.solve(solution, cages_))
+            restored = transform.restore([value for row in solution for value in row])
+            self.assertTrue(solver.validate(restored, cages))
+            self.assertNotIn(0, [value for row in restored for value in row])
+
+    def test_canonical_classic(self):
+        # Sin jaulas, los tableros que solo se diferencian en el nombre de los valores también son equivalentes
+        board = copy.deepcopy(self.solution)
+        for y in range(9):
+            for x in range(9):
+                if (x + 2 * y) % 3:
+                    board[y][x] = 0
+        relabeled = [[(value % 9) + 1 if value else 0 for value in row] for row in rotate(board)]
+        canonical, cages, transform = canonicalize(board, [])
+        self.assertListEqual(canonicalize(relabeled, [])[0], canonical)
+        self.assertListEqual(cages, [])
+        self.assertEqual(next(value for row in canonical for value in row if value), 1)
+        self.assertListEqual(transform.restore([value for row in canonical for value in row]), board)
+
+    def test_symmetric_cache(self):
+        with SolutionCache(":memory:", symmetric=True) as cache:
+            board = copy.deepcopy(self.board)
+            self.assertTrue(solver.solve(board, self.cages, cache=cache))
+            self.assertListEqual(board, self.solution)
+
+            rotated = rotate(self.board)
+            self.assertTrue(solver.solve(rotated, rotate_cages(self.cages), debug=True, cache=cache))
+            self.assertListEqual(rotated, rotate(self.solution))
+            self.assertEqual(cache.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
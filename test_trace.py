@@ -0,0 +1,94 @@
+import copy
+import io
+import json
+import unittest
+
+import solver
+from solver.stats import SolveStats
+from solver.trace import ROOT_FRAME, SearchTrace
+
+# Reglas que dejan trabajo a la búsqueda en Killer.json, para que la traza tenga nodos y retrocesos
+FEW_RULES = ("naked_singles", "hidden_singles")
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.board, self.cages = solver.load_from_file("Killer.json")
+
+    def solve_traced(self, rules=FEW_RULES, ordering="row_major", trace=None):
+        board = copy.deepcopy(self.board)
+        stats = SolveStats()
+        trace = trace or SearchTrace()
+        self.assertTrue(solver.solve(board, self.cages, rules, ordering, stats=stats, trace=trace))
+        return board, stats, trace
+
+    def test_same_solution(self):
+        for rules in ((), FEW_RULES, solver.RULES):
+            for ordering in solver.ORDERINGS:
+                expected = copy.deepcopy(self.board)
+                self.assertTrue(solver.solve(expected, self.cages, rules, ordering))
+                board, stats, trace = self.solve_traced(rules, ordering)
+                self.assertEqual(board, expected)
+                self.assertEqual(sum(trace.depth_nodes), stats.nodes)
+                self.assertEqual(sum(trace.branching), stats.nodes)
+
+    def test_counters(self):
+        _, stats, trace = self.solve_traced()
+        self.assertGreater(stats.nodes, 0)
+        cells = trace.top_backtracks()
+        self.assertTrue(cells)
+        counts = [count for _, count in cells]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertLessEqual(sum(trace.backtracks), stats.checks)
+        self.assertGreater(trace.propagation_time, 0)
+        self.assertGreaterEqual(trace.search_time, trace.propagation_time)
+        self.assertFalse(trace.frames)
+        self.assertIn("Celdas con más retrocesos", trace.to_text())
+
+    def test_folded(self):
+        _, stats, trace = self.solve_traced()
+        out = io.StringIO()
+        trace.write(out, "folded")
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith(ROOT_FRAME))
+            self.assertGreater(int(count), 0)
+        # Cada nodo abre un marco con su celda, así que el camino más largo tiene la profundidad máxima
+        self.assertEqual(max(line.count(";(") for line in lines), stats.max_depth)
+
+    def test_chrome(self):
+        _, stats, trace = self.solve_traced()
+        out = io.StringIO()
+        trace.write(out, "chrome")
+        data = json.loads(out.getvalue())
+        nodes = [event for event in data["traceEvents"] if "args" in event]
+        self.assertEqual(len(nodes), stats.nodes)
+        self.assertTrue(all(event["ph"] == "X" and event["dur"] >= 0 for event in data["traceEvents"]))
+        self.assertEqual(data["otherData"]["branching"], trace.branching)
+
+    def test_max_events(self):
+        _, stats, trace = self.solve_traced(trace=SearchTrace(max_events=5))
+        self.assertEqual(len(trace.events), 5)
+        self.assertGreater(trace.dropped, 0)
+        self.assertEqual(sum(trace.depth_nodes), stats.nodes)
+
+    def test_accumulate(self):
+        trace = SearchTrace()
+        _, first, _ = self.solve_traced(trace=trace)
+        _, second, _ = self.solve_traced(trace=trace)
+        self.assertEqual(sum(trace.depth_nodes), first.nodes + second.nodes)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            solver.solve(copy.deepcopy(self.board), self.cages, backend="dlx", trace=SearchTrace())
+        with self.assertRaises(ValueError):
+            solver.solve(copy.deepcopy(self.board), self.cages, workers=2, trace=SearchTrace())
+        with self.assertRaises(ValueError):
+            SearchTrace().write(io.StringIO(), "svg")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import copy
+import unittest
+
+import solver
+from solver.stream import parse_line
+from solver.vectorized import np, solve_many
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.puzzles = [solver.load_from_file("Killer.json"), solver.load_from_file("puzzles/test_solve.json")]
+        for tier in ("easy", "medium"):
+            with open(f"puzzles/corpus/{tier}.jsonl") as lines:
+                self.puzzles.extend(parse_line(line) for line in lines if line.strip())
+        self.expected = []
+        for board, cages in self.puzzles:
+            solution = copy.deepcopy(board)
+            self.expected.append(solution if solver.solve(solution, cages) else None)
+
+    def check(self, use_numpy):
+        batch = [(copy.deepcopy(board), cages) for board, cages in self.puzzles]
+        results = solve_many(batch, use_numpy=use_numpy)
+        self.assertEqual(results, [solution is not None for solution in self.expected])
+        for (board, _), solution in zip(batch, self.expected):
+            if solution is not None:
+                self.assertEqual(board, solution)
+
+    def test_python(self):
+        self.check(False)
+
+    @unittest.skipIf(np is None, "NumPy no está instalado")
+    def test_numpy(self):
+        self.check(True)
+
+    @unittest.skipIf(np is None, "NumPy no está instalado")
+    def test_contradiction(self):
+        board, cages = copy.deepcopy(self.puzzles[0])
+        board[0][0] = board[0][1] = 1
+        self.assertEqual(solve_many([(board, cages)], use_numpy=True), [False])
+
+    def test_empty(self):
+        self.assertEqual(solve_many([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()